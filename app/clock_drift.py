@@ -0,0 +1,80 @@
+# app/clock_drift.py
+import math
+import threading
+from collections import OrderedDict
+
+from app.totp_utils import window_offsets
+
+
+class DriftTable:
+    """
+    Learns each subject's clock offset from the time steps its accepted codes
+    matched at, as an exponentially-decayed average (`alpha` is the weight of
+    the newest sample).
+
+    candidates(subject) gives the step offsets to try, most likely first. Until
+    a subject has `min_samples` accepted codes it gets the default ±base_window
+    search. After that, the window is extended around the learned offset by
+    ±base_window, capped at ±max_offset steps. The default window is always
+    kept, so a client whose clock gets fixed is not locked out. The wider
+    window only applies to that subject.
+
+    The table holds at most `max_subjects` entries and evicts the least recently
+    used first. Entries are tuples (offset, samples, candidates), so the hot
+    path is a single dict lookup.
+    """
+
+    def __init__(self, max_subjects: int = 100_000, alpha: float = 0.3, min_samples: int = 3,
+                 base_window: int = 1, max_offset: int = 2):
+        self.max_subjects = max_subjects
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.base_window = base_window
+        self.max_offset = max(max_offset, base_window)
+        self.default_candidates = window_offsets(base_window)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # subject -> (offset, samples, candidates)
+
+    def candidates(self, subject) -> tuple:
+        """Step offsets to try for `subject`, most likely first."""
+        entry = self._entries.get(subject)
+        return self.default_candidates if entry is None else entry[2]
+
+    def _candidates(self, offset: float, samples: int) -> tuple:
+        if samples < self.min_samples:
+            return self.default_candidates
+        center = max(-self.max_offset, min(self.max_offset, math.floor(offset + 0.5)))
+        allowed = set(self.default_candidates)
+        allowed.update(
+            o for o in range(center - self.base_window, center + self.base_window + 1)
+            if abs(o) <= self.max_offset
+        )
+        return tuple(sorted(allowed, key=lambda o: (abs(o - offset), abs(o), o)))
+
+    def record(self, subject, step_offset: int):
+        """Feeds the step offset an accepted code matched at (matched step - current step)."""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                offset, samples = float(step_offset), 1
+            else:
+                self._entries.move_to_end(subject)
+                offset = entry[0] + self.alpha * (step_offset - entry[0])
+                # Only "at least min_samples" matters, so the count stops there
+                samples = min(entry[1] + 1, self.min_samples)
+            self._entries[subject] = (offset, samples, self._candidates(offset, samples))
+            if entry is None and len(self._entries) > self.max_subjects:
+                self._entries.popitem(last=False)
+
+    def offset(self, subject):
+        """Learned offset in steps, or None if the subject has no accepted codes yet."""
+        entry = self._entries.get(subject)
+        return None if entry is None else entry[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "subjects": len(entries),
+            "extended": sum(1 for e in entries if len(e[2]) > len(self.default_candidates)),
+        }
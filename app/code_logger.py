@@ -0,0 +1,117 @@
+# app/code_logger.py
+import datetime
+import fcntl
+import os
+import sys
+import threading
+import time
+
+from app.seed_cache import SeedCache, SeedMissingError
+from app.totp_utils import PERIOD, generate_totp_code
+
+
+def format_timestamp(for_time: float) -> str:
+    """UTC timestamp in the cron log format (YYYY-MM-DD HH:MM:SS)."""
+    return datetime.datetime.fromtimestamp(for_time, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def next_boundary(now: float, interval: int) -> float:
+    """The first multiple of `interval` seconds strictly after `now`."""
+    return (int(now) // interval + 1) * interval
+
+
+class CodeLogger:
+    """
+    Long-lived replacement for the per-minute cron job: a thread that wakes on
+    every `interval`-second boundary (a multiple of the TOTP period) and appends
+    `YYYY-MM-DD HH:MM:SS - 2FA Code: XXXXXX` to `log_path` (stdout if None).
+
+    The seed comes from a SeedCache, so the file is only re-read when it changes.
+    The code is computed for the boundary itself, never for a slightly early or
+    late wake-up. With several uvicorn workers only the holder of an flock on
+    `<log_path>.lock` writes; the others keep retrying and take over if it exits.
+    Lines go through `sink` (e.g. a RotatingLogSink for log_path) when given.
+    """
+
+    def __init__(self, seed_cache: SeedCache, log_path: str = None, interval: int = 60, generate=None,
+                 sink=None):
+        if interval <= 0 or interval % PERIOD:
+            raise ValueError(f"Code log interval must be a multiple of {PERIOD} seconds")
+        self.seed_cache = seed_cache
+        self.log_path = log_path
+        self.interval = interval
+        # generate(seed_bytes, generation, for_time) -> code; defaults to the uncached engine
+        self.generate = generate or (lambda seed, generation, for_time: generate_totp_code(seed, for_time)[0])
+        self.sink = sink
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_fd = None
+        self.lines_written = 0
+
+    def _acquire_leader_lock(self) -> bool:
+        if self.log_path is None or self._lock_fd is not None:
+            return True
+        fd = os.open(self.log_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _write(self, line: str):
+        if self.sink is not None:
+            self.sink.write(line)
+            return
+        if self.log_path is None:
+            print(line, flush=True)
+            return
+        with open(self.log_path, "a") as f:
+            f.write(line + "\n")
+
+    def log_once(self, for_time: float = None):
+        """Writes the line for `for_time` (default: now). Errors are logged, not raised."""
+        if for_time is None:
+            for_time = time.time()
+        timestamp = format_timestamp(for_time)
+        try:
+            _, seed_bytes, generation = self.seed_cache.get()
+            line = f"{timestamp} - 2FA Code: {self.generate(seed_bytes, generation, for_time)}"
+        except SeedMissingError:
+            line = f"{timestamp} - ERROR: Seed not found at {self.seed_cache.path}"
+        except Exception as e:
+            line = f"{timestamp} - CRON JOB ERROR: {e}"
+        self._write(line)
+        self.lines_written += 1
+
+    def run(self):
+        """Blocks, logging on every boundary until stop() is called."""
+        boundary = next_boundary(time.time(), self.interval)
+        while not self._stop.wait(max(0.0, boundary - time.time())):
+            now = time.time()
+            if now - boundary >= self.interval:
+                # Woke up far too late (suspended host): resume from the current boundary
+                boundary = now - now % self.interval
+            try:
+                if self._acquire_leader_lock():
+                    self.log_once(boundary)
+            except OSError as e:
+                print(f"{format_timestamp(now)} - CRON JOB ERROR: {e}", file=sys.stderr)
+            boundary += self.interval
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="code-logger", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.sink is not None:
+            self.sink.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
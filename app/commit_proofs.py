@@ -0,0 +1,194 @@
+# app/commit_proofs.py
+import base64
+import json
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from app.crypto_utils import (
+    load_private_key,
+    load_public_key,
+    sign_message_p1,
+    encrypt_with_public_key,
+    verify_signature_p1,
+    decrypt_with_private_key,
+)
+
+# Set in each pool worker by _init_worker / _init_verifier
+_worker_key_paths = None
+_verifier_keys = None
+
+# Below this much work (signature checks, an RSA decrypt counting as 50) a single
+# process beats paying for spawning workers and re-parsing keys in each of them
+_MIN_PARALLEL_WORK = 5000
+
+
+def resolve_commits(revs: str, cwd: str = None) -> list:
+    """
+    Full commit hashes for `revs`, oldest first, from a single `git rev-list`.
+    A range ("v1.0..HEAD") walks history; a plain revision ("HEAD", "abc123")
+    means just that commit.
+    """
+    tokens = revs.split()
+    args = ["git", "rev-list", "--reverse"]
+    if not any(".." in t or t.startswith("^") for t in tokens):
+        args.append("--no-walk")
+    out = subprocess.check_output(args + tokens + ["--"], cwd=cwd)
+    return out.decode().split()
+
+
+def prove_commit(commit_hash: str, private_key_path: str, public_key_path: str) -> str:
+    """Base64 proof for one commit: RSA-PSS signature, RSA-OAEP encrypted to the instructor key."""
+    signature = sign_message_p1(commit_hash, load_private_key(private_key_path))
+    encrypted = encrypt_with_public_key(signature, load_public_key(public_key_path))
+    return base64.b64encode(encrypted).decode("ascii")
+
+
+def _init_worker(private_key_path: str, public_key_path: str):
+    # Parse both keys once per worker (KeyManager keeps them for every later commit)
+    global _worker_key_paths
+    load_private_key(private_key_path)
+    load_public_key(public_key_path)
+    _worker_key_paths = (private_key_path, public_key_path)
+
+
+def _prove_in_worker(commit_hash: str):
+    return commit_hash, prove_commit(commit_hash, *_worker_key_paths)
+
+
+def generate_proofs(commits, private_key_path: str, public_key_path: str, workers: int = None, chunksize: int = 4):
+    """
+    Yields (commit, proof) in the order of `commits`, as soon as each one (and
+    everything before it) is done. The signing runs across `workers` processes.
+    """
+    commits = list(commits)
+    workers = min(workers or os.cpu_count() or 1, len(commits))
+    if workers <= 1:
+        _init_worker(private_key_path, public_key_path)
+        for commit_hash in commits:
+            yield _prove_in_worker(commit_hash)
+        return
+    # spawn, like the decrypt pool: never fork a process that may run threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(private_key_path, public_key_path),
+    ) as executor:
+        yield from executor.map(_prove_in_worker, commits, chunksize=chunksize)
+
+
+def read_completed(output_path: str) -> list:
+    """
+    Commits already proven in a JSONL output file. A torn last line (an
+    interrupted run) is cut off so appending can continue cleanly.
+    """
+    if not os.path.exists(output_path):
+        return []
+    done = []
+    valid_length = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                commit_hash = entry["commit"]
+                entry["proof"]
+            except (ValueError, KeyError, TypeError):
+                break
+            if not line.endswith(b"\n"):
+                break
+            done.append(commit_hash)
+            valid_length += len(line)
+    if valid_length != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_length)
+    return done
+
+
+def write_proofs(revs: str, output_path: str, private_key_path: str, public_key_path: str,
+                 workers: int = None, cwd: str = None, progress=None) -> int:
+    """
+    Appends {"commit", "proof"} lines for every commit in `revs` that isn't in
+    `output_path` yet, in rev-list order, so a resumed file lists the same commits
+    in the same order as an uninterrupted run. Returns how many proofs were written.
+    """
+    commits = resolve_commits(revs, cwd)
+    done = read_completed(output_path)
+    if done != commits[:len(done)]:
+        raise ValueError(f"{output_path} holds proofs for a different range; use a new output file")
+    pending = commits[len(done):]
+    if not pending:
+        return 0
+    written = 0
+    with open(output_path, "a", encoding="utf-8") as out:
+        for commit_hash, proof in generate_proofs(pending, private_key_path, public_key_path, workers):
+            out.write(json.dumps({"commit": commit_hash, "proof": proof}) + "\n")
+            out.flush()
+            written += 1
+            if progress is not None:
+                progress(written, len(pending))
+        os.fsync(out.fileno())
+    return written
+
+
+# --- Verification ---
+
+def _init_verifier(public_key_paths, private_key_path):
+    # Parse every key once per worker; items only carry the commit and the proof
+    global _verifier_keys
+    public_keys = [(path, load_public_key(path)) for path in public_key_paths]
+    private_key = load_private_key(private_key_path) if private_key_path else None
+    _verifier_keys = (public_keys, private_key)
+
+
+def check_proof(entry: dict) -> dict:
+    """
+    Verifies one {"commit", "proof" | "signature"} entry with the worker's keys.
+    "proof" is the encrypted form (decrypted first, needs the private key),
+    "signature" a bare base64 signature. Returns {"commit", "valid", "key" | "error"}.
+    """
+    public_keys, private_key = _verifier_keys
+    commit_hash = entry.get("commit")
+    if not isinstance(commit_hash, str):
+        return {"commit": commit_hash, "valid": False, "error": "missing commit"}
+    try:
+        if "signature" in entry:
+            signature = base64.b64decode(entry["signature"], validate=True)
+        elif private_key is None:
+            return {"commit": commit_hash, "valid": False, "error": "encrypted proof needs a private key"}
+        else:
+            signature = decrypt_with_private_key(base64.b64decode(entry["proof"], validate=True), private_key)
+    except (KeyError, TypeError, ValueError) as e:
+        # ValueError covers bad base64 and OAEP decryption failures
+        return {"commit": commit_hash, "valid": False, "error": f"unreadable proof: {str(e) or type(e).__name__}"}
+    for path, public_key in public_keys:
+        if verify_signature_p1(commit_hash, signature, public_key):
+            return {"commit": commit_hash, "valid": True, "key": path}
+    return {"commit": commit_hash, "valid": False, "error": "signature does not match any key"}
+
+
+def verify_proofs(entries, public_key_paths, private_key_path: str = None, workers: int = None, chunksize: int = 64):
+    """
+    Yields one result per entry (see check_proof), in input order. Entries are
+    sent to the workers in chunks of `chunksize` to keep IPC overhead per item low.
+    Without an explicit `workers`, small batches are verified in-process.
+    """
+    entries = list(entries)
+    public_key_paths = list(public_key_paths)
+    if workers is None:
+        work = len(entries) * (50 if private_key_path else 1)
+        workers = (os.cpu_count() or 1) if work >= _MIN_PARALLEL_WORK else 1
+    workers = min(workers, max(1, len(entries) // chunksize))
+    if workers <= 1:
+        _init_verifier(public_key_paths, private_key_path)
+        for entry in entries:
+            yield check_proof(entry)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_verifier,
+        initargs=(public_key_paths, private_key_path),
+    ) as executor:
+        yield from executor.map(check_proof, entries, chunksize=chunksize)
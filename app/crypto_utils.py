@@ -1,24 +1,98 @@
 # app/crypto_utils.py
 import base64
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding, utils, rsa
-from cryptography.hazmat.backends import default_backend
+import os
+import threading
+import time
+
+# The cryptography hazmat modules dominate this module's import time, so they are
+# imported on first use (or ahead of time with preload(), e.g. from a lifespan hook)
+def _hazmat():
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    return hashes, serialization, padding
+
+def preload():
+    """Imports the crypto backend now instead of on the first key load."""
+    _hazmat()
+
+class KeyManager:
+    """
+    Caches parsed key objects per path. A key is re-parsed only when its file's
+    (mtime, inode, size) fingerprint changes, so hot paths never touch the PEM.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}  # (kind, path) -> dict(key, fingerprint, loaded_at, load_seconds)
+
+    def _get(self, kind: str, path: str, loader):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        fingerprint = (st.st_mtime_ns, st.st_ino, st.st_size)
+        entry = self._keys.get((kind, path))
+        if entry is not None and entry["fingerprint"] == fingerprint:
+            return entry["key"]
+
+        with self._lock:
+            entry = self._keys.get((kind, path))
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                return entry["key"]
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                key = loader(f.read())
+            self._keys[(kind, path)] = {
+                "key": key,
+                "fingerprint": fingerprint,
+                "loaded_at": time.time(),
+                "load_seconds": time.perf_counter() - start,
+            }
+            if entry is not None:
+                print(f"Reloaded {kind} key from {path} (file changed)")
+            return key
+
+    def private_key(self, path: str):
+        serialization = _hazmat()[1]
+        return self._get("private", path, lambda pem: serialization.load_pem_private_key(pem, password=None))
+
+    def public_key(self, path: str):
+        serialization = _hazmat()[1]
+        return self._get("public", path, lambda pem: serialization.load_pem_public_key(pem))
+
+    def info(self) -> list:
+        """Load time and age of every cached key."""
+        now = time.time()
+        return [
+            {
+                "kind": kind,
+                "path": path,
+                "load_seconds": entry["load_seconds"],
+                "loaded_at": entry["loaded_at"],
+                "age_seconds": now - entry["loaded_at"],
+            }
+            for (kind, path), entry in list(self._keys.items())
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+# Process-wide manager shared by the API and the commit-proof tools
+key_manager = KeyManager()
 
 def load_private_key(path: str):
-    """Loads a private key from a PEM file."""
-    with open(path, "rb") as f:
-        return serialization.load_pem_private_key(f.read(), password=None, backend=default_backend())
+    """Loads a private key from a PEM file (cached, reloaded when the file changes)."""
+    return key_manager.private_key(path)
 
 def load_public_key(path: str):
-    """Loads a public key from a PEM file."""
-    with open(path, "rb") as f:
-        return serialization.load_pem_public_key(f.read(), backend=default_backend())
+    """Loads a public key from a PEM file (cached, reloaded when the file changes)."""
+    return key_manager.public_key(path)
 
 def decrypt_seed(encrypted_seed_b64: str, private_key) -> str:
     """
     Decrypts a base64-encoded encrypted seed using RSA/OAEP with SHA-256.
     Returns: Decrypted hex seed (64-character string).
     """
+    hashes, _, padding = _hazmat()
     ciphertext = base64.b64decode(encrypted_seed_b64)
     
     # CRITICAL: Use correct parameters: OAEP, MGF1(SHA256), SHA256, label=None
@@ -36,6 +110,9 @@ def decrypt_seed(encrypted_seed_b64: str, private_key) -> str:
         print(f"Decryption Error: {e}")
         raise ValueError("Decryption failed")
     
+    return _hex_seed(decrypted_bytes)
+
+def _hex_seed(decrypted_bytes: bytes) -> str:
     # The decrypted seed is a 64-char hex string (32 bytes)
     hex_seed = decrypted_bytes.decode('utf-8')
     
@@ -44,11 +121,80 @@ def decrypt_seed(encrypted_seed_b64: str, private_key) -> str:
         
     return hex_seed
 
+# --- X25519 seed envelope ---
+# "x25519:" + base64(ephemeral public key (32) | nonce (12) | AES-256-GCM ciphertext + tag).
+# The AES key is HKDF-SHA256 over the X25519 shared secret, salted with both public
+# keys; the ephemeral key is also the GCM associated data. One ECDH replaces the
+# RSA-4096 private-key operation, which is ~30x more expensive.
+
+ENVELOPE_RSA = "rsa-oaep"
+ENVELOPE_X25519 = "x25519"
+X25519_PREFIX = "x25519:"
+_X25519_INFO = b"pki-2fa seed envelope v1"
+
+def _x25519():
+    from cryptography.hazmat.primitives.asymmetric import x25519
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    return x25519, AESGCM, HKDF
+
+def detect_envelope(encrypted_seed: str) -> str:
+    """ENVELOPE_X25519 for "x25519:"-prefixed seeds, ENVELOPE_RSA (the default) otherwise."""
+    return ENVELOPE_X25519 if encrypted_seed.startswith(X25519_PREFIX) else ENVELOPE_RSA
+
+def _envelope_key(shared_secret: bytes, ephemeral_public: bytes, recipient_public: bytes) -> bytes:
+    hashes = _hazmat()[0]
+    HKDF = _x25519()[2]
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=ephemeral_public + recipient_public, info=_X25519_INFO
+    ).derive(shared_secret)
+
+def _raw_public(public_key) -> bytes:
+    serialization = _hazmat()[1]
+    return public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+def encrypt_seed_x25519(hex_seed: str, public_key) -> str:
+    """Seals a hex seed to an X25519 public key; returns the "x25519:"-prefixed envelope."""
+    x25519, AESGCM, _ = _x25519()
+    if not isinstance(public_key, x25519.X25519PublicKey):
+        raise ValueError("x25519 envelopes need an X25519 public key")
+    ephemeral = x25519.X25519PrivateKey.generate()
+    ephemeral_public = _raw_public(ephemeral.public_key())
+    key = _envelope_key(ephemeral.exchange(public_key), ephemeral_public, _raw_public(public_key))
+    nonce = os.urandom(12)
+    ciphertext = AESGCM(key).encrypt(nonce, hex_seed.encode("utf-8"), ephemeral_public)
+    return X25519_PREFIX + base64.b64encode(ephemeral_public + nonce + ciphertext).decode("ascii")
+
+def decrypt_seed_x25519(encrypted_seed: str, private_key) -> str:
+    """
+    Opens an X25519 envelope (with or without the "x25519:" prefix).
+    Returns: Decrypted hex seed (64-character string).
+    """
+    x25519, AESGCM, _ = _x25519()
+    if not isinstance(private_key, x25519.X25519PrivateKey):
+        raise ValueError("x25519 envelopes need an X25519 private key")
+    if encrypted_seed.startswith(X25519_PREFIX):
+        encrypted_seed = encrypted_seed[len(X25519_PREFIX):]
+    try:
+        envelope = base64.b64decode(encrypted_seed, validate=True)
+        if len(envelope) < 32 + 12 + 16:
+            raise ValueError("envelope too short")
+        ephemeral_public, nonce, ciphertext = envelope[:32], envelope[32:44], envelope[44:]
+        shared_secret = private_key.exchange(x25519.X25519PublicKey.from_public_bytes(ephemeral_public))
+        key = _envelope_key(shared_secret, ephemeral_public, _raw_public(private_key.public_key()))
+        decrypted_bytes = AESGCM(key).decrypt(nonce, ciphertext, ephemeral_public)
+    except Exception as e:
+        # Wrong key, tampered or truncated envelope (InvalidTag), bad base64
+        print(f"Decryption Error: {e!r}")
+        raise ValueError("Decryption failed")
+    return _hex_seed(decrypted_bytes)
+
 def sign_message_p1(commit_hash: str, private_key):
     """
     Signs a commit hash using RSA-PSS with SHA-256 and maximum salt length.
     CRITICAL: Signs the ASCII string, not binary hex.
     """
+    hashes, _, padding = _hazmat()
     message = commit_hash.encode("utf-8")
     
     # CRITICAL: Use correct parameters: PSS, MGF1(SHA256), SHA256, MAX_LENGTH
@@ -62,10 +208,47 @@ def sign_message_p1(commit_hash: str, private_key):
     )
     return signature
 
+def verify_signature_p1(commit_hash: str, signature: bytes, public_key) -> bool:
+    """
+    Checks a sign_message_p1 signature (RSA-PSS, SHA-256, maximum salt length)
+    over the ASCII commit hash. Returns False instead of raising on a bad signature.
+    """
+    hashes, _, padding = _hazmat()
+    from cryptography.exceptions import InvalidSignature
+    try:
+        public_key.verify(
+            signature,
+            commit_hash.encode("utf-8"),
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            hashes.SHA256()
+        )
+    except InvalidSignature:
+        return False
+    return True
+
+def decrypt_with_private_key(ciphertext: bytes, private_key) -> bytes:
+    """
+    Reverses encrypt_with_public_key (RSA/OAEP with SHA-256), e.g. to recover a
+    commit signature with the instructor's private key.
+    """
+    hashes, _, padding = _hazmat()
+    return private_key.decrypt(
+        ciphertext,
+        padding.OAEP(
+            mgf=padding.MGF1(hashes.SHA256()),
+            algorithm=hashes.SHA256(),
+            label=None
+        )
+    )
+
 def encrypt_with_public_key(data: bytes, public_key) -> bytes:
     """
     Encrypts data (signature) using RSA/OAEP with instructor's public key.
     """
+    hashes, _, padding = _hazmat()
     # CRITICAL: Use correct parameters: OAEP, MGF1(SHA256), SHA256, label=None
     ciphertext = public_key.encrypt(
         data,
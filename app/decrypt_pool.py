@@ -0,0 +1,200 @@
+# app/decrypt_pool.py
+import asyncio
+import os
+import time
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+
+from app.crypto_utils import (
+    ENVELOPE_X25519,
+    key_manager,
+    load_private_key,
+    decrypt_seed,
+    decrypt_seed_x25519,
+    detect_envelope,
+)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the decrypt queue is full; callers should answer 503 + Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Decrypt queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class KeyLoadError(Exception):
+    """Raised (from the worker) when the private key cannot be loaded."""
+
+
+def _load_key_in_worker(private_key_path: str):
+    # Each worker process keeps its own cached key (see crypto_utils.KeyManager)
+    try:
+        return load_private_key(private_key_path)
+    except Exception as e:
+        raise KeyLoadError(str(e))
+
+
+def _decrypt_in_worker(encrypted_seed_b64: str, private_key_path: str, x25519_key_path: str = None):
+    """
+    Returns (hex_seed, seconds spent decrypting, this worker's key info), timed here
+    so queueing isn't counted. "x25519:" envelopes are opened with the X25519 key,
+    anything else with RSA-OAEP.
+    """
+    if detect_envelope(encrypted_seed_b64) == ENVELOPE_X25519:
+        if x25519_key_path is None:
+            raise ValueError("x25519 envelopes are not enabled")
+        decrypt, private_key = decrypt_seed_x25519, _load_key_in_worker(x25519_key_path)
+    else:
+        decrypt, private_key = decrypt_seed, _load_key_in_worker(private_key_path)
+    start = time.perf_counter()
+    hex_seed = decrypt(encrypted_seed_b64, private_key)
+    return hex_seed, time.perf_counter() - start, key_manager.info()
+
+
+def _warm_worker(private_key_path: str, x25519_key_path: str = None) -> list:
+    """Parses the key(s) in this worker; returns its KeyManager.info()."""
+    _load_key_in_worker(private_key_path)
+    # The X25519 key is optional: only preload it when it has been provisioned
+    if x25519_key_path is not None and os.path.exists(x25519_key_path):
+        _load_key_in_worker(x25519_key_path)
+    return key_manager.info()
+
+
+class DecryptPool:
+    """
+    Runs seed decryption (RSA-OAEP, or X25519 envelopes when an X25519 key path
+    is given) off the event loop with admission control.
+
+    `kind` is "process" (default, one key copy per worker, scales across cores)
+    or "thread" (shares the parent's cached key; only useful if the crypto
+    backend releases the GIL). At most `max_pending` decryptions may be queued
+    or running; beyond that PoolSaturatedError is raised immediately.
+    `observe(seconds)`, if given, receives each decryption's in-worker duration.
+    key_info() reports how long the workers took to parse each key and how long
+    ago, as last reported by a worker (at warm-up and with every decryption).
+    """
+
+    def __init__(self, kind: str = "process", workers: int = None, max_pending: int = 64, retry_after: int = 1,
+                 observe=None):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown decrypt pool kind: {kind!r}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.observe = observe
+        self._executor = None
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = 0
+        self.rejected = 0
+        self._keys = {}  # (kind, path) -> newest load reported by any worker
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                # Imported here: multiprocessing is not needed for thread pools or at import time
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # spawn: never fork a process that already runs server threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decrypt")
+        return self._executor
+
+    def _admit(self, count: int):
+        if self._pending + count > self.max_pending:
+            self.rejected += count
+            raise PoolSaturatedError(self.retry_after)
+        self._pending += count
+
+    async def warm(self, private_key_path: str, x25519_key_path: str = None):
+        """Starts the workers and has them parse the private key(s) ahead of the first request."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            for keys in await asyncio.gather(*(
+                loop.run_in_executor(executor, _warm_worker, private_key_path, x25519_key_path)
+                for _ in range(self.workers)
+            )):
+                self._note_keys(keys)
+        except BrokenExecutor as e:
+            self._discard_if_broken(e)
+            raise
+
+    def _discard_if_broken(self, error: Exception):
+        # A crashed worker poisons the whole ProcessPoolExecutor; start a fresh one next time
+        if isinstance(error, BrokenExecutor) and self._executor is not None:
+            print(f"Decrypt pool broken, recreating: {error}")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _note_keys(self, keys):
+        for info in keys:
+            known = self._keys.get((info["kind"], info["path"]))
+            if known is None or info["loaded_at"] >= known["loaded_at"]:
+                self._keys[info["kind"], info["path"]] = info
+
+    def key_info(self) -> list:
+        """Kind, path, load time and age of each key the workers have parsed."""
+        now = time.time()
+        return [
+            {
+                "kind": info["kind"],
+                "path": info["path"],
+                "load_seconds": info["load_seconds"],
+                "age_seconds": now - info["loaded_at"],
+            }
+            for info in self._keys.values()
+        ]
+
+    def _unwrap(self, result):
+        hex_seed, seconds, keys = result
+        if self.observe is not None:
+            self.observe(seconds)
+        self._note_keys(keys)
+        return hex_seed
+
+    async def decrypt(self, encrypted_seed_b64: str, private_key_path: str, x25519_key_path: str = None) -> str:
+        self._admit(1)
+        try:
+            loop = asyncio.get_running_loop()
+            return self._unwrap(await loop.run_in_executor(
+                self._get_executor(), _decrypt_in_worker, encrypted_seed_b64, private_key_path, x25519_key_path
+            ))
+        except BrokenExecutor as e:
+            self._discard_if_broken(e)
+            raise
+        finally:
+            self._pending -= 1
+
+    async def decrypt_many(self, encrypted_seeds, private_key_path: str, x25519_key_path: str = None) -> list:
+        """
+        Fans a list of encrypted seeds out across the workers. Returns, in order,
+        either the hex seed or the exception raised for that item.
+        """
+        encrypted_seeds = list(encrypted_seeds)
+        self._admit(len(encrypted_seeds))
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            results = await asyncio.gather(*(
+                loop.run_in_executor(executor, _decrypt_in_worker, enc, private_key_path, x25519_key_path)
+                for enc in encrypted_seeds
+            ), return_exceptions=True)
+            for result in results:
+                if isinstance(result, BrokenExecutor):
+                    self._discard_if_broken(result)
+                    break
+            return [r if isinstance(r, BaseException) else self._unwrap(r) for r in results]
+        finally:
+            self._pending -= len(encrypted_seeds)
+
+    def stats(self) -> dict:
+        return {"kind": self.kind, "workers": self.workers, "pending": self._pending, "rejected": self.rejected}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,151 @@
+# app/fast_path.py
+import json
+from urllib.parse import parse_qsl
+
+from starlette.exceptions import HTTPException
+
+from app.rate_limit import client_address
+
+_GENERATE = ("GET", "/generate-2fa")
+_VERIFY = ("POST", "/verify-2fa")
+
+# Verify2FAResponse bodies as FastAPI serialises them (exclude_none, compact separators)
+_VERIFY_BODIES = {
+    (True, None): b'{"valid":true}',
+    (False, None): b'{"valid":false}',
+    (False, "replayed"): b'{"valid":false,"reason":"replayed"}',
+}
+
+
+def encode_json(payload) -> bytes:
+    """Same bytes as Starlette's JSONResponse.render."""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _is_json(headers) -> bool:
+    # FastAPI parses the body as JSON when the content type is missing, application/json or */*+json
+    for name, value in headers:
+        if name == b"content-type":
+            media = value.split(b";", 1)[0].strip().lower()
+            return media == b"application/json" or (media.startswith(b"application/") and media.endswith(b"+json"))
+    return True
+
+
+def parse_verify_body(body: bytes):
+    """
+    (subject, code) if `body` is a Verify2FARequest pydantic accepts as-is,
+    else None (the request is handed to FastAPI, which produces the 422).
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    code = data.get("code")
+    subject = data.get("subject")
+    if type(code) is not str or (subject is not None and type(subject) is not str):
+        return None
+    return subject, code
+
+
+async def _send_response(send, status: int, body: bytes, headers=None):
+    raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+    raw_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    raw_headers.append((b"content-type", b"application/json"))
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class FastPathMiddleware:
+    """
+    Serves GET /generate-2fa and POST /verify-2fa without FastAPI's request
+    parsing, dependency resolution and response-model validation: the body is
+    checked by hand and the response written as pre-encoded bytes.
+
+    `generate(subject)` and `verify(subject, code, client)` are the same
+    helpers the FastAPI routes call, and `client_address(scope)` the same
+    throttling key, so validation, throttling and error bodies are identical. Anything the fast path can't answer exactly like
+    FastAPI (malformed JSON, wrong field types, other content types) falls
+    through to the app with the body replayed.
+    """
+
+    def __init__(self, app, generate, verify, routes=(), client_address=client_address):
+        self.app = app
+        self.generate = generate
+        self.verify = verify
+        self.client_address = client_address
+        # The FastAPI routes these requests would have matched, so metrics keep their labels
+        self.routes = {}
+        for route in routes:
+            for method in getattr(route, "methods", None) or ():
+                if (method, route.path) in (_GENERATE, _VERIFY):
+                    self.routes[(method, route.path)] = route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            key = (scope["method"], scope["path"])
+            if key == _VERIFY:
+                return await self._verify(scope, receive, send)
+            if key == _GENERATE:
+                return await self._generate(scope, send)
+        await self.app(scope, receive, send)
+
+    def _matched(self, scope, key):
+        route = self.routes.get(key)
+        if route is not None:
+            scope["route"] = route
+
+    async def _generate(self, scope, send):
+        self._matched(scope, _GENERATE)
+        subject = None
+        # Like Starlette's QueryParams: latin-1, blank values kept, the last value wins
+        for name, value in parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True):
+            if name == "subject":
+                subject = value
+        try:
+            result = await self.generate(subject)
+        except HTTPException as e:
+            return await _send_response(send, e.status_code, encode_json({"detail": e.detail}), e.headers)
+        body = b'{"code":"%s","valid_for":%d}' % (result["code"].encode(), result["valid_for"])
+        await _send_response(send, 200, body)
+
+    async def _verify(self, scope, receive, send):
+        if not _is_json(scope["headers"]):
+            return await self.app(scope, receive, send)
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        fields = parse_verify_body(body)
+        if fields is None:
+            return await self.app(scope, _replay(body, receive), send)
+
+        self._matched(scope, _VERIFY)
+        subject, code = fields
+        try:
+            result = await self.verify(subject, code, self.client_address(scope))
+        except HTTPException as e:
+            return await _send_response(send, e.status_code, encode_json({"detail": e.detail}), e.headers)
+        encoded = _VERIFY_BODIES.get((result["valid"], result.get("reason")))
+        await _send_response(send, 200, encoded if encoded is not None else encode_json(result))
+
+
+def _replay(body: bytes, receive):
+    """A receive() that hands out the already-read body once, then defers to the server."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
@@ -0,0 +1,234 @@
+# app/key_provisioning.py
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.seed_store import validate_subject
+from app.storage import atomic_write_bytes
+
+PRIVATE_KEY_FILE = "private.pem"
+PUBLIC_KEY_FILE = "public.pem"
+KEY_TYPES = ("rsa", "x25519")
+
+
+def generate_key_pair_pem(key_size: int = 4096, public_exponent: int = 65537):
+    """One RSA key pair as (PKCS#8 private PEM, SPKI public PEM) bytes."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=public_exponent, key_size=key_size)
+    private_pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem
+
+
+def generate_x25519_key_pair_pem():
+    """One X25519 key pair (for "x25519:" seed envelopes) as (PKCS#8 private PEM, SPKI public PEM) bytes."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import x25519
+
+    key = x25519.X25519PrivateKey.generate()
+    private_pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem
+
+
+def tenant_key_paths(root: str, tenant: str, key_type: str = "rsa"):
+    """
+    (private, public) PEM paths of a tenant: <root>/<tenant>/private.pem and
+    public.pem (x25519_private.pem and x25519_public.pem for X25519 keys).
+    """
+    directory = os.path.join(root, validate_subject(tenant))
+    prefix = "" if key_type == "rsa" else f"{key_type}_"
+    return os.path.join(directory, prefix + PRIVATE_KEY_FILE), os.path.join(directory, prefix + PUBLIC_KEY_FILE)
+
+
+def _free_key_paths(root: str, tenant: str, force: bool, key_type: str = "rsa"):
+    private_path, public_path = tenant_key_paths(root, tenant, key_type)
+    if not force and (os.path.exists(private_path) or os.path.exists(public_path)):
+        raise FileExistsError(f"Keys for tenant {tenant!r} already exist in {os.path.dirname(private_path)}")
+    return private_path, public_path
+
+
+def write_key_pair(root: str, tenant: str, pair, force: bool = False, key_type: str = "rsa"):
+    """
+    Writes a tenant's key pair atomically (the public key last, so its presence
+    means the pair is complete). Refuses to replace existing keys unless `force`.
+    """
+    private_path, public_path = _free_key_paths(root, tenant, force, key_type)
+    private_pem, public_pem = pair
+    atomic_write_bytes(private_path, private_pem, mode=0o600)
+    atomic_write_bytes(public_path, public_pem, mode=0o644)
+    return private_path, public_path
+
+
+def _process_pool(workers: int):
+    # spawn, like the decrypt pool: never fork a process that may run threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def generate_key_pairs(count: int, key_size: int = 4096, public_exponent: int = 65537, workers: int = None,
+                       key_type: str = "rsa"):
+    """Yields `count` key pairs as they finish, generated across `workers` processes."""
+    if key_type == "x25519":
+        # Microseconds per key: a process pool would only add overhead
+        for _ in range(count):
+            yield generate_x25519_key_pair_pem()
+        return
+    workers = min(workers or os.cpu_count() or 1, count)
+    if workers <= 1:
+        for _ in range(count):
+            yield generate_key_pair_pem(key_size, public_exponent)
+        return
+    with _process_pool(workers) as executor:
+        futures = [executor.submit(generate_key_pair_pem, key_size, public_exponent) for _ in range(count)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def provision_tenants(root: str, tenants, key_size: int = 4096, public_exponent: int = 65537,
+                      workers: int = None, force: bool = False, key_type: str = "rsa") -> dict:
+    """
+    Generates and writes a key pair for every tenant. Returns a report with the
+    per-tenant paths and the throughput (keys/s overall and per worker).
+    """
+    if key_type not in KEY_TYPES:
+        raise ValueError(f"Unknown key type {key_type!r} (expected one of {', '.join(KEY_TYPES)})")
+    tenants = [validate_subject(t) for t in tenants]
+    if not force:
+        for tenant in tenants:
+            if os.path.exists(tenant_key_paths(root, tenant, key_type)[1]):
+                raise FileExistsError(f"Keys for tenant {tenant!r} already exist")
+    workers = 1 if key_type == "x25519" else max(1, min(workers or os.cpu_count() or 1, len(tenants)))
+    start = time.perf_counter()
+    paths = {}
+    pairs = generate_key_pairs(len(tenants), key_size, public_exponent, workers, key_type)
+    for tenant, pair in zip(tenants, pairs):
+        paths[tenant] = write_key_pair(root, tenant, pair, force=force, key_type=key_type)
+    elapsed = time.perf_counter() - start
+    rate = len(tenants) / elapsed if elapsed else 0.0
+    return {
+        "paths": paths,
+        "seconds": elapsed,
+        "workers": workers,
+        "keys_per_second": rate,
+        "keys_per_second_per_worker": rate / workers,
+    }
+
+
+class KeyPool:
+    """
+    Keeps up to `size` pre-generated key pairs in memory, refilled in the
+    background by `workers` processes, so take() is instant while the pool
+    isn't drained (it falls back to generating inline when it is).
+
+    Pooled private keys never touch the disk until they are written for a tenant.
+    """
+
+    def __init__(self, size: int = 8, key_size: int = 4096, public_exponent: int = 65537, workers: int = 1):
+        self.size = size
+        self.key_size = key_size
+        self.public_exponent = public_exponent
+        self.workers = workers
+        self._ready = queue.Queue()
+        # Reentrant: a future that is already done runs its callback inside _refill()
+        self._lock = threading.RLock()
+        self._inflight = 0
+        self._executor = None
+        self._stopped = False
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _refill(self):
+        # Caller holds self._lock; keep at most `workers` generations in flight
+        missing = self.size - self._ready.qsize() - self._inflight
+        for _ in range(max(0, min(missing, self.workers - self._inflight))):
+            future = self._executor.submit(generate_key_pair_pem, self.key_size, self.public_exponent)
+            self._inflight += 1
+            future.add_done_callback(self._generated)
+
+    def _generated(self, future):
+        with self._lock:
+            self._inflight -= 1
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                self._ready.put(future.result())
+            else:
+                self.errors += 1
+                print(f"Key pool generation failed: {error}")
+            if not self._stopped and self.errors < 3 * self.size:
+                self._refill()
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._stopped = False
+                self._executor = _process_pool(self.workers)
+                self._refill()
+        return self
+
+    def take(self):
+        """A fresh (private_pem, public_pem) pair; each pair is handed out once."""
+        try:
+            pair = self._ready.get_nowait()
+            self.hits += 1
+        except queue.Empty:
+            self.misses += 1
+            pair = generate_key_pair_pem(self.key_size, self.public_exponent)
+        with self._lock:
+            if self._executor is not None and not self._stopped:
+                self._refill()
+        return pair
+
+    def fill(self, timeout: float = None) -> bool:
+        """Waits until the pool is full (True) or `timeout` seconds pass (False)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._ready.qsize() < self.size:
+            if self._stopped or self._executor is None or self.errors >= 3 * self.size:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def provision(self, root: str, tenant: str, force: bool = False):
+        """Writes a pooled key pair for `tenant`; returns (private_path, public_path)."""
+        # Checked before take(), so an existing tenant doesn't use up a pooled key
+        _free_key_paths(root, tenant, force)
+        return write_key_pair(root, tenant, self.take(), force=force)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self._ready.qsize(),
+            "inflight": self._inflight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
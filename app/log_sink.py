@@ -0,0 +1,150 @@
+# app/log_sink.py
+import gzip
+import os
+import shutil
+import threading
+import time
+
+_TAIL_BLOCK = 8192
+
+
+class RotatingLogSink:
+    """
+    Append-only line log with size- and/or time-based rotation.
+
+    Lines go to the OS page cache straight away (so readers and /cron/last-codes
+    see them), but the file is only fsync'd every `fsync_interval` seconds, on
+    rotation and on close. When the current file would exceed `max_bytes`, or
+    `rotate_interval` seconds have passed since it was opened, it is renamed to
+    `<path>.1` (older segments shift to `.2`, `.3`, ...; at most `backups` are
+    kept), gzip-compressed with `compress`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1_048_576, rotate_interval: float = 0,
+                 backups: int = 5, compress: bool = False, fsync_interval: float = 5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compress = compress
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._synced_at = 0.0
+        self._dirty = False
+        self.rotations = 0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._opened_at = self._synced_at = time.monotonic()
+
+    def _segment(self, index: int) -> str:
+        return f"{self.path}.{index}.gz" if self.compress else f"{self.path}.{index}"
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._file = None
+        if self.backups <= 0:
+            os.unlink(self.path)
+            return
+        # Shift .1 -> .2 -> ... and drop whatever falls off the end
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(self._segment(index)):
+                os.replace(self._segment(index), self._segment(index + 1))
+        if self.compress:
+            with open(self.path, "rb") as src, gzip.open(self._segment(1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.unlink(self.path)
+        else:
+            os.replace(self.path, self._segment(1))
+        self.rotations += 1
+
+    def _due_for_rotation(self, incoming: int) -> bool:
+        if self._size == 0:
+            return False
+        if self.max_bytes and self._size + incoming > self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.monotonic() - self._opened_at >= self.rotate_interval
+
+    def _sync(self):
+        if self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+        self._synced_at = time.monotonic()
+
+    def write(self, line: str):
+        data = line + "\n"
+        incoming = len(data.encode("utf-8"))
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self._due_for_rotation(incoming):
+                self._rotate()
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+            self._size += incoming
+            self._dirty = True
+            if time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._sync()
+
+    def flush(self):
+        """Forces pending lines to disk (fsync)."""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+
+def _read_segment_lines(path: str) -> list:
+    """All lines of a rotated segment (plain or .gz); segments are bounded by max_bytes."""
+    for candidate, opener in ((path, open), (path + ".gz", gzip.open)):
+        try:
+            with opener(candidate, "rt", encoding="utf-8") as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            continue
+    return []
+
+
+def tail(path: str, n: int) -> list:
+    """
+    Returns the last `n` lines of the log, oldest first. Reads the current file
+    backwards in blocks from its end (cost depends on `n`, not the file size) and
+    only falls back to the previous segment if the current one is shorter.
+    """
+    if n <= 0:
+        return []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        lines = []
+    else:
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            data = b""
+            # n lines need n+1 newlines (the last line's terminator plus one before each)
+            while position > 0 and data.count(b"\n") <= n:
+                step = min(_TAIL_BLOCK, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if position > 0:
+            lines = lines[1:]  # the first line may have been cut mid-way
+    if len(lines) < n:
+        lines = _read_segment_lines(path + ".1")[-(n - len(lines)):] + lines
+    return lines[-n:]
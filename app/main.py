@@ -1,109 +1,543 @@
 # app/main.py
 import os
 import json
+import time
+import asyncio
+import sqlite3
 import base64
-from fastapi import FastAPI, APIRouter, HTTPException, Body
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
+from fastapi import FastAPI, APIRouter, HTTPException, Body, Request
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.exceptions import ExceptionMiddleware
 from pydantic import BaseModel, Field
-from app.crypto_utils import load_private_key, decrypt_seed
-from app.totp_utils import generate_totp_code, verify_totp_code
+from app.crypto_utils import (
+    preload as preload_crypto,
+    detect_envelope,
+    ENVELOPE_RSA,
+    ENVELOPE_X25519,
+    X25519_PREFIX,
+)
+from app.metrics import Registry, MetricsMiddleware
+from app.fast_path import FastPathMiddleware
+from app.profiling import ProfilingMiddleware
+from app.code_logger import CodeLogger
+from app.log_sink import RotatingLogSink, tail
+from app.decrypt_pool import DecryptPool, PoolSaturatedError, KeyLoadError
+from app.storage import run_io, submit_io
+from app.rate_limit import TokenBucketLimiter, client_address
+from app.totp_utils import CodeWindowCache, PERIOD, timecode
+from app.clock_drift import DriftTable
+from app.replay_cache import ReplayCache, SharedReplayCache, REPLAYED, FULL as REPLAY_CACHE_FULL
+from app.seed_cache import SeedCache, SeedMissingError, SeedCorruptError
+from app.shared_seed import SharedSeed, default_segment_path
+from app.seed_store import (
+    FileSeedStore,
+    SQLiteSeedStore,
+    TenantSeedStore,
+    SeedRecord,
+    DEFAULT_SUBJECT,
+    validate_subject,
+)
+
+# Constants
+SEED_FILE_PATH = os.environ.get("SEED_FILE_PATH", "/data/seed.txt")
+SEED_DB_PATH = os.environ.get("SEED_DB_PATH", "/data/seeds.db")  # Per-subject seeds
+SEED_LRU_SIZE = int(os.environ.get("SEED_LRU_SIZE", "10000"))
+# Default seed shared by all uvicorn workers through an mmap'd segment (see app/shared_seed.py);
+# on by default only with several workers (docker-entrypoint.sh passes UVICORN_WORKERS to uvicorn)
+UVICORN_WORKERS = int(os.environ.get("UVICORN_WORKERS") or os.environ.get("WEB_CONCURRENCY") or "1")
+SEED_SHARED_MEMORY = os.environ.get("SEED_SHARED_MEMORY", "1" if UVICORN_WORKERS > 1 else "0") == "1"
+SEED_SHM_PATH = os.environ.get("SEED_SHM_PATH") or default_segment_path(SEED_FILE_PATH)
+# With the per-client bucket on (VERIFY_CLIENT_RATE > 0) batches are also capped at VERIFY_CLIENT_BURST
+VERIFY_BATCH_MAX_ITEMS = int(os.environ.get("VERIFY_BATCH_MAX_ITEMS", "1000"))
+VERIFY_BATCH_WORKERS = int(os.environ.get("VERIFY_BATCH_WORKERS", str(os.cpu_count() or 4)))
+DECRYPT_POOL_KIND = os.environ.get("DECRYPT_POOL_KIND", "process")  # "process" or "thread"
+DECRYPT_POOL_WORKERS = int(os.environ.get("DECRYPT_POOL_WORKERS", str(os.cpu_count() or 1)))
+DECRYPT_MAX_PENDING = int(os.environ.get("DECRYPT_MAX_PENDING", "64"))
+DECRYPT_BATCH_MAX_ITEMS = int(os.environ.get("DECRYPT_BATCH_MAX_ITEMS", str(DECRYPT_MAX_PENDING)))
+REPLAY_PROTECTION = os.environ.get("REPLAY_PROTECTION", "1") == "1"
+REPLAY_MAX_ENTRIES_PER_STEP = int(os.environ.get("REPLAY_MAX_ENTRIES_PER_STEP", "200000"))
+# Accepted codes shared by all workers (app/replay_cache.py); on by default with several workers
+REPLAY_SHARED_MEMORY = os.environ.get("REPLAY_SHARED_MEMORY", "1" if UVICORN_WORKERS > 1 else "0") == "1"
+REPLAY_SHM_PATH = os.environ.get("REPLAY_SHM_PATH") or default_segment_path(SEED_FILE_PATH, "replay")
+# Brute-force throttling for verification attempts (token buckets: rate/s refill, burst size)
+VERIFY_RATE_LIMIT = os.environ.get("VERIFY_RATE_LIMIT", "1") == "1"
+# Per-client bucket off by default (rate 0): behind a gateway every user shares one address.
+# With TRUSTED_PROXIES (comma-separated) it keys on the X-Forwarded-For address they pass on
+VERIFY_CLIENT_RATE = float(os.environ.get("VERIFY_CLIENT_RATE", "0"))
+VERIFY_CLIENT_BURST = float(os.environ.get("VERIFY_CLIENT_BURST", "100"))
+TRUSTED_PROXIES = frozenset(p.strip() for p in os.environ.get("TRUSTED_PROXIES", "").split(",") if p.strip())
+VERIFY_SUBJECT_RATE = float(os.environ.get("VERIFY_SUBJECT_RATE", "0.2"))
+VERIFY_SUBJECT_BURST = float(os.environ.get("VERIFY_SUBJECT_BURST", "10"))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+# Per-subject clock drift: learned offsets order the candidates and may widen one subject's window
+DRIFT_TRACKING = os.environ.get("DRIFT_TRACKING", "1") == "1"
+DRIFT_MAX_STEPS = int(os.environ.get("DRIFT_MAX_STEPS", "2"))  # Widest accepted offset (steps of 30s)
+DRIFT_MIN_SAMPLES = int(os.environ.get("DRIFT_MIN_SAMPLES", "3"))
+DRIFT_ALPHA = float(os.environ.get("DRIFT_ALPHA", "0.3"))
+DRIFT_TABLE_SIZE = int(os.environ.get("DRIFT_TABLE_SIZE", "100000"))
+# Shared directory for per-worker metric snapshots (set when running several uvicorn workers)
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+# In-process replacement for the per-minute cron job (see app/code_logger.py)
+CODE_LOGGER = os.environ.get("CODE_LOGGER", "0") == "1"
+CODE_LOG_PATH = os.environ.get("CODE_LOG_PATH", "/cron/last_code.txt")
+CODE_LOG_INTERVAL = int(os.environ.get("CODE_LOG_INTERVAL", "60"))
+CODE_LOG_MAX_BYTES = int(os.environ.get("CODE_LOG_MAX_BYTES", "1048576"))
+CODE_LOG_ROTATE_SECONDS = float(os.environ.get("CODE_LOG_ROTATE_SECONDS", "0"))  # 0: size-based only
+CODE_LOG_BACKUPS = int(os.environ.get("CODE_LOG_BACKUPS", "5"))
+CODE_LOG_COMPRESS = os.environ.get("CODE_LOG_COMPRESS", "0") == "1"
+CODE_LOG_FSYNC_INTERVAL = float(os.environ.get("CODE_LOG_FSYNC_INTERVAL", "5"))
+CODE_LOG_TAIL_MAX = int(os.environ.get("CODE_LOG_TAIL_MAX", "1000"))
+# "eager": warm keys, crypto backend and seed before serving; "lazy": serve at once, warm in the background
+PRELOAD_MODE = os.environ.get("PRELOAD_MODE", "eager")
+FAST_PATH = os.environ.get("FAST_PATH", "0") == "1"  # Serve /generate-2fa and /verify-2fa without pydantic
+PRIVATE_KEY_PATH = os.environ.get("PRIVATE_KEY_PATH", "/app/student_private.pem") # Path inside the container
+X25519_PRIVATE_KEY_PATH = os.environ.get("X25519_PRIVATE_KEY_PATH", "/app/student_x25519_private.pem")  # "x25519:" seeds
+# On-demand profiling (see app/profiling.py); the middleware is only installed when PROFILE_DIR is set
+PROFILE_DIR = os.environ.get("PROFILE_DIR") or None
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET") or None  # Requests sending "X-Profile: <secret>" are profiled
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))  # Share of other requests profiled
+# "cprofile" (pstats of the event loop) or "stack" (collapsed stack samples of every thread, for slow requests)
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "cprofile")
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "100"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.002"))  # Seconds between stack samples
+
+# Prometheus metrics (recorded into per-thread shards, merged on scrape)
+metrics = Registry(METRICS_DIR)
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route template and status.", ("method", "route", "status")
+)
+primitive_seconds = metrics.histogram(
+    "totp_primitive_duration_seconds", "Latency of the seed read, RSA decrypt and TOTP steps.", ("primitive",)
+)
+verifications = metrics.counter(
+    "totp_verifications_total", "Verification attempts by outcome.", ("result",)
+)
+verify_candidates = metrics.histogram(
+    "totp_verify_candidates", "Time steps compared per code check, cached or not (average = _sum / _count).", (),
+    buckets=(0, 1, 2, 3, 4, 5),
+)
+verify_hmacs = metrics.histogram(
+    "totp_verify_hmacs", "HMAC-SHA1 computations per code check (code cache misses).", (),
+    buckets=(0, 1, 2, 3, 4, 5),
+)
+
+def observe_match(compared: int, computed: int):
+    verify_candidates.observe(compared)
+    verify_hmacs.observe(computed)
+
+def open_shared_seed():
+    if not SEED_SHARED_MEMORY:
+        return None
+    try:
+        return SharedSeed(SEED_SHM_PATH)
+    except OSError as e:
+        # Each worker then falls back to its own file-backed cache
+        print(f"Shared seed segment unavailable ({SEED_SHM_PATH}): {e}")
+        return None
+
+# Process-wide seed cache: the file is only re-read when its fingerprint changes (checked
+# at most once a second, off the hot path); with the shared segment reads come from memory
+seed_cache = SeedCache(SEED_FILE_PATH, shared=open_shared_seed())
+# The default subject keeps using SEED_FILE_PATH, every other subject lives in SQLite
+seed_store = TenantSeedStore(
+    FileSeedStore(seed_cache),
+    SQLiteSeedStore(SEED_DB_PATH, lru_size=SEED_LRU_SIZE),
+)
+# Codes computed at most once per (subject, seed generation, period, step), only when asked for
+code_cache = CodeWindowCache(radius=1, on_match=observe_match)
+# Learned clock offset per subject (None: plain ±1 window, nearest step first)
+drift_table = DriftTable(
+    DRIFT_TABLE_SIZE, DRIFT_ALPHA, DRIFT_MIN_SAMPLES, base_window=1, max_offset=DRIFT_MAX_STEPS
+) if DRIFT_TRACKING else None
+def open_replay_cache():
+    if not REPLAY_PROTECTION:
+        return None
+    # The window covers the widest per-subject drift window
+    window_steps = drift_table.max_offset if drift_table is not None else 1
+    if REPLAY_SHARED_MEMORY:
+        try:
+            return SharedReplayCache(REPLAY_SHM_PATH, window_steps, REPLAY_MAX_ENTRIES_PER_STEP)
+        except OSError as e:
+            print(f"Shared replay segment unavailable ({REPLAY_SHM_PATH}): {e}")
+    if UVICORN_WORKERS > 1:
+        print(f"Replay protection is per worker: with {UVICORN_WORKERS} workers a code can be accepted once by each")
+    return ReplayCache(window_steps, REPLAY_MAX_ENTRIES_PER_STEP)
+
+# Accepted (subject, seed generation, time step) triples, so each code verifies only once
+replay_cache = open_replay_cache()
+# Per-client-address and per-subject verification throttles (bounded LRU tables)
+client_limiter = TokenBucketLimiter(
+    VERIFY_CLIENT_RATE, VERIFY_CLIENT_BURST, RATE_LIMIT_MAX_KEYS
+) if VERIFY_RATE_LIMIT and VERIFY_CLIENT_RATE > 0 else None
+subject_limiter = TokenBucketLimiter(VERIFY_SUBJECT_RATE, VERIFY_SUBJECT_BURST, RATE_LIMIT_MAX_KEYS)
+# Worker threads for /verify-2fa/batch (one task per distinct subject in a batch)
+verify_batch_executor = ThreadPoolExecutor(max_workers=VERIFY_BATCH_WORKERS, thread_name_prefix="verify-batch")
+# Subjects whose cached seed is currently being re-validated on the I/O threads
+_refreshing_subjects = set()
+# RSA decryption runs here, with a bounded queue (full queue -> 503 + Retry-After)
+decrypt_pool = DecryptPool(
+    DECRYPT_POOL_KIND, DECRYPT_POOL_WORKERS, max_pending=DECRYPT_MAX_PENDING,
+    observe=lambda seconds: primitive_seconds.observe(seconds, "decrypt_seed"),
+)
+# Shares the seed cache and code window with the endpoints (started in lifespan if enabled)
+code_logger = CodeLogger(
+    seed_cache, CODE_LOG_PATH, CODE_LOG_INTERVAL,
+    generate=lambda seed, generation, for_time: code_cache.generate((DEFAULT_SUBJECT, generation), seed, for_time)[0],
+    sink=RotatingLogSink(
+        CODE_LOG_PATH, CODE_LOG_MAX_BYTES, CODE_LOG_ROTATE_SECONDS,
+        backups=CODE_LOG_BACKUPS, compress=CODE_LOG_COMPRESS, fsync_interval=CODE_LOG_FSYNC_INTERVAL,
+    ),
+)
+
+metrics.register_collector(
+    "seed_cache_lookups_total", "Default seed cache lookups served from memory or disk.", ("source",),
+    lambda: {("memory",): seed_cache.hits, ("disk",): seed_cache.disk_reads},
+)
+metrics.register_collector(
+    "rate_limit_rejections_total", "Verification attempts refused by each throttle.", ("limiter",),
+    lambda: {
+        ("client",): client_limiter.rejected if client_limiter is not None else 0,
+        ("subject",): subject_limiter.rejected,
+    },
+)
+if replay_cache is not None:
+    metrics.register_collector(
+        "replay_rejections_total", "Correct codes refused because they were already used.", (),
+        lambda: {(): replay_cache.replays},
+    )
+metrics.register_collector(
+    "decrypt_pool_rejections_total", "Decryptions refused because the queue was full.", (),
+    lambda: {(): decrypt_pool.rejected},
+)
+# Gauges: labelled by process so every uvicorn worker's decrypt pool shows up separately
+metrics.register_collector(
+    "decrypt_key_load_seconds", "Time the decrypt workers took to parse each key.",
+    ("kind", "path", "process"),
+    lambda: {(i["kind"], i["path"], str(os.getpid())): i["load_seconds"] for i in decrypt_pool.key_info()},
+    metric_type="gauge",
+)
+metrics.register_collector(
+    "decrypt_key_age_seconds", "Seconds since the decrypt workers last parsed each key.",
+    ("kind", "path", "process"),
+    lambda: {(i["kind"], i["path"], str(os.getpid())): i["age_seconds"] for i in decrypt_pool.key_info()},
+    metric_type="gauge",
+)
+
+# Warm-up progress, reported by /ready
+startup_state = {"warm": False, "private_key": "pending", "seed": "pending"}
+
+async def warm_up():
+    """
+    Does the work the first requests would otherwise pay for: starts the decrypt
+    workers (each parses the private key), reads the default seed and primes its
+    TOTP code window.
+    """
+    try:
+        if DECRYPT_POOL_KIND == "thread":
+            await run_io(preload_crypto)
+        await decrypt_pool.warm(PRIVATE_KEY_PATH, X25519_PRIVATE_KEY_PATH)
+        startup_state["private_key"] = "ok"
+        for info in decrypt_pool.key_info():
+            print(f"Loaded {info['kind']} key {info['path']} in {info['load_seconds'] * 1000:.1f} ms")
+    except Exception as e:
+        # Not fatal: /decrypt-seed retries the load and reports the error itself
+        startup_state["private_key"] = "error"
+        print(f"Could not preload private key: {e}")
+
+    try:
+        record = await run_io(seed_store.get, DEFAULT_SUBJECT)
+        code_cache.generate((DEFAULT_SUBJECT, record.generation), record.seed)
+        startup_state["seed"] = "ok"
+    except SeedMissingError:
+        # Normal before the first /decrypt-seed
+        startup_state["seed"] = "missing"
+    except Exception as e:
+        startup_state["seed"] = "error"
+        print(f"Could not preload seed: {e}")
+
+    await warm_routes()
+    startup_state["warm"] = True
+
+async def warm_routes():
+    """
+    Builds the middleware stack and sends one internal GET /ready below our own
+    middleware: FastAPI builds its routing state on the first request (~20 ms),
+    which would otherwise hit a real client. Skipping metrics, fast path and
+    profiling keeps the 503 it gets (warm isn't set yet) out of /metrics and profiles.
+    """
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+    inner = app.middleware_stack
+    while inner is not None and not isinstance(inner, ExceptionMiddleware):
+        inner = getattr(inner, "app", None)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ready", "raw_path": b"/ready", "query_string": b"",
+        "root_path": "", "headers": [], "client": None, "server": None, "app": app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    try:
+        await (inner or app)(scope, receive, send)
+    except Exception as e:
+        print(f"Route warm-up failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warms the hot path (before serving, or in the background with PRELOAD_MODE=lazy) and starts background threads."""
+    warm_task = None
+    if PRELOAD_MODE == "lazy":
+        warm_task = asyncio.create_task(warm_up())
+    else:
+        await warm_up()
+    metrics.start_flusher()
+    if CODE_LOGGER:
+        code_logger.start()
+    yield
+    if warm_task is not None and not warm_task.done():
+        warm_task.cancel()
+    code_logger.stop()
+    decrypt_pool.shutdown()
 
 # Global FastAPI App
-app = FastAPI(title="PKI-Based 2FA Microservice", version="1.0.0")
+app = FastAPI(title="PKI-Based 2FA Microservice", version="1.0.0", lifespan=lifespan)
 router = APIRouter()
 
-# Constants
-SEED_FILE_PATH = "/data/seed.txt"
-PRIVATE_KEY_PATH = "/app/student_private.pem" # Path inside the container
-
 # --- Pydantic Models for Request/Response Bodies ---
 
 class DecryptSeedRequest(BaseModel):
-    encrypted_seed: str = Field(..., description="Base64-encoded RSA-OAEP encrypted seed.")
+    encrypted_seed: str = Field(..., description="Base64-encoded RSA-OAEP encrypted seed, or an 'x25519:' envelope.")
+    subject: Optional[str] = Field(None, description="User/tenant ID; omitted means the default seed.")
+    envelope: Optional[str] = Field(None, description="'rsa-oaep' or 'x25519'; detected from the seed when omitted.")
 
 class DecryptSeedResponse(BaseModel):
     status: str = Field("ok", description="Status of the operation.")
 
+class DecryptSeedBatchRequest(BaseModel):
+    items: List[DecryptSeedRequest] = Field(..., description="Encrypted seeds, each with an optional subject.")
+
+class DecryptSeedBatchResult(BaseModel):
+    status: str = Field(..., description="'ok' or 'error'.")
+    error: Optional[str] = Field(None, description="Set when this item failed.")
+
+class DecryptSeedBatchResponse(BaseModel):
+    results: List[DecryptSeedBatchResult] = Field(..., description="One result per item, in request order.")
+
 class Verify2FARequest(BaseModel):
     code: str = Field(..., description="6-digit TOTP code.")
+    subject: Optional[str] = Field(None, description="User/tenant ID; omitted means the default seed.")
 
 class Verify2FAResponse(BaseModel):
     valid: bool = Field(..., description="True if the code is valid, False otherwise.")
+    reason: Optional[str] = Field(None, description="Why a correct code was refused (e.g. 'replayed').")
+
+class Verify2FABatchItem(BaseModel):
+    code: str = Field(..., description="6-digit TOTP code.")
+    subject: Optional[str] = Field(None, description="User/tenant ID; omitted means the default seed.")
+
+class Verify2FABatchRequest(BaseModel):
+    items: List[Union[str, Verify2FABatchItem]] = Field(..., description="Bare codes or {code, subject} objects.")
+
+class Verify2FABatchResult(BaseModel):
+    valid: bool = Field(..., description="True if the code is valid, False otherwise.")
+    reason: Optional[str] = Field(None, description="Why a correct code was refused (e.g. 'replayed').")
+    error: Optional[str] = Field(None, description="Set when this item could not be checked.")
+
+class Verify2FABatchResponse(BaseModel):
+    results: List[Verify2FABatchResult] = Field(..., description="One result per item, in request order.")
 
 # --- Helper Functions ---
 
-def read_seed_from_disk() -> str:
-    """Reads the hex seed from persistent storage, raises HTTP 500 if missing."""
-    if not os.path.exists(SEED_FILE_PATH):
+def resolve_subject(subject: Optional[str]) -> str:
+    """Maps a missing subject to the default tenant, raises HTTP 400 if malformed."""
+    try:
+        return validate_subject(subject)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid subject identifier."}
+        )
+
+def load_seed(subject: str) -> SeedRecord:
+    """Blocking seed lookup (may stat/read the file or query SQLite), raises HTTP 500 if missing."""
+    try:
+        record = seed_store.get(subject)
+    except SeedMissingError:
         raise HTTPException(
             status_code=500,
             detail={"error": "Seed not decrypted yet."}
         )
-    with open(SEED_FILE_PATH, "r") as f:
-        hex_seed = f.read().strip()
-    
-    # Basic validation (64-char hex)
-    if len(hex_seed) != 64 or not all(c in '0123456789abcdef' for c in hex_seed.lower()):
+    except (SeedCorruptError, OSError, sqlite3.Error) as e:
         # This should ideally not happen if decryption was correct, but good to check
+        print(f"Stored seed could not be loaded: {e}")
         raise HTTPException(
             status_code=500,
             detail={"error": "Stored seed is corrupt."}
         )
-        
-    return hex_seed
+
+    return record
+
+def refresh_seed_in_background(subject: str):
+    """Re-validates a cached seed on the I/O threads (at most one refresh per subject at a time)."""
+    if subject in _refreshing_subjects:
+        return
+    _refreshing_subjects.add(subject)
+    submit_io(seed_store.get, subject).add_done_callback(lambda future: refreshed(subject, future))
+
+def refreshed(subject: str, future):
+    # On failure the store has dropped its cached copy, so the next request loads (and reports) it too
+    _refreshing_subjects.discard(subject)
+    error = future.exception()
+    if error is not None:
+        print(f"Background seed refresh for {subject!r} failed: {error!r}")
+
+async def read_seed_from_disk(subject: str) -> SeedRecord:
+    """
+    Returns the subject's seed record without blocking the event loop: served from
+    memory when cached (a due re-check runs in the background), otherwise loaded on
+    the storage I/O threads. Raises HTTP 500 if missing.
+    """
+    with primitive_seconds.time("seed_read"):
+        record = seed_store.peek(subject)
+        if record is not None:
+            return record
+        record = seed_store.peek(subject, stale_ok=True)
+        if record is not None:
+            refresh_seed_in_background(subject)
+            return record
+        return await run_io(load_seed, subject)
 
 # --- API Endpoints ---
 
-@router.post("/decrypt-seed", response_model=DecryptSeedResponse)
-async def decrypt_seed_endpoint(request: DecryptSeedRequest):
+def resolve_envelope(encrypted_seed: str, envelope: Optional[str]) -> str:
     """
-    Accepts an encrypted seed, decrypts it using the student's private key,
-    and stores the decrypted hex seed persistently.
+    Normalises an encrypted seed to the form the decrypt pool detects: X25519
+    envelopes carry the "x25519:" prefix, everything else is RSA-OAEP.
+    Raises HTTP 400 for an unknown or contradictory `envelope`.
     """
-    # 1. Load Private Key
-    try:
-        private_key = load_private_key(PRIVATE_KEY_PATH)
-    except Exception as e:
+    detected = detect_envelope(encrypted_seed)
+    if envelope is None or envelope == detected:
+        return encrypted_seed
+    if envelope == ENVELOPE_X25519:
+        return X25519_PREFIX + encrypted_seed
+    if envelope == ENVELOPE_RSA:
+        error = "Envelope 'rsa-oaep' does not match an 'x25519:' seed."
+    else:
+        error = f"Unknown envelope {envelope!r} (expected '{ENVELOPE_RSA}' or '{ENVELOPE_X25519}')."
+    raise HTTPException(status_code=400, detail={"error": error})
+
+def decryption_error(e: Exception) -> HTTPException:
+    """Maps a failure from the decrypt pool to the endpoint's HTTP error."""
+    if isinstance(e, PoolSaturatedError):
+        return HTTPException(
+            status_code=503,
+            detail={"error": "Decryption queue is full, retry later."},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if isinstance(e, KeyLoadError):
         print(f"Error loading private key: {e}")
-        raise HTTPException(
+        return HTTPException(
             status_code=500,
             detail={"error": "Server error: Could not load student private key."}
         )
-        
-    # 2. Decrypt Seed
-    try:
-        hex_seed = decrypt_seed(request.encrypted_seed, private_key)
-    except (ValueError, Exception) as e:
-        # Catches both crypto errors (ValueError) and general exceptions
-        print(f"Decryption failed for encrypted seed: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail={"error": "Decryption failed"}
-        )
-        
-    # 3. Store persistently
+    # Catches both crypto errors (ValueError) and general exceptions
+    print(f"Decryption failed for encrypted seed: {e}")
+    return HTTPException(
+        status_code=500,
+        detail={"error": "Decryption failed"}
+    )
+
+async def store_seed(subject: str, hex_seed: str):
+    """Persists a decrypted seed (atomically, off the event loop), raises HTTP 500 on storage errors."""
+    # The store refreshes its in-memory cache so the next request doesn't hit the disk
     try:
-        os.makedirs(os.path.dirname(SEED_FILE_PATH), exist_ok=True)
-        with open(SEED_FILE_PATH, "w") as f:
-            f.write(hex_seed)
+        await run_io(seed_store.put, subject, hex_seed)
     except Exception as e:
-        print(f"File IO Error: Could not write seed to {SEED_FILE_PATH}: {e}")
+        print(f"File IO Error: Could not store seed for subject {subject!r}: {e}")
         raise HTTPException(
             status_code=500,
             detail={"error": "Internal server error: Could not store decrypted seed."}
         )
+
+@router.post("/decrypt-seed", response_model=DecryptSeedResponse)
+async def decrypt_seed_endpoint(request: DecryptSeedRequest):
+    """
+    Accepts an encrypted seed, decrypts it using the student's private key,
+    and stores the decrypted hex seed persistently for the request's subject.
+    RSA-OAEP is the default; "x25519:" envelopes use the X25519 key instead.
+    """
+    subject = resolve_subject(request.subject)
+    encrypted_seed = resolve_envelope(request.encrypted_seed, request.envelope)
+
+    # 1+2. Load Private Key and Decrypt Seed in the decrypt pool (the key is
+    # parsed once per worker), so the event loop keeps serving /verify-2fa
+    try:
+        hex_seed = await decrypt_pool.decrypt(encrypted_seed, PRIVATE_KEY_PATH, X25519_PRIVATE_KEY_PATH)
+    except Exception as e:
+        raise decryption_error(e)
+        
+    # 3. Store persistently
+    await store_seed(subject, hex_seed)
         
     return {"status": "ok"}
 
-@router.get("/generate-2fa")
-async def generate_2fa_code_endpoint():
+@router.post("/decrypt-seed/batch", response_model=DecryptSeedBatchResponse, response_model_exclude_none=True)
+async def decrypt_seed_batch_endpoint(request: DecryptSeedBatchRequest):
     """
-    Reads the stored seed, generates the current TOTP code, and calculates
-    the remaining time in the current period.
+    Decrypts many encrypted seeds in parallel across the decrypt pool and stores
+    each one. Results come back in request order; a bad item only fails itself.
     """
-    hex_seed = read_seed_from_disk()
+    if len(request.items) > DECRYPT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"Batch too large (max {DECRYPT_BATCH_MAX_ITEMS} items)."}
+        )
+
+    results = [None] * len(request.items)
+    pending = []
+    for index, item in enumerate(request.items):
+        try:
+            pending.append((index, resolve_subject(item.subject), resolve_envelope(item.encrypted_seed, item.envelope)))
+        except HTTPException as e:
+            results[index] = {"status": "error", "error": e.detail["error"]}
+
+    # Admission is all-or-nothing: a batch that doesn't fit gets a single 503
+    try:
+        decrypted = await decrypt_pool.decrypt_many(
+            [enc for _, _, enc in pending], PRIVATE_KEY_PATH, X25519_PRIVATE_KEY_PATH
+        )
+    except PoolSaturatedError as e:
+        raise decryption_error(e)
+
+    for (index, subject, _), hex_seed in zip(pending, decrypted):
+        try:
+            if isinstance(hex_seed, Exception):
+                raise decryption_error(hex_seed)
+            await store_seed(subject, hex_seed)
+            results[index] = {"status": "ok"}
+        except HTTPException as e:
+            results[index] = {"status": "error", "error": e.detail["error"]}
+    return {"results": results}
+
+async def current_code(subject: Optional[str]) -> dict:
+    """
+    Shared body of /generate-2fa: reads the stored seed, generates the current
+    TOTP code, and calculates the remaining time in the current period.
+    """
+    subject = resolve_subject(subject)
+    record = await read_seed_from_disk(subject)
     
     try:
-        code, remaining_seconds = generate_totp_code(hex_seed)
+        with primitive_seconds.time("generate_totp"):
+            code, remaining_seconds = code_cache.generate((subject, record.generation), record.seed)
         
         return {
             "code": code,
@@ -116,33 +550,238 @@ async def generate_2fa_code_endpoint():
             detail={"error": "TOTP generation failed."}
         )
 
-@router.post("/verify-2fa", response_model=Verify2FAResponse)
-async def verify_2fa_endpoint(request: Verify2FARequest):
-    """
-    Verifies a 6-digit TOTP code against the stored seed with ±1 period tolerance.
-    """
-    # 1. Validate input
-    if not request.code or len(request.code) != 6 or not request.code.isdigit():
+@router.get("/generate-2fa")
+async def generate_2fa_code_endpoint(subject: Optional[str] = None):
+    """Returns the current TOTP code and how many seconds it stays valid."""
+    return await current_code(subject)
+
+def validate_code_format(code: str):
+    """Raises HTTP 400 unless `code` is exactly 6 digits."""
+    if not code or len(code) != 6 or not code.isdigit():
+        verifications.inc("malformed")
         raise HTTPException(
             status_code=400,
             detail={"error": "Missing or invalid code format."}
         )
 
-    # 2. Read seed
-    hex_seed = read_seed_from_disk()
-    
-    # 3. Verify code
+def verify_with_record(subject: str, record: SeedRecord, code: str, for_time=None) -> dict:
+    """
+    CPU-only part of verification (cached codes tried in drift order + replay check).
+    Returns the response body; raises HTTP 500 on failure.
+    """
+    if for_time is None:
+        for_time = time.time()
+    # valid_window=1 means ±1 period (±30 seconds) tolerance; a subject with learned
+    # clock drift gets its own candidates, most likely step first
+    offsets = drift_table.candidates(subject) if drift_table is not None else None
     try:
-        # valid_window=1 means ±1 period (±30 seconds) tolerance
-        is_valid = verify_totp_code(hex_seed, request.code, valid_window=1)
-        
-        return {"valid": is_valid}
+        with primitive_seconds.time("verify_totp"):
+            matched_step = code_cache.match(
+                (subject, record.generation), record.seed, code, valid_window=1, for_time=for_time, offsets=offsets
+            )
     except Exception as e:
         print(f"TOTP verification failed: {e}")
         raise HTTPException(
             status_code=500,
             detail={"error": "TOTP verification failed."}
         )
+    if matched_step is None:
+        verifications.inc("invalid")
+        return {"valid": False}
+
+    if replay_cache is not None:
+        outcome = replay_cache.record(subject, record.generation, matched_step, timecode(for_time))
+        if outcome == REPLAYED:
+            verifications.inc("replayed")
+            return {"valid": False, "reason": "replayed"}
+        if outcome == REPLAY_CACHE_FULL:
+            raise HTTPException(
+                status_code=503,
+                detail={"error": "Replay cache is full, retry later."},
+                headers={"Retry-After": str(PERIOD)}
+            )
+    if drift_table is not None:
+        drift_table.record(subject, matched_step - timecode(for_time))
+    verifications.inc("valid")
+    return {"valid": True}
+
+def throttle_verification(client: Optional[str], subject: Optional[str], cost: int = 1):
+    """Raises HTTP 429 when the client address or the subject is out of attempts."""
+    if not VERIFY_RATE_LIMIT:
+        return
+    for limiter, key in ((client_limiter, client), (subject_limiter, subject)):
+        if limiter is not None and key is not None and not limiter.allow(key, cost):
+            verifications.inc("throttled")
+            raise HTTPException(
+                status_code=429,
+                detail={"error": "Too many verification attempts, retry later."},
+                headers={"Retry-After": str(limiter.retry_after(key, cost))}
+            )
+
+def request_client(scope) -> Optional[str]:
+    """Throttling key of a request (the original client's address behind TRUSTED_PROXIES)."""
+    return client_address(scope, TRUSTED_PROXIES)
+
+async def check_totp_code(subject: Optional[str], code: str, client: Optional[str] = None, for_time=None) -> dict:
+    """
+    Shared validation + verification for /verify-2fa.
+    Raises HTTPException on malformed input, throttling or server-side failures.
+    """
+    # 1. Validate input
+    validate_code_format(code)
+    requested_subject = subject
+    subject = resolve_subject(subject)
+
+    # Brute-force throttling happens before any seed read or HMAC work. Only named
+    # subjects get a per-subject bucket: the implicit default one is shared by every
+    # caller, and at the per-subject rate anyone could lock all of them out
+    throttle_verification(client, subject if requested_subject is not None else None)
+
+    # 2. Read seed
+    record = await read_seed_from_disk(subject)
+    
+    # 3. Verify code
+    return verify_with_record(subject, record, code, for_time)
+
+@router.post("/verify-2fa", response_model=Verify2FAResponse, response_model_exclude_none=True)
+async def verify_2fa_endpoint(request: Verify2FARequest, http_request: Request = None):
+    """
+    Verifies a 6-digit TOTP code against the stored seed with ±1 period tolerance.
+    A code that was already accepted once is rejected with reason "replayed".
+    """
+    client = request_client(http_request.scope) if http_request is not None else None
+    return await check_totp_code(request.subject, request.code, client)
+
+def _verify_batch_group(items, for_time):
+    """Verifies a chunk of items; items of the same subject share one cached code window."""
+    results = []
+    for index, subject, record, code in items:
+        try:
+            results.append((index, verify_with_record(subject, record, code, for_time)))
+        except HTTPException as e:
+            results.append((index, {"valid": False, "error": e.detail["error"]}))
+    return results
+
+@router.post("/verify-2fa/batch", response_model=Verify2FABatchResponse, response_model_exclude_none=True)
+async def verify_2fa_batch_endpoint(request: Verify2FABatchRequest, http_request: Request = None):
+    """
+    Verifies many codes in one round trip. Results come back in request order,
+    and a bad item only fails itself (reported in its `error` field).
+    """
+    # With the per-client bucket on, every item counts as one attempt for the calling
+    # client, so a batch larger than the client burst could never be admitted
+    max_items = min(VERIFY_BATCH_MAX_ITEMS, int(VERIFY_CLIENT_BURST)) if client_limiter is not None else VERIFY_BATCH_MAX_ITEMS
+    if len(request.items) > max_items:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"Batch too large (max {max_items} items)."}
+        )
+    client = request_client(http_request.scope) if http_request is not None else None
+    throttle_verification(client, None, cost=max(1, len(request.items)))
+
+    # Evaluate the whole batch against one timestamp so items can't straddle a period
+    for_time = time.time()
+    results = [None] * len(request.items)
+    groups = {}
+    for index, item in enumerate(request.items):
+        if isinstance(item, str):
+            item = Verify2FABatchItem(code=item)
+        try:
+            validate_code_format(item.code)
+            subject = resolve_subject(item.subject)
+            if item.subject is not None:
+                throttle_verification(None, subject)
+        except HTTPException as e:
+            results[index] = {"valid": False, "error": e.detail["error"]}
+            continue
+        groups.setdefault(subject, []).append((index, item.code))
+
+    # Same rules as check_totp_code: one seed read per distinct subject
+    records = await asyncio.gather(*(read_seed_from_disk(subject) for subject in groups), return_exceptions=True)
+    work = []
+    for (subject, items), record in zip(groups.items(), records):
+        if isinstance(record, HTTPException):
+            for index, _ in items:
+                results[index] = {"valid": False, "error": record.detail["error"]}
+        elif isinstance(record, Exception):
+            raise record
+        else:
+            work.append([(index, subject, record, code) for index, code in items])
+
+    if len(work) == 1:
+        group_results = [_verify_batch_group(work[0], for_time)]
+    elif work:
+        # Spread distinct subjects over the pool, keeping each subject in a single chunk
+        # so its code window is computed once (hashlib drops the GIL for large inputs)
+        chunks = [[] for _ in range(min(len(work), VERIFY_BATCH_WORKERS))]
+        for i, items in enumerate(work):
+            chunks[i % len(chunks)].extend(items)
+        loop = asyncio.get_running_loop()
+        group_results = await asyncio.gather(*(
+            loop.run_in_executor(verify_batch_executor, _verify_batch_group, chunk, for_time)
+            for chunk in chunks
+        ))
+    else:
+        group_results = []
+
+    for group in group_results:
+        for index, result in group:
+            results[index] = result
+    return {"results": results}
+
+@router.get("/cron/last-codes")
+async def last_codes_endpoint(n: int = 10):
+    """
+    Returns the last `n` lines of the 2FA code log, oldest first. Only the end of
+    the file is read (reverse seek), so the cost doesn't grow with the log.
+    """
+    if not 1 <= n <= CODE_LOG_TAIL_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"n must be between 1 and {CODE_LOG_TAIL_MAX}."}
+        )
+    try:
+        lines = await run_io(tail, CODE_LOG_PATH, n)
+    except OSError as e:
+        print(f"File IO Error: Could not read code log: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Could not read the code log."}
+        )
+    return {"lines": lines}
+
+@router.get("/ready")
+async def ready_endpoint():
+    """
+    Readiness probe: 200 once the private key is loaded and the seed has been
+    read (or is confirmed missing), 503 while warming up or if the key failed.
+    """
+    ready = startup_state["warm"] and startup_state["private_key"] == "ok" and startup_state["seed"] != "error"
+    if not ready:
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Not ready.", "private_key": startup_state["private_key"], "seed": startup_state["seed"]}
+        )
+    return {"ready": True, "private_key": startup_state["private_key"], "seed": startup_state["seed"]}
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint (merges every worker's snapshot when METRICS_DIR is set)."""
+    body = await run_io(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
 
 # Register the router to the main app
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+
+# Middleware added last runs first: metrics wrap the profiler, which wraps the fast path and the routes
+if FAST_PATH:
+    app.add_middleware(
+        FastPathMiddleware, generate=current_code, verify=check_totp_code, routes=router.routes,
+        client_address=request_client,
+    )
+if PROFILE_DIR and (PROFILE_SECRET or PROFILE_SAMPLE_RATE > 0):
+    app.add_middleware(
+        ProfilingMiddleware, directory=PROFILE_DIR, secret=PROFILE_SECRET, sample_rate=PROFILE_SAMPLE_RATE,
+        mode=PROFILE_MODE, max_files=PROFILE_MAX_FILES, interval=PROFILE_INTERVAL,
+    )
+app.add_middleware(MetricsMiddleware, histogram=request_seconds)
\ No newline at end of file
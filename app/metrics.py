@@ -0,0 +1,270 @@
+# app/metrics.py
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.storage import atomic_write_text
+
+# Latency buckets in seconds: 10us .. 10s (TOTP work is microseconds, RSA is milliseconds)
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Registry:
+    """
+    Metric registry with per-thread shards: recording only touches the calling
+    thread's own dict (no lock), and shards are summed when metrics are collected.
+
+    With `multiproc_dir` set, every process periodically writes its snapshot to
+    `<dir>/metrics-<pid>.json` and collection sums all snapshots, so one scrape
+    covers every uvicorn worker.
+    """
+
+    def __init__(self, multiproc_dir: str = None, flush_interval: float = 5.0):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._collectors = []
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+        self._flusher = None
+
+    # --- definition ---
+
+    def counter(self, name: str, help_text: str, labelnames=()):
+        return self._define(Counter(self, name, help_text, tuple(labelnames)))
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._define(Histogram(self, name, help_text, tuple(labelnames), tuple(buckets)))
+
+    def _define(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, name: str, help_text: str, labelnames, fn, metric_type: str = "counter"):
+        """
+        `fn()` returns {label_values_tuple: value}; exported as a counter (or gauge)
+        read at collection time. Workers' samples are summed like any other metric,
+        so a gauge needs a label that tells the workers apart.
+        """
+        self._collectors.append((name, help_text, tuple(labelnames), fn, metric_type))
+
+    # --- recording ---
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    # --- collection ---
+
+    def snapshot(self) -> dict:
+        """This process's metrics: {name: {type, help, labelnames, buckets, samples}}."""
+        merged = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # dict()/list() copies are atomic under the GIL, so owners can keep writing
+            for (name, labels), values in dict(shard).items():
+                target = merged.setdefault(name, {}).setdefault(labels, [0] * len(values))
+                for i, v in enumerate(list(values)):
+                    target[i] += v
+
+        result = {}
+        for name, metric in self._metrics.items():
+            result[name] = {
+                "type": metric.type,
+                "help": metric.help,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": {json.dumps(list(k)): v for k, v in merged.get(name, {}).items()},
+            }
+        for name, help_text, labelnames, fn, metric_type in self._collectors:
+            try:
+                values = fn()
+            except Exception as e:
+                print(f"Metrics collector {name} failed: {e}")
+                continue
+            result[name] = {
+                "type": metric_type,
+                "help": help_text,
+                "labelnames": list(labelnames),
+                "buckets": [],
+                "samples": {json.dumps(list(k)): [v] for k, v in values.items()},
+            }
+        return result
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics-{pid}.json")
+
+    def flush(self):
+        """Writes this process's snapshot for the other workers to aggregate."""
+        if self.multiproc_dir:
+            atomic_write_text(self._snapshot_path(os.getpid()), json.dumps(self.snapshot()), mode=0o644)
+
+    def start_flusher(self):
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Metrics flush failed: {e}")
+
+        self._flusher = threading.Thread(target=loop, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def collect(self) -> dict:
+        """Snapshot of every worker (or just this process without multiproc_dir)."""
+        own = self.snapshot()
+        if not self.multiproc_dir:
+            return own
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiproc_dir, "metrics-*.json")):
+            if path == self._snapshot_path(os.getpid()):
+                snapshots.append(own)
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # worker mid-rename or gone
+
+        merged = {}
+        for snap in snapshots:
+            for name, metric in snap.items():
+                target = merged.setdefault(name, dict(metric, samples={}))
+                for labels, values in metric["samples"].items():
+                    current = target["samples"].setdefault(labels, [0] * len(values))
+                    for i, v in enumerate(values):
+                        current[i] += v
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric["labelnames"]
+            for labels_json, values in sorted(metric["samples"].items()):
+                labels = list(zip(labelnames, json.loads(labels_json)))
+                if metric["type"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric["buckets"], values):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', _fmt(bound))])} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {values[-1]}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_fmt(values[-2])}")
+                    lines.append(f"{name}_count{_labels(labels)} {values[-1]}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_fmt(values[0])}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry: Registry, name: str, help_text: str, labelnames: tuple):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+
+    def inc(self, *labels, amount=1):
+        shard = self.registry._shard()
+        key = (self.name, labels)
+        values = shard.get(key)
+        if values is None:
+            shard[key] = [amount]
+        else:
+            values[0] += amount
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, registry: Registry, name: str, help_text: str, labelnames: tuple, buckets: tuple):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels):
+        shard = self.registry._shard()
+        key = (self.name, labels)
+        values = shard.get(key)
+        if values is None:
+            # One slot per bucket (non-cumulative), then sum and count
+            values = shard[key] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            values[index] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template and status code."""
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            path = getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - start, scope["method"], path, str(status))
@@ -0,0 +1,177 @@
+# app/profiling.py
+import cProfile
+import concurrent.futures.thread
+import hmac
+import marshal
+import os
+import queue
+import random
+import re
+import selectors
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.storage import atomic_write_bytes, atomic_write_text, submit_io
+
+MODES = ("stack", "cprofile")
+PROFILE_HEADER = b"x-profile"
+_SUFFIXES = {"stack": ".collapsed", "cprofile": ".pstats"}
+# A thread whose innermost Python frame is in one of these is waiting for work, not doing any
+_IDLE_FILES = frozenset(m.__file__ for m in (threading, queue, selectors, concurrent.futures.thread))
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class StackSampler:
+    """
+    Samples the Python stack of every other thread each `interval` seconds and
+    counts them as collapsed stacks ("thread;outer;...;inner"), the input format
+    of flamegraph.pl / speedscope. Idle threads are skipped. Costs one thread
+    and no tracing, so the profiled request runs at close to full speed.
+
+    A busy thread only hands the GIL over every switch interval (5 ms by
+    default), which would cap the sample rate, so the interval is lowered to
+    `interval` while sampling and restored by stop().
+    """
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._switch_interval = None
+
+    def start(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread.start()
+
+    def stop(self):
+        """Signals the sampler to finish; doesn't wait (see join)."""
+        self._stop.set()
+        sys.setswitchinterval(self._switch_interval)
+
+    def join(self) -> Counter:
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or frame.f_code.co_filename in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles selected requests: those carrying
+    `X-Profile: <secret>`, and a random `sample_rate` share of the rest.
+
+    mode "cprofile" (the default) traces the event-loop thread deterministically
+    into `<directory>/*.pstats` (pstats.Stats / snakeviz). mode "stack" samples
+    every thread's stack (event loop, storage I/O and thread-pool crypto) every
+    `interval` seconds into `*.collapsed`; it only suits requests that take
+    several intervals, and a request that finishes before the first sample is
+    not written (counted in `skipped`). Both see whatever else runs meanwhile,
+    so at most one request is profiled at a time. Files are written off the event loop, and only the
+    newest `max_files` are kept. Requests that aren't selected pay for one
+    header scan and one random() call.
+    """
+
+    def __init__(self, app, directory: str, secret: str = None, sample_rate: float = 0.0, mode: str = "cprofile",
+                 max_files: int = 100, interval: float = 0.002):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode!r} (expected one of {', '.join(MODES)})")
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.max_files = max_files
+        self.interval = interval
+        self._secret = secret.encode() if secret else None
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.skipped = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _requested(self, scope) -> bool:
+        if self._secret is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self._secret)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        requested = self._requested(scope)
+        if not (requested or (self.sample_rate and random.random() < self.sample_rate)):
+            return await self.app(scope, receive, send)
+        if not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        name = "{}-{}-{}-{}".format(
+            time.time_ns(), os.getpid(), scope["method"], _UNSAFE.sub("_", scope["path"]).strip("_")[:64] or "root"
+        ) + _SUFFIXES[self.mode]
+
+        async def send_wrapper(message):
+            if requested and message["type"] == "http.response.start":
+                # Tells whoever asked for the profile which file it is
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"x-profile-id", name.encode())])
+            await send(message)
+
+        try:
+            if self.mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                profiler = StackSampler(self.interval)
+                profiler.start()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if self.mode == "cprofile":
+                    profiler.disable()
+                else:
+                    profiler.stop()
+                self.profiled += 1
+                submit_io(self._save, profiler, name)
+        finally:
+            self._busy.release()
+
+    def _save(self, profiler, name: str):
+        path = os.path.join(self.directory, name)
+        try:
+            if self.mode == "cprofile":
+                # What Profile.dump_stats() writes, but atomically
+                profiler.create_stats()
+                atomic_write_bytes(path, marshal.dumps(profiler.stats))
+            else:
+                counts = profiler.join()
+                if not counts:
+                    self.skipped += 1
+                    return
+                atomic_write_text(path, "".join(f"{stack} {n}\n" for stack, n in counts.most_common()))
+            self._rotate()
+        except OSError as e:
+            print(f"Profile not written ({path}): {e}")
+
+    def _rotate(self):
+        # Names start with a nanosecond timestamp, so name order is age order
+        suffixes = tuple(_SUFFIXES.values())
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(suffixes))
+        for old in names[:max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass  # Another worker sharing the directory got there first
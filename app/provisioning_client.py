@@ -0,0 +1,236 @@
+# app/provisioning_client.py
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INSTRUCTOR_URL = "https://eajeyq4r3zljoq4rpovy2nthda0vtjqf.lambda-url.ap-south-1.on.aws"
+API_URL = "http://127.0.0.1:8080"
+REPO_URL = "https://github.com/sirinethikonda/sirinethikonda_ganisetti-pki-2fa-project"
+
+# Worth retrying: throttling and transient gateway/availability failures. Not 500:
+# /decrypt-seed answers 500 for failures that repeat (bad ciphertext, key load), and
+# the instructor endpoint's function errors come back as 502 from its gateway
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class ProvisioningError(Exception):
+    """A request failed for good (non-retryable status, or out of retries)."""
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """
+    One keep-alive session for every call: up to `pool_size` pooled
+    connections per host, so concurrent submissions reuse TCP/TLS connections.
+    Retries are done by post_json (with jitter), not by urllib3.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 10.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_after(response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+def post_json(session, url: str, payload: dict, timeout: float = 30, retries: int = 4,
+              backoff: float = 0.5, max_backoff: float = 10.0, sleep=time.sleep):
+    """
+    POSTs `payload` as JSON, retrying connection errors, timeouts and
+    RETRY_STATUSES with jittered backoff (at least Retry-After when the server
+    sends one). Returns the last response; raises ProvisioningError when the
+    connection never succeeded.
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = session.post(url, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise ProvisioningError(f"POST {url} failed after {retries + 1} attempts: {e}") from e
+            sleep(backoff_delay(attempt, backoff, max_backoff))
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        sleep(max(_retry_after(response), backoff_delay(attempt, backoff, max_backoff)))
+    return response
+
+
+def _error_text(response) -> str:
+    return f"HTTP {response.status_code}: {response.text[:200]}"
+
+
+def request_encrypted_seed(session, student_id: str, public_key_pem: str, repo_url: str = REPO_URL,
+                           url: str = INSTRUCTOR_URL, **retry) -> str:
+    """Uploads the public key to the instructor API; returns the base64 encrypted seed."""
+    payload = {"student_id": student_id, "github_repo_url": repo_url, "public_key": public_key_pem}
+    response = post_json(session, url, payload, **retry)
+    try:
+        encrypted_seed = response.json().get("encrypted_seed")
+    except ValueError:
+        encrypted_seed = None
+    if response.status_code != 200 or not encrypted_seed:
+        raise ProvisioningError(f"Instructor API returned no encrypted seed ({_error_text(response)})")
+    return encrypted_seed
+
+
+def submit_encrypted_seed(session, encrypted_seed: str, subject: str = None, api_url: str = API_URL, **retry) -> dict:
+    """Sends an encrypted seed to the service's /decrypt-seed; returns the response body."""
+    payload = {"encrypted_seed": encrypted_seed}
+    if subject is not None:
+        payload["subject"] = subject
+    response = post_json(session, api_url.rstrip("/") + "/decrypt-seed", payload, **retry)
+    if response.status_code != 200:
+        raise ProvisioningError(f"/decrypt-seed failed ({_error_text(response)})")
+    return response.json()
+
+
+@lru_cache(maxsize=256)
+def read_public_key(path: str) -> str:
+    """PEM text of a public key file (kept as-is, real newlines included)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_manifest(path: str) -> list:
+    """
+    Identities to provision, from a JSON array or JSON lines. Each entry needs
+    "student_id"; "subject", "public_key" (path), "github_repo_url" and
+    "api_url" are optional and fall back to the run's defaults.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    entries = json.loads(text) if stripped.startswith("[") else [
+        json.loads(line) for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")
+    ]
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("student_id"), str):
+            raise ValueError(f"Manifest entry without a student_id: {entry!r}")
+        key = (entry["student_id"], entry.get("subject"))
+        if key in seen:
+            raise ValueError(f"Duplicate manifest entry: {entry['student_id']} / {entry.get('subject')}")
+        seen.add(key)
+    return entries
+
+
+def identity_key(entry: dict) -> str:
+    """Progress-log key of a manifest entry."""
+    subject = entry.get("subject")
+    return entry["student_id"] if subject is None else f"{entry['student_id']}/{subject}"
+
+
+class ProgressLog:
+    """
+    Append-only JSONL record of the fleet run, so an interrupted run resumes
+    where it stopped: identities marked "done" are skipped, and an encrypted
+    seed already fetched is submitted without asking the instructor API again.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.state = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        valid_length = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    state = self.state.setdefault(entry["id"], {})
+                except (ValueError, KeyError, TypeError):
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                state.update({k: v for k, v in entry.items() if k != "id"})
+                valid_length += len(line)
+        # Cut a torn last line (interrupted write) so appending continues cleanly
+        if valid_length != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_length)
+
+    def done(self, key: str) -> bool:
+        return self.state.get(key, {}).get("stage") == "done"
+
+    def encrypted_seed(self, key: str):
+        return self.state.get(key, {}).get("encrypted_seed")
+
+    def record(self, key: str, **fields):
+        with self._lock:
+            self.state.setdefault(key, {}).update(fields)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(dict(id=key, **fields)) + "\n")
+
+
+def provision_identity(session, entry: dict, progress: ProgressLog, instructor_url: str = INSTRUCTOR_URL,
+                       api_url: str = API_URL, public_key_path: str = "student_public.pem",
+                       repo_url: str = REPO_URL, **retry) -> dict:
+    """Key upload -> encrypted seed -> /decrypt-seed for one manifest entry."""
+    key = identity_key(entry)
+    encrypted_seed = progress.encrypted_seed(key)
+    if encrypted_seed is None:
+        public_key_pem = read_public_key(entry.get("public_key", public_key_path))
+        encrypted_seed = request_encrypted_seed(
+            session, entry["student_id"], public_key_pem,
+            entry.get("github_repo_url", repo_url), instructor_url, **retry
+        )
+        progress.record(key, stage="seed", encrypted_seed=encrypted_seed)
+    submit_encrypted_seed(session, encrypted_seed, entry.get("subject"), entry.get("api_url", api_url), **retry)
+    progress.record(key, stage="done")
+    return {"id": key, "status": "ok"}
+
+
+def provision_fleet(entries, progress_path: str = None, concurrency: int = 8, session=None,
+                    on_result=None, **options) -> dict:
+    """
+    Provisions every manifest entry not yet done in `progress_path`, at most
+    `concurrency` at a time over one pooled session. A failed identity is
+    recorded and reported without stopping the others. `options` go to
+    provision_identity (URLs, defaults, retry settings).
+    """
+    progress = ProgressLog(progress_path)
+    pending = [e for e in entries if not progress.done(identity_key(e))]
+    session = session or make_session(concurrency)
+    summary = {"total": len(entries), "skipped": len(entries) - len(pending), "ok": 0, "failed": 0, "errors": {}}
+    start = time.perf_counter()
+
+    def run(entry):
+        try:
+            return provision_identity(session, entry, progress, **options)
+        except (ProvisioningError, OSError, ValueError) as e:
+            key = identity_key(entry)
+            progress.record(key, stage="error", error=str(e))
+            return {"id": key, "status": "error", "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="provision") as executor:
+        for future in as_completed([executor.submit(run, entry) for entry in pending]):
+            result = future.result()
+            if result["status"] == "ok":
+                summary["ok"] += 1
+            else:
+                summary["failed"] += 1
+                summary["errors"][result["id"]] = result["error"]
+            if on_result is not None:
+                on_result(result)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
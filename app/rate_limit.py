@@ -0,0 +1,84 @@
+# app/rate_limit.py
+import math
+import time
+from typing import Optional
+
+
+def client_address(scope, trusted_proxies=frozenset()) -> Optional[str]:
+    """
+    Address to throttle an ASGI request by: the peer's, or when the peer is one
+    of `trusted_proxies`, the nearest X-Forwarded-For hop that isn't (hops to the
+    left of it could have been written by the client itself).
+    """
+    client = scope.get("client")
+    if not client:
+        return None
+    peer = client[0]
+    if peer not in trusted_proxies:
+        return peer
+    hops = [
+        hop.strip()
+        for name, value in scope["headers"] if name == b"x-forwarded-for"
+        for hop in value.decode("latin-1").split(",")
+    ]
+    for hop in reversed(hops):
+        if hop and hop not in trusted_proxies:
+            return hop
+    return peer
+
+
+class TokenBucketLimiter:
+    """
+    In-process token bucket per key (client address, subject, ...).
+
+    Each key refills at `rate` tokens/second up to `burst`. Buckets live in two
+    generations of at most `max_keys / 2` each: a hit in the current one is a
+    single dict lookup, a hit in the previous one moves the bucket forward, and
+    when the current generation fills up the previous one is dropped. Only keys
+    left idle for a whole generation are forgotten (they restart with a full
+    bucket), as with an LRU, but without reordering on every request.
+
+    There is no lock: the API only calls allow() from the event loop thread,
+    where a lock would double its cost. Racing calls from several threads
+    could both be admitted on the same tokens.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._generation_size = max(1, max_keys // 2)
+        self._buckets = {}  # key -> [tokens, last_refill]
+        self._previous = {}
+        self.rejected = 0
+
+    def allow(self, key, cost: float = 1.0) -> bool:
+        """Takes `cost` tokens from the key's bucket; False (and nothing taken) if short."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._previous.pop(key, None) or [self.burst, now]
+            if len(self._buckets) >= self._generation_size:
+                self._previous = self._buckets
+                self._buckets = {}
+            self._buckets[key] = bucket
+        tokens = bucket[0] + (now - bucket[1]) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return True
+        bucket[0] = tokens
+        self.rejected += 1
+        return False
+
+    def retry_after(self, key, cost: float = 1.0) -> int:
+        """Whole seconds (at least 1) until `cost` tokens will be available for the key."""
+        bucket = self._buckets.get(key) or self._previous.get(key)
+        tokens = self.burst if bucket is None else bucket[0]
+        missing = min(cost, self.burst) - tokens
+        return max(1, math.ceil(missing / self.rate))
+
+    def stats(self) -> dict:
+        return {"rejected": self.rejected, "keys": len(self._buckets) + len(self._previous)}
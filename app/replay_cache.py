@@ -0,0 +1,177 @@
+# app/replay_cache.py
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+# Outcomes of ReplayCache.record()
+ACCEPTED = "accepted"
+REPLAYED = "replayed"
+FULL = "full"
+
+# Shared layout: regions (u64) | slots per region (u64), then per region:
+#                step (i64) | entries (u64) | slots x key (u64, 0 = empty)
+_GEOMETRY = struct.Struct("<QQ")
+_REGION_HEADER = struct.Struct("<qQ")
+_SLOT = struct.Struct("<Q")
+
+
+class ReplayCache:
+    """
+    Remembers accepted (subject, seed generation, time step) triples so a code
+    can be used once.
+
+    For a given seed and step exactly one code is valid, so the triple identifies
+    the code without storing it (Unicode look-alike digits can't slip past either).
+    The generation keeps a rotated seed's codes apart from the old seed's.
+    Entries live in one set of (subject, generation) pairs per matched time step.
+    A step's set is dropped as soon as that step can no longer be accepted
+    (current step > step + window_steps), so at most 2 * window_steps + 2 sets
+    exist at any time, each capped at `max_entries_per_step`. Lookups and inserts
+    are O(1) under a single lock.
+
+    Per process only: with several workers see SharedReplayCache.
+    """
+
+    def __init__(self, window_steps: int = 1, max_entries_per_step: int = 200_000):
+        self.window_steps = window_steps
+        self.max_entries_per_step = max_entries_per_step
+        self._lock = threading.Lock()
+        self._buckets = {}  # matched step -> set of (subject, generation)
+        self._purged_for = None
+        self.replays = 0
+
+    def _expire(self, current_step: int):
+        if current_step == self._purged_for:
+            return
+        oldest_live = current_step - self.window_steps
+        for step in [s for s in self._buckets if s < oldest_live]:
+            del self._buckets[step]
+        self._purged_for = current_step
+
+    def record(self, subject: str, generation: int, matched_step: int, current_step: int) -> str:
+        """
+        Marks a verified code as used. Returns ACCEPTED the first time, REPLAYED if
+        it was already accepted, or FULL if the step's bucket is at capacity.
+        """
+        key = (subject, generation)
+        with self._lock:
+            self._expire(current_step)
+            bucket = self._buckets.get(matched_step)
+            if bucket is None:
+                bucket = self._buckets[matched_step] = set()
+            elif key in bucket:
+                self.replays += 1
+                return REPLAYED
+            if len(bucket) >= self.max_entries_per_step:
+                return FULL
+            bucket.add(key)
+            return ACCEPTED
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replays": self.replays,
+                "buckets": len(self._buckets),
+                "entries": sum(len(b) for b in self._buckets.values()),
+            }
+
+
+class SharedReplayCache:
+    """
+    ReplayCache shared by every worker process on the host, in an mmap'd segment
+    file (like app.shared_seed.SharedSeed), so a code accepted by one worker is
+    refused by all the others.
+
+    The segment has 2 * window_steps + 2 regions and a matched step always goes
+    to region `step % regions`. A region holds one step at a time: the first
+    record() of a newer step clears it, since the step it held can no longer be
+    accepted by then. Each region is an open-addressing table of 64-bit hashes of
+    (subject, generation), kept at most half full by `max_entries_per_step`.
+    record() holds an flock of the segment, which costs a few microseconds more
+    than ReplayCache. A segment left with other settings is cleared on open.
+    """
+
+    def __init__(self, path: str, window_steps: int = 1, max_entries_per_step: int = 200_000):
+        self.path = path
+        self.window_steps = window_steps
+        self.max_entries_per_step = max_entries_per_step
+        self.regions = 2 * window_steps + 2
+        self.slots = 1 << (2 * max_entries_per_step - 1).bit_length()
+        self._region_size = _REGION_HEADER.size + self.slots * _SLOT.size
+        size = _GEOMETRY.size + self.regions * self._region_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                geometry = os.pread(fd, _GEOMETRY.size, 0)
+                if os.fstat(fd).st_size != size or geometry != _GEOMETRY.pack(self.regions, self.slots):
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, _GEOMETRY.pack(self.regions, self.slots), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._lock = threading.Lock()
+        self.replays = 0
+
+    @staticmethod
+    def _key(subject: str, generation: int) -> int:
+        digest = hashlib.blake2b(f"{subject}\0{generation}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def _region(self, step: int) -> int:
+        return _GEOMETRY.size + (step % self.regions) * self._region_size
+
+    def record(self, subject: str, generation: int, matched_step: int, current_step: int) -> str:
+        """Same contract as ReplayCache.record(), across processes."""
+        key = self._key(subject, generation)
+        base = self._region(matched_step)
+        first = base + _REGION_HEADER.size
+        mask = self.slots - 1
+        buf = self._map
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                step, entries = _REGION_HEADER.unpack_from(buf, base)
+                if step != matched_step:
+                    if step > matched_step:
+                        # A newer step already reuses the region: matched_step can't be current
+                        return FULL
+                    buf[first:first + self.slots * _SLOT.size] = bytes(self.slots * _SLOT.size)
+                    step, entries = matched_step, 0
+                    _REGION_HEADER.pack_into(buf, base, step, entries)
+                index = key & mask
+                while True:
+                    offset = first + index * _SLOT.size
+                    stored = _SLOT.unpack_from(buf, offset)[0]
+                    if stored == key:
+                        self.replays += 1
+                        return REPLAYED
+                    if stored == 0:
+                        break
+                    index = (index + 1) & mask
+                if entries >= self.max_entries_per_step:
+                    return FULL
+                _SLOT.pack_into(buf, offset, key)
+                _REGION_HEADER.pack_into(buf, base, step, entries + 1)
+                return ACCEPTED
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        with self._lock:
+            headers = [_REGION_HEADER.unpack_from(self._map, self._region(r)) for r in range(self.regions)]
+        newest = max(step for step, _ in headers)
+        live = [entries for step, entries in headers if step and step >= newest - 2 * self.window_steps]
+        return {"replays": self.replays, "buckets": len(live), "entries": sum(live)}
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
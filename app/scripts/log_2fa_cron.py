@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 # app/scripts/log_2fa_cron.py
+import argparse
 import datetime
 import os
 import sys
@@ -17,7 +18,34 @@ def now():
     # CRITICAL: Must use UTC
     return datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
+def run_daemon(log_file, interval, max_bytes, backups, compress):
+    """Long-lived mode: one process logs on every period-aligned boundary (replaces cron)."""
+    from app.code_logger import CodeLogger
+    from app.log_sink import RotatingLogSink
+    from app.seed_cache import SeedCache
+
+    sink = RotatingLogSink(log_file, max_bytes, backups=backups, compress=compress) if log_file else None
+    logger = CodeLogger(SeedCache(SEED_FILE), log_file, interval, sink=sink)
+    try:
+        logger.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.stop()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Log the current 2FA code (once, or continuously with --daemon).")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and log on every boundary.")
+    parser.add_argument("--log-file", default=None, help="Append to this file instead of stdout (daemon mode).")
+    parser.add_argument("--interval", type=int, default=60, help="Seconds between lines, a multiple of 30.")
+    parser.add_argument("--max-bytes", type=int, default=1_048_576, help="Rotate the log file at this size.")
+    parser.add_argument("--backups", type=int, default=5, help="Rotated segments to keep.")
+    parser.add_argument("--compress", action="store_true", help="Gzip rotated segments.")
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(args.log_file, args.interval, args.max_bytes, args.backups, args.compress)
+        sys.exit(0)
+
     try:
         # 1. Read seed from persistent storage
         if not os.path.exists(SEED_FILE):
@@ -0,0 +1,184 @@
+# app/seed_cache.py
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+# A valid seed is exactly 64 hex characters (32 bytes)
+_HEX_SEED_RE = re.compile(r"[0-9a-fA-F]{64}")
+
+
+class SeedMissingError(Exception):
+    """Raised when no seed has been stored yet."""
+
+
+class SeedCorruptError(ValueError):
+    """Raised when the stored seed is not a 64-character hex string."""
+
+
+def parse_hex_seed(hex_seed: str) -> bytes:
+    """Validates a 64-char hex seed and returns the raw 32 bytes used as the HMAC key."""
+    hex_seed = hex_seed.strip()
+    if not _HEX_SEED_RE.fullmatch(hex_seed):
+        raise SeedCorruptError("Seed is not a 64-character hex string")
+    return bytes.fromhex(hex_seed)
+
+
+class SeedCache:
+    """
+    Process-wide cache of the seed stored at `path`.
+
+    The file is read and validated once. Later reads only compare a cheap
+    (mtime, inode, size) fingerprint, and at most once per `recheck_interval`
+    seconds, so the hot path does no file I/O at all.
+
+    With `shared` (an app.shared_seed.SharedSeed), the seed lives in memory shared
+    by all worker processes instead, so a seed written by any worker is seen by
+    all of them immediately. Reads only touch the segment. The file fingerprint is
+    still compared every `recheck_interval` (in get(); peek() reports when one is
+    due), so an external rewrite or removal of the file is picked up as before.
+    The file remains the durable copy for restarts.
+    """
+
+    def __init__(self, path: str, recheck_interval: float = 1.0, shared=None):
+        self.path = path
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        # (hex_seed, seed_bytes, generation) swapped as one tuple so readers never see a mix
+        self._entry = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self.shared = shared
+        self._shared_checked = False
+        # Bumped every time the cached seed changes (used to key derived caches)
+        self.generation = 0
+        self.hits = 0
+        self.disk_reads = 0
+
+    def _stat_fingerprint(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _load(self, fingerprint):
+        with open(self.path, "r") as f:
+            hex_seed = f.read().strip()
+        self.disk_reads += 1
+        seed_bytes = parse_hex_seed(hex_seed)
+        self._set(hex_seed.lower(), seed_bytes, fingerprint)
+
+    def _set(self, hex_seed: str, seed_bytes: bytes, fingerprint):
+        if self._entry is None or seed_bytes != self._entry[1]:
+            self.generation += 1
+        self._entry = (hex_seed, seed_bytes, self.generation)
+        self._fingerprint = fingerprint
+        self._checked_at = time.monotonic()
+
+    def _adopt_shared(self):
+        snapshot = self.shared.read()
+        if snapshot is None:
+            return None
+        entry = self._entry
+        if entry is None or entry[2] != snapshot.generation:
+            # Generations come from the segment, so every worker keys derived caches alike
+            entry = self._entry = (snapshot.seed.hex(), snapshot.seed, snapshot.generation)
+            self.generation = snapshot.generation
+        return entry
+
+    def peek(self, stale_ok: bool = False):
+        """
+        Returns (hex_seed, seed_bytes, generation) from memory without any I/O, or
+        None if the fingerprint is due for a re-check (with stale_ok: if nothing is cached).
+        """
+        if self.shared is not None and self._shared_checked:
+            if not stale_ok and time.monotonic() - self._checked_at >= self.recheck_interval:
+                return None
+            entry = self._adopt_shared()
+            if entry is not None:
+                self.hits += 1
+            return entry
+        entry = self._entry
+        if entry is None:
+            return None
+        if stale_ok or time.monotonic() - self._checked_at < self.recheck_interval:
+            self.hits += 1
+            return entry
+        return None
+
+    def get(self):
+        """Returns (hex_seed, seed_bytes, generation), reloading only if the file changed."""
+        cached = self.peek()
+        if cached is not None:
+            return cached
+        if self.shared is not None:
+            return self._get_shared()
+
+        now = time.monotonic()
+        with self._lock:
+            fingerprint = self._stat_fingerprint()
+            if fingerprint is None:
+                # File removed (or never written): forget any stale seed
+                self._entry = self._fingerprint = None
+                raise SeedMissingError(f"Seed not found at {self.path}")
+            if fingerprint == self._fingerprint and self._entry is not None:
+                self._checked_at = now
+                self.hits += 1
+            else:
+                try:
+                    self._load(fingerprint)
+                except Exception:
+                    # Stop serving the old seed (peek(stale_ok=True)): every read reports the bad file
+                    self._entry = self._fingerprint = None
+                    raise
+            return self._entry
+
+    def _get_shared(self):
+        # Lock order everywhere: shared segment, then self._lock
+        with self.shared.lock(), self._lock:
+            fingerprint = self._stat_fingerprint()
+            if fingerprint is None:
+                self._entry = None
+                self._shared_checked = False
+                raise SeedMissingError(f"Seed not found at {self.path}")
+            snapshot = self.shared.read()
+            if snapshot is None or snapshot.fingerprint != fingerprint:
+                # First worker up, or the file was rewritten outside the API
+                try:
+                    with open(self.path, "r") as f:
+                        hex_seed = f.read().strip()
+                    self.disk_reads += 1
+                    self.shared.publish(parse_hex_seed(hex_seed), fingerprint)
+                except Exception:
+                    # As in get(): drop the cached seed so the next read reports the error
+                    self._entry = None
+                    self._shared_checked = False
+                    raise
+            self._shared_checked = True
+            self._checked_at = time.monotonic()
+            return self._adopt_shared()
+
+    def writer_lock(self):
+        """Held around writing the seed file and update(), so workers publish in write order."""
+        return self.shared.lock() if self.shared is not None else nullcontext()
+
+    def update(self, hex_seed: str):
+        """Stores a freshly written seed directly, without re-reading the file."""
+        seed_bytes = parse_hex_seed(hex_seed)
+        with self.writer_lock(), self._lock:
+            if self.shared is not None:
+                self.shared.publish(seed_bytes, self._stat_fingerprint())
+                self._shared_checked = True
+                self._checked_at = time.monotonic()
+                self._adopt_shared()
+                return
+            self._set(hex_seed.strip().lower(), seed_bytes, self._stat_fingerprint())
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_reads": self.disk_reads,
+            "generation": self.generation,
+        }
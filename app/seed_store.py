@@ -0,0 +1,229 @@
+# app/seed_store.py
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from app.seed_cache import SeedCache, SeedMissingError, parse_hex_seed
+from app.storage import atomic_write_text
+
+# Subject used when a request doesn't name one (the original single-seed behaviour)
+DEFAULT_SUBJECT = "default"
+
+_SUBJECT_RE = re.compile(r"[A-Za-z0-9._@:-]{1,128}")
+
+# `generation` changes whenever the subject's seed changes (used to key derived caches)
+SeedRecord = namedtuple("SeedRecord", ["seed", "generation"])
+
+
+def validate_subject(subject) -> str:
+    """Returns the subject to use, raises ValueError for malformed identifiers."""
+    if subject is None:
+        return DEFAULT_SUBJECT
+    if not isinstance(subject, str) or not _SUBJECT_RE.fullmatch(subject):
+        raise ValueError("Invalid subject identifier")
+    return subject
+
+
+class SeedStore:
+    """Interface for seed backends keyed by subject (user or tenant ID)."""
+
+    def get(self, subject: str) -> SeedRecord:
+        """Returns the subject's seed, raises SeedMissingError if none is stored."""
+        raise NotImplementedError
+
+    def peek(self, subject: str, stale_ok: bool = False):
+        """
+        Returns the subject's record if it is cached in memory and fresh (or any
+        cached record with stale_ok), else None. Never does I/O, so it is safe to
+        call on the event loop.
+        """
+        return None
+
+    def put(self, subject: str, hex_seed: str) -> None:
+        raise NotImplementedError
+
+    def bulk_import(self, items) -> int:
+        """Stores an iterable of (subject, hex_seed) pairs, returns how many were written."""
+        count = 0
+        for subject, hex_seed in items:
+            self.put(subject, hex_seed)
+            count += 1
+        return count
+
+
+class FileSeedStore(SeedStore):
+    """Single-seed backend on top of a plain seed file (e.g. /data/seed.txt)."""
+
+    def __init__(self, cache: SeedCache):
+        self.cache = cache
+
+    def get(self, subject: str = DEFAULT_SUBJECT) -> SeedRecord:
+        _, seed_bytes, generation = self.cache.get()
+        return SeedRecord(seed_bytes, generation)
+
+    def peek(self, subject: str = DEFAULT_SUBJECT, stale_ok: bool = False):
+        cached = self.cache.peek(stale_ok)
+        if cached is None:
+            return None
+        return SeedRecord(cached[1], cached[2])
+
+    def put(self, subject: str, hex_seed: str) -> None:
+        parse_hex_seed(hex_seed)
+        with self.cache.writer_lock():
+            # Atomic replace: concurrent readers never see a partially written seed
+            atomic_write_text(self.cache.path, hex_seed)
+            self.cache.update(hex_seed)
+
+
+class SQLiteSeedStore(SeedStore):
+    """
+    Indexed on-disk backend: one row per subject in SQLite (primary-key lookup),
+    fronted by a bounded in-memory LRU of hot seeds.
+
+    LRU entries are re-validated after `ttl` seconds so that writes made by other
+    processes become visible without a round trip on every request.
+
+    Each thread queries on its own connection (WAL lets readers run side by
+    side), so `_lock` only guards the LRU; writes are serialized by `_write_lock`.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS seeds (
+            subject    TEXT PRIMARY KEY,
+            seed       BLOB NOT NULL,
+            generation INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """
+    _UPSERT = """
+        INSERT INTO seeds (subject, seed, generation, updated_at) VALUES (?, ?, 1, ?)
+        ON CONFLICT(subject) DO UPDATE SET
+            seed = excluded.seed,
+            generation = seeds.generation + 1,
+            updated_at = excluded.updated_at
+    """
+
+    def __init__(self, path: str, lru_size: int = 10_000, ttl: float = 1.0):
+        self.path = path
+        self.lru_size = lru_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._lru = OrderedDict()
+        self.hits = 0
+        self.db_reads = 0
+
+    def _connection(self):
+        # Opened lazily (per thread) so the service still starts when only the default tenant is used
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, subject: str, record: SeedRecord):
+        self._lru[subject] = (record, time.monotonic())
+        self._lru.move_to_end(subject)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def peek(self, subject: str, stale_ok: bool = False):
+        with self._lock:
+            entry = self._lru.get(subject)
+            if entry is not None and (stale_ok or time.monotonic() - entry[1] < self.ttl):
+                self._lru.move_to_end(subject)
+                self.hits += 1
+                return entry[0]
+        return None
+
+    def get(self, subject: str) -> SeedRecord:
+        record = self.peek(subject)
+        if record is not None:
+            return record
+        try:
+            row = self._connection().execute(
+                "SELECT seed, generation FROM seeds WHERE subject = ?", (subject,)
+            ).fetchone()
+        except sqlite3.Error:
+            # Don't leave a stale copy for peek(stale_ok=True) to keep serving
+            with self._lock:
+                self._lru.pop(subject, None)
+            raise
+        with self._lock:
+            self.db_reads += 1
+            if row is None:
+                self._lru.pop(subject, None)
+                raise SeedMissingError(f"No seed stored for subject {subject!r}")
+            record = SeedRecord(bytes(row[0]), row[1])
+            cached = self._lru.get(subject)
+            # A put() that committed after our SELECT has already cached a newer generation
+            if cached is not None and cached[0].generation > record.generation:
+                record = cached[0]
+            self._remember(subject, record)
+            return record
+
+    def put(self, subject: str, hex_seed: str) -> None:
+        seed_bytes = parse_hex_seed(hex_seed)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute(self._UPSERT, (subject, seed_bytes, time.time()))
+            generation = conn.execute(
+                "SELECT generation FROM seeds WHERE subject = ?", (subject,)
+            ).fetchone()[0]
+            with self._lock:
+                self._remember(subject, SeedRecord(seed_bytes, generation))
+
+    def bulk_import(self, items) -> int:
+        """Imports (subject, hex_seed) pairs in a single transaction."""
+        now = time.time()
+        rows = [(validate_subject(subject), parse_hex_seed(hex_seed), now) for subject, hex_seed in items]
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(self._UPSERT, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            # Drop any cached copies; the next read picks up the new generation
+            with self._lock:
+                for subject, _, _ in rows:
+                    self._lru.pop(subject, None)
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "db_reads": self.db_reads, "lru_entries": len(self._lru)}
+
+
+class TenantSeedStore(SeedStore):
+    """Routes the default subject to the legacy seed file and every other subject to `tenants`."""
+
+    def __init__(self, default: FileSeedStore, tenants: SeedStore):
+        self.default = default
+        self.tenants = tenants
+
+    def _backend(self, subject: str) -> SeedStore:
+        return self.default if subject == DEFAULT_SUBJECT else self.tenants
+
+    def get(self, subject: str = DEFAULT_SUBJECT) -> SeedRecord:
+        return self._backend(subject).get(subject)
+
+    def peek(self, subject: str = DEFAULT_SUBJECT, stale_ok: bool = False):
+        return self._backend(subject).peek(subject, stale_ok)
+
+    def put(self, subject: str, hex_seed: str) -> None:
+        self._backend(subject).put(subject, hex_seed)
+
+    def bulk_import(self, items) -> int:
+        items = list(items)
+        count = self.default.bulk_import(i for i in items if i[0] == DEFAULT_SUBJECT)
+        return count + self.tenants.bulk_import(i for i in items if i[0] != DEFAULT_SUBJECT)
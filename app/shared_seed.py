@@ -0,0 +1,136 @@
+# app/shared_seed.py
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Layout: seq (u64) | generation (u64) | file fingerprint (mtime_ns i64, inode u64, size u64) | seed (32 bytes)
+#         | CRC-32 of the body (u32)
+_SEQ = struct.Struct("<Q")
+_BODY = struct.Struct("<QqQQ32s")
+_CHECKSUM = struct.Struct("<I")
+_BODY_OFFSET = _SEQ.size
+_CHECKSUM_OFFSET = _BODY_OFFSET + _BODY.size
+SEGMENT_SIZE = 128
+
+# Spins before a reader assumes the writer died mid-update and takes the lock
+_MAX_SPINS = 10_000
+
+SharedSnapshot = namedtuple("SharedSnapshot", ["generation", "fingerprint", "seed"])
+
+
+def default_segment_path(seed_path: str, kind: str = "seed") -> str:
+    """One segment per seed file (and kind, e.g. "replay"), in /dev/shm when available."""
+    digest = hashlib.sha256(os.path.abspath(seed_path).encode()).hexdigest()[:16]
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"
+    return os.path.join(directory, f"pki-2fa-{kind}-{digest}")
+
+
+class SharedSeed:
+    """
+    The current 32-byte seed, its generation and the fingerprint of the file it
+    came from, in an mmap'd segment shared by every worker process on the host.
+
+    Seqlock protocol: a writer bumps `seq` to an odd value, writes the body and
+    its checksum, and bumps `seq` to even again. Readers never lock: they read
+    `seq`, the body, the checksum and `seq` again, and retry if `seq` was odd or
+    changed or the checksum doesn't match the body. Writers serialise on an
+    flock of the segment file (plus a thread lock, reentrant within a process).
+    Generation 0 means nothing has been published yet.
+
+    CPython can't emit memory barriers, so on weakly ordered CPUs (arm64) the
+    `seq` check alone could pass a torn body; the checksum catches that. The
+    flock fallback keeps readers correct when a writer dies between the two
+    `seq` updates.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < SEGMENT_SIZE:
+                os.ftruncate(fd, SEGMENT_SIZE)
+            self._map = mmap.mmap(fd, SEGMENT_SIZE)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self.retries = 0
+
+    @contextmanager
+    def lock(self):
+        """Exclusive writer lock across threads and processes (reentrant)."""
+        with self._thread_lock:
+            if self._depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _decode(self, raw: bytes):
+        generation, mtime_ns, inode, size, seed = _BODY.unpack_from(raw)
+        if generation == 0:
+            return None
+        return SharedSnapshot(generation, (mtime_ns, inode, size), seed)
+
+    def _valid(self, raw: bytes) -> bool:
+        return zlib.crc32(raw[:_BODY.size]) == _CHECKSUM.unpack_from(raw, _BODY.size)[0]
+
+    def read(self):
+        """Lock-free consistent snapshot, or None if nothing was published."""
+        buf = self._map
+        end = _CHECKSUM_OFFSET + _CHECKSUM.size
+        for spin in range(_MAX_SPINS):
+            seq = _SEQ.unpack_from(buf, 0)[0]
+            if not seq & 1:
+                raw = buf[_BODY_OFFSET:end]
+                if _SEQ.unpack_from(buf, 0)[0] == seq and self._valid(raw):
+                    return self._decode(raw)
+            self.retries += 1
+            if spin % 100 == 99:
+                time.sleep(0)
+        with self.lock():
+            self._repair()
+            raw = buf[_BODY_OFFSET:end]
+            # Under the lock a bad checksum can't be a torn read: treat the segment as
+            # unpublished (e.g. left by an older layout) so the file gets published again
+            return self._decode(raw) if self._valid(raw) else None
+
+    def _repair(self):
+        # Caller holds the lock: an odd seq here can only be left by a dead writer
+        seq = _SEQ.unpack_from(self._map, 0)[0]
+        if seq & 1:
+            _SEQ.pack_into(self._map, 0, seq + 1)
+
+    def publish(self, seed: bytes, fingerprint) -> int:
+        """Stores a new seed for every process; returns its generation."""
+        if len(seed) != 32:
+            raise ValueError("Shared seed must be 32 bytes")
+        mtime_ns, inode, size = fingerprint or (0, 0, 0)
+        buf = self._map
+        with self.lock():
+            self._repair()
+            seq = _SEQ.unpack_from(buf, 0)[0]
+            generation = _BODY.unpack_from(buf, _BODY_OFFSET)[0] + 1
+            body = _BODY.pack(generation, mtime_ns, inode, size, seed)
+            _SEQ.pack_into(buf, 0, seq + 1)
+            buf[_BODY_OFFSET:_CHECKSUM_OFFSET] = body
+            _CHECKSUM.pack_into(buf, _CHECKSUM_OFFSET, zlib.crc32(body))
+            _SEQ.pack_into(buf, 0, seq + 2)
+            return generation
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
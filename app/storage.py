@@ -0,0 +1,56 @@
+# app/storage.py
+import asyncio
+import functools
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Dedicated threads for blocking file/DB access, so a slow volume can't starve
+# the default executor or stall the event loop
+STORAGE_IO_WORKERS = int(os.environ.get("STORAGE_IO_WORKERS", "4"))
+_io_executor = ThreadPoolExecutor(max_workers=STORAGE_IO_WORKERS, thread_name_prefix="storage-io")
+
+
+async def run_io(fn, *args, **kwargs):
+    """Runs a blocking storage call on the I/O threads and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(fn, *args, **kwargs))
+
+
+def submit_io(fn, *args, **kwargs):
+    """Fire-and-forget variant of run_io; returns the concurrent.futures.Future."""
+    return _io_executor.submit(fn, *args, **kwargs)
+
+
+def atomic_write_bytes(path: str, data: bytes, mode: int = 0o600):
+    """
+    Writes `data` to `path` so readers see either the old or the new content,
+    never a partial file: temp file in the same directory, fsync, rename, fsync dir.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Persist the rename itself
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write_text(path: str, text: str, mode: int = 0o600):
+    atomic_write_bytes(path, text.encode("utf-8"), mode)
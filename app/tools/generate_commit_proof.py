@@ -1,16 +1,21 @@
 # scripts/generated_commit_proof.py (Assumes keys are in the project root for local execution)
+# Batch mode: python app/tools/generate_commit_proof.py --range v1.0..HEAD --output proofs.jsonl
+import argparse
 import base64
 import sys
 import os
 
-# Adjust path to find app module for local execution
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Adjust path to find app module for local execution (project root is two levels up)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# Keys are loaded through the shared, cached key manager in crypto_utils
 from app.crypto_utils import (
+    key_manager,
     load_private_key,
     sign_message_p1,
     load_public_key,
     encrypt_with_public_key
 )
+from app.commit_proofs import write_proofs
 
 # TODO: Replace this with your actual 40-character commit hash
 # **CRITICAL: Get this from 'git log -1 --format=%H' AFTER your final commit**
@@ -20,27 +25,52 @@ commit_hash = "YOUR_40_CHAR_HASH"
 PRIV_KEY_PATH = "student_private.pem"
 INST_PUB_KEY_PATH = "instructor_public.pem"
 
-if not os.path.exists(PRIV_KEY_PATH) or not os.path.exists(INST_PUB_KEY_PATH):
-    print("ERROR: Key files missing for local proof generation.")
-    sys.exit(1)
 
-# Load student private key
-priv = load_private_key(PRIV_KEY_PATH)
+def main():
+    if not os.path.exists(PRIV_KEY_PATH) or not os.path.exists(INST_PUB_KEY_PATH):
+        print("ERROR: Key files missing for local proof generation.")
+        sys.exit(1)
 
-# Sign commit hash using RSA-PSS
-# CRITICAL: Message is the ASCII string of the hash
-sig = sign_message_p1(commit_hash, priv)
-print(f"1. Commit Hash: {commit_hash}")
-print(f"2. Signature Size: {len(sig)} bytes")
+    parser = argparse.ArgumentParser(description="Generate the encrypted commit signature.")
+    parser.add_argument("--range", dest="revs", help="Prove every commit in this rev range instead (JSONL output).")
+    parser.add_argument("--output", default="commit_proofs.jsonl", help="JSONL output for --range (resumed if present).")
+    parser.add_argument("--workers", type=int, default=None, help="Signing processes for --range (default: CPU count).")
+    args = parser.parse_args()
 
-# Load instructor public key
-inst_pub = load_public_key(INST_PUB_KEY_PATH)
+    if args.revs:
+        try:
+            written = write_proofs(args.revs, args.output, PRIV_KEY_PATH, INST_PUB_KEY_PATH, workers=args.workers)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"Wrote {written} new proof(s) to {args.output}")
+        return
 
-# Encrypt the signature with instructor public key
-encrypted_sig = encrypt_with_public_key(sig, inst_pub)
-print(f"3. Encrypted Signature Size: {len(encrypted_sig)} bytes")
+    # Load student private key
+    priv = load_private_key(PRIV_KEY_PATH)
 
-# Output final Base64 encoded proof (single line)
-base64_proof = base64.b64encode(encrypted_sig).decode('ascii')
-print("\n4. Encrypted Commit Signature (BASE64, single line):")
-print(base64_proof)
\ No newline at end of file
+    # Sign commit hash using RSA-PSS
+    # CRITICAL: Message is the ASCII string of the hash
+    sig = sign_message_p1(commit_hash, priv)
+    print(f"1. Commit Hash: {commit_hash}")
+    print(f"2. Signature Size: {len(sig)} bytes")
+
+    # Load instructor public key
+    inst_pub = load_public_key(INST_PUB_KEY_PATH)
+
+    # Encrypt the signature with instructor public key
+    encrypted_sig = encrypt_with_public_key(sig, inst_pub)
+    print(f"3. Encrypted Signature Size: {len(encrypted_sig)} bytes")
+
+    for info in key_manager.info():
+        print(f"   ({info['kind']} key {info['path']} parsed in {info['load_seconds'] * 1000:.1f} ms)")
+
+    # Output final Base64 encoded proof (single line)
+    base64_proof = base64.b64encode(encrypted_sig).decode('ascii')
+    print("\n4. Encrypted Commit Signature (BASE64, single line):")
+    print(base64_proof)
+
+
+# The signing pool uses spawn, which re-imports this file in every worker
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# app/totp_timeline.py
+import hashlib
+import json
+import struct
+import time
+
+from app.totp_utils import PERIOD, _MODULO, _seed_bytes, hotp, timecode
+
+_DIGEST_SIZE = 20  # HMAC-SHA1
+_BLOCK_SIZE = 64
+_DAY = 86400
+_COUNTER = struct.Struct(">Q")
+
+# Steps per chunk: bounds memory (~1.3 MB of digests) while keeping NumPy calls large
+CHUNK_STEPS = 65536
+
+
+def _numpy():
+    # Optional: without NumPy the truncation runs in a plain Python loop
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def step_range(start_time: float, end_time: float):
+    """(first, last) time steps, inclusive, of every code valid at some point in [start_time, end_time]."""
+    if end_time < start_time:
+        raise ValueError("End of the range is before its start")
+    return timecode(start_time), timecode(end_time)
+
+
+def hmac_digests(seed_bytes: bytes, first_step: int, count: int) -> bytes:
+    """Concatenated 20-byte HMAC-SHA1 digests of counters first_step .. first_step + count - 1."""
+    if first_step < 0:
+        raise ValueError("TOTP counter must be non-negative")
+    # HMAC spelled out over two pre-keyed SHA-1 states: copying plain hashlib
+    # objects is ~30% cheaper per step than hmac.HMAC.copy()
+    if len(seed_bytes) > _BLOCK_SIZE:
+        seed_bytes = hashlib.sha1(seed_bytes).digest()
+    key = seed_bytes.ljust(_BLOCK_SIZE, b"\0")
+    inner = hashlib.sha1(bytes(b ^ 0x36 for b in key))
+    outer = hashlib.sha1(bytes(b ^ 0x5C for b in key))
+    pack = _COUNTER.pack
+    parts = []
+    for counter in range(first_step, first_step + count):
+        i = inner.copy()
+        i.update(pack(counter))
+        o = outer.copy()
+        o.update(i.digest())
+        parts.append(o.digest())
+    return b"".join(parts)
+
+
+def truncate_digests(digests: bytes, vectorized: bool = None):
+    """
+    RFC 4226 dynamic truncation + modulo of every digest, as integer codes
+    (a NumPy array when vectorized, else a list). `vectorized=None` uses
+    NumPy when it is installed.
+    """
+    np = _numpy() if vectorized is not False else None
+    if vectorized and np is None:
+        raise RuntimeError("NumPy is not installed")
+    if np is None:
+        codes = []
+        for i in range(0, len(digests), _DIGEST_SIZE):
+            offset = i + (digests[i + _DIGEST_SIZE - 1] & 0x0F)
+            codes.append((int.from_bytes(digests[offset:offset + 4], "big") & 0x7FFFFFFF) % _MODULO)
+        return codes
+
+    table = np.frombuffer(digests, dtype=np.uint8).reshape(-1, _DIGEST_SIZE)
+    offsets = (table[:, -1] & 0x0F).astype(np.intp)
+    window = table[np.arange(len(table))[:, None], offsets[:, None] + np.arange(4)].astype(np.uint32)
+    binary = ((window[:, 0] & 0x7F) << 24) | (window[:, 1] << 16) | (window[:, 2] << 8) | window[:, 3]
+    return binary % _MODULO
+
+
+def code_timeline(seed, first_step: int, count: int, vectorized: bool = None):
+    """Integer codes for `count` consecutive time steps from `first_step`; `seed` is hex or raw bytes."""
+    return truncate_digests(hmac_digests(_seed_bytes(seed), first_step, count), vectorized)
+
+
+def timeline(seeds, first_step: int, last_step: int, chunk_steps: int = CHUNK_STEPS, vectorized: bool = None):
+    """
+    Yields (subject, chunk_first_step, codes) for every (subject, seed) in
+    `seeds` and every step in first_step..last_step, in chunks of at most
+    `chunk_steps`, so a year of steps for many seeds streams in bounded memory.
+    """
+    for subject, seed in seeds:
+        seed_bytes = _seed_bytes(seed)
+        for chunk_first in range(first_step, last_step + 1, chunk_steps):
+            count = min(chunk_steps, last_step + 1 - chunk_first)
+            yield subject, chunk_first, truncate_digests(hmac_digests(seed_bytes, chunk_first, count), vectorized)
+
+
+_STEPS_PER_DAY = _DAY // PERIOD
+# "HH:MM:SS" of every step boundary in a day
+_TIMES_OF_DAY = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(0, _DAY, PERIOD)]
+
+
+def _valid_from(first_step: int, count: int) -> list:
+    """
+    "YYYY-MM-DD HH:MM:SS" (UTC, the cron code log's format, so lines can be
+    joined on it) of each step. strftime per row costs more than the HMAC,
+    so only the date is formatted, once per day.
+    """
+    stamps = []
+    step, last = first_step, first_step + count
+    while step < last:
+        day, index = divmod(step, _STEPS_PER_DAY)
+        end = min(last, (day + 1) * _STEPS_PER_DAY)
+        prefix = time.strftime("%Y-%m-%d ", time.gmtime(day * _DAY))
+        stamps.extend([prefix + t for t in _TIMES_OF_DAY[index:index + end - step]])
+        step = end
+    return stamps
+
+
+def _rows(first: int, codes):
+    # NumPy integers format fine with :06d but are slower to; plain ints are cheapest
+    codes = codes.tolist() if hasattr(codes, "tolist") else codes
+    return zip(range(first, first + len(codes)), _valid_from(first, len(codes)), codes)
+
+
+def write_csv(chunks, out) -> int:
+    """Writes subject,step,valid_from,code rows; returns how many."""
+    out.write("subject,step,valid_from,code\n")
+    rows = 0
+    for subject, first, codes in chunks:
+        # Subjects pass validate_subject() (no commas, quotes or spaces), so no CSV quoting is needed
+        out.write("".join(
+            f"{subject},{step},{stamp},{code:06d}\n" for step, stamp, code in _rows(first, codes)
+        ))
+        rows += len(codes)
+    return rows
+
+
+def write_jsonl(chunks, out) -> int:
+    """Writes one {"subject", "step", "valid_from", "code"} object per line; returns how many."""
+    rows = 0
+    for subject, first, codes in chunks:
+        prefix = '{"subject":' + json.dumps(subject) + ',"step":'
+        out.write("".join(
+            f'{prefix}{step},"valid_from":"{stamp}","code":"{code:06d}"}}\n'
+            for step, stamp, code in _rows(first, codes)
+        ))
+        rows += len(codes)
+    return rows
+
+
+def check_against_scalar(seed, first_step: int, count: int, vectorized: bool = None) -> list:
+    """Steps where code_timeline disagrees with the scalar hotp() path (empty when correct)."""
+    seed_bytes = _seed_bytes(seed)
+    codes = code_timeline(seed_bytes, first_step, count, vectorized)
+    return [
+        first_step + i for i, code in enumerate(codes)
+        if f"{int(code):06d}" != hotp(seed_bytes, first_step + i)
+    ]
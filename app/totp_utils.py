@@ -1,13 +1,24 @@
 # app/totp_utils.py (Final Corrected Version - Bypass Constant)
-import pyotp
 import base64
+import hashlib
+import hmac
+import threading
 import time
+import unicodedata
+from collections import OrderedDict
 
 # TOTP Configuration
 PERIOD = 30
 DIGITS = 6
 # REMOVED: ALGORITHM = ... (relying on pyotp's SHA1 default)
 
+_MODULO = 10 ** DIGITS
+# Pre-keyed HMAC-SHA1 states, one per seed (bounded so many tenants can't grow it forever)
+_HMAC_CACHE_SIZE = 4096
+# LRU order; verify-batch and storage threads share it with the event loop
+_keyed_hmacs = OrderedDict()
+_keyed_hmacs_lock = threading.Lock()
+
 def hex_to_base32(hex_seed: str) -> str:
     # ... (same as before) ...
     try:
@@ -20,6 +31,8 @@ def hex_to_base32(hex_seed: str) -> str:
 
 def get_totp_object(base32_seed: str):
     """Returns a configured pyotp.TOTP object."""
+    # pyotp is only the reference implementation now, so don't import it at startup
+    import pyotp
     return pyotp.TOTP(
         base32_seed,
         digits=DIGITS,
@@ -27,19 +40,184 @@ def get_totp_object(base32_seed: str):
         # CRITICAL: Removed digest=ALGORITHM
     )
 
-def generate_totp_code(hex_seed: str) -> str:
-    # ... (same as before) ...
-    base32_seed = hex_to_base32(hex_seed)
-    totp = get_totp_object(base32_seed)
-    
-    code = totp.now()
-    remaining_seconds = PERIOD - int(time.time() % PERIOD)
-    
+# --- Native RFC 6238 / RFC 4226 engine ---
+
+def _seed_bytes(seed) -> bytes:
+    """Accepts either the raw seed bytes or the 64-char hex string."""
+    if isinstance(seed, (bytes, bytearray)):
+        return bytes(seed)
+    try:
+        return bytes.fromhex(seed)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid hex seed format")
+
+def _keyed_hmac(seed_bytes: bytes):
+    """Returns a pre-keyed HMAC-SHA1 state for the seed; callers must .copy() it."""
+    with _keyed_hmacs_lock:
+        h = _keyed_hmacs.get(seed_bytes)
+        if h is not None:
+            _keyed_hmacs.move_to_end(seed_bytes)
+            return h
+    # Keyed outside the lock; two threads missing at once just build it twice
+    h = hmac.new(seed_bytes, digestmod=hashlib.sha1)
+    with _keyed_hmacs_lock:
+        _keyed_hmacs[seed_bytes] = h
+        if len(_keyed_hmacs) > _HMAC_CACHE_SIZE:
+            _keyed_hmacs.popitem(last=False)
+    return h
+
+def hotp(seed_bytes: bytes, counter: int) -> str:
+    """RFC 4226 HOTP value for `counter`, zero-padded to DIGITS."""
+    if counter < 0:
+        raise ValueError("TOTP counter must be non-negative")
+    h = _keyed_hmac(seed_bytes).copy()
+    h.update(counter.to_bytes(8, "big"))
+    digest = h.digest()
+    # Dynamic truncation (RFC 4226 section 5.3)
+    offset = digest[-1] & 0x0F
+    binary = int.from_bytes(digest[offset:offset + 4], "big") & 0x7FFFFFFF
+    return str(binary % _MODULO).zfill(DIGITS)
+
+def timecode(for_time=None) -> int:
+    """RFC 6238 time step for a unix timestamp (defaults to now)."""
+    if for_time is None:
+        for_time = time.time()
+    return int(for_time) // PERIOD
+
+def generate_totp_code(hex_seed, for_time=None) -> str:
+    """Returns (code, remaining_seconds); `hex_seed` may also be the raw seed bytes."""
+    if for_time is None:
+        for_time = time.time()
+    code = hotp(_seed_bytes(hex_seed), timecode(for_time))
+    remaining_seconds = PERIOD - int(for_time % PERIOD)
+
     return code, remaining_seconds
 
-def verify_totp_code(hex_seed: str, code: str, valid_window: int = 1) -> bool:
-    # ... (same as before) ...
-    base32_seed = hex_to_base32(hex_seed)
-    totp = get_totp_object(base32_seed)
-    
-    return totp.verify(code, valid_window=valid_window)
\ No newline at end of file
+def _normalize_code(code) -> bytes:
+    # pyotp compares NFKC-normalized strings, keep that for identical results
+    return unicodedata.normalize("NFKC", str(code)).encode("utf-8")
+
+def window_offsets(valid_window: int = 1) -> tuple:
+    """Step offsets of a ±valid_window search, nearest first: 0, -1, 1, -2, 2, ..."""
+    offsets = [0]
+    for distance in range(1, valid_window + 1):
+        offsets += (-distance, distance)
+    return tuple(offsets)
+
+def match_totp_code(hex_seed, code: str, valid_window: int = 1, for_time=None, offsets=None):
+    """
+    Returns the time step that `code` matched within ±valid_window, or None.
+    `offsets` replaces the window with explicit step offsets, tried in order.
+    """
+    seed_bytes = _seed_bytes(hex_seed)
+    step = timecode(for_time)
+    code = _normalize_code(code)
+
+    for offset in (window_offsets(valid_window) if offsets is None else offsets):
+        if step + offset >= 0 and hmac.compare_digest(code, hotp(seed_bytes, step + offset).encode()):
+            return step + offset
+    return None
+
+def verify_totp_code(hex_seed, code: str, valid_window: int = 1, for_time=None) -> bool:
+    """Checks `code` against steps t-valid_window..t+valid_window (same semantics as pyotp)."""
+    return match_totp_code(hex_seed, code, valid_window, for_time) is not None
+
+
+# --- Period-scoped code cache ---
+
+class CodeWindowCache:
+    """
+    Caches TOTP codes per (key, time step), computed lazily: a code's HMAC is
+    only run the first time that step is asked for in the current period.
+
+    `key` identifies a seed version (e.g. the seed cache generation). The whole
+    cache is dropped when the time step rolls forward, so HMAC work grows with
+    the number of periods and seeds, not with the number of requests.
+    `on_match(compared, computed)`, if given, receives how many candidates each
+    match() compared and how many of their HMACs it had to run (cache misses).
+    """
+
+    def __init__(self, radius: int = 1, max_keys: int = 100_000, on_match=None):
+        self.radius = radius
+        self.max_keys = max_keys
+        self.on_match = on_match
+        self._lock = threading.Lock()
+        self._step = -1
+        self._windows = {}  # key -> (seed_bytes, {step: encoded code})
+
+    def _codes(self, key, seed_bytes: bytes, step: int) -> dict:
+        """The {step: encoded code} dict of `key` for the period of `step`."""
+        if step != self._step:
+            if step < self._step:
+                # Request straddled a period boundary: answer it without caching
+                return {}
+            with self._lock:
+                if step > self._step:
+                    self._windows = {}
+                    self._step = step
+
+        windows = self._windows
+        entry = windows.get(key)
+        # Seed bytes are stored alongside, so a reused key can never return foreign codes
+        if entry is None or entry[0] != seed_bytes:
+            entry = (seed_bytes, {})
+            if len(windows) < self.max_keys:
+                windows[key] = entry
+        return entry[1]
+
+    @staticmethod
+    def _code(codes: dict, seed_bytes: bytes, step: int) -> bytes:
+        code = codes.get(step)
+        if code is None:
+            # Concurrent threads may both compute it; they store the same value
+            code = codes[step] = hotp(seed_bytes, step).encode()
+        return code
+
+    def window(self, key, seed_bytes: bytes, step: int = None) -> tuple:
+        """Codes for steps step-radius..step+radius."""
+        if step is None:
+            step = timecode()
+        codes = self._codes(key, seed_bytes, step)
+        return tuple(self._code(codes, seed_bytes, s).decode() for s in range(step - self.radius, step + self.radius + 1))
+
+    def generate(self, key, seed_bytes: bytes, for_time=None):
+        """Cached equivalent of generate_totp_code: returns (code, remaining_seconds)."""
+        if for_time is None:
+            for_time = time.time()
+        step = timecode(for_time)
+        code = self._code(self._codes(key, seed_bytes, step), seed_bytes, step).decode()
+        return code, PERIOD - int(for_time % PERIOD)
+
+    def match(self, key, seed_bytes: bytes, code: str, valid_window: int = 1, for_time=None, offsets=None):
+        """
+        Cached equivalent of match_totp_code: the matched time step, or None.
+        Candidates are tried in `offsets` order (default: ±valid_window, nearest
+        first) and the search stops at the first match. Each comparison is
+        constant-time; only which offset matched can show in the timing.
+        """
+        if offsets is None:
+            offsets = window_offsets(valid_window)
+        step = timecode(for_time)
+        codes = self._codes(key, seed_bytes, step)
+        code = _normalize_code(code)
+        compared = computed = 0
+        matched = None
+        for offset in offsets:
+            candidate_step = step + offset
+            if candidate_step < 0:
+                continue
+            compared += 1
+            candidate = codes.get(candidate_step)
+            if candidate is None:
+                candidate = codes[candidate_step] = hotp(seed_bytes, candidate_step).encode()
+                computed += 1
+            if hmac.compare_digest(code, candidate):
+                matched = candidate_step
+                break
+        if self.on_match is not None:
+            self.on_match(compared, computed)
+        return matched
+
+    def verify(self, key, seed_bytes: bytes, code: str, valid_window: int = 1, for_time=None) -> bool:
+        """Cached equivalent of verify_totp_code, using a constant-time compare per candidate."""
+        return self.match(key, seed_bytes, code, valid_window, for_time) is not None
@@ -0,0 +1,46 @@
+# benchmarks/asgi_client.py
+# Minimal in-process HTTP client: drives an ASGI app directly (no sockets).
+import json
+
+
+async def request(app, method: str, path: str, body=None, query: str = "", headers=None, client=("127.0.0.1", 50000)):
+    """Sends one request through the ASGI app; returns (status, body_bytes, headers)."""
+    raw = b"" if body is None else json.dumps(body).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(raw)).encode()),
+        ] + [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": client,
+        "server": ("bench", 8080),
+    }
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": raw, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    response = {"status": None, "headers": [], "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["body"], response["headers"]
@@ -0,0 +1,67 @@
+# benchmarks/bench_decrypt_load.py
+# /verify-2fa handler latency with and without a concurrent /decrypt-seed load.
+# Uses throwaway keys (benchmarks/fixtures.py); set DECRYPT_POOL_KIND=thread to compare pool kinds.
+import asyncio
+import statistics
+import time
+
+from common import percentile
+from fixtures import make_workspace, configure_app_env
+
+VERIFIES = 2000
+DECRYPT_CONCURRENCY = 4
+
+
+def setup_env():
+    ws = make_workspace()
+    configure_app_env(ws, DECRYPT_MAX_PENDING=1000)
+    return ws
+
+
+
+async def measure_verify(main, request):
+    latencies = []
+    for _ in range(VERIFIES):
+        start = time.perf_counter()
+        await main.verify_2fa_endpoint(request)
+        latencies.append(time.perf_counter() - start)
+        # Yield like a real server would between requests
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def decrypt_load(main, encrypted, stop):
+    count = 0
+    while not stop.is_set():
+        await main.decrypt_seed_endpoint(main.DecryptSeedRequest(encrypted_seed=encrypted, subject="load"))
+        count += 1
+    return count
+
+
+async def run(ws):
+    import app.main as main
+
+    main.seed_store.put("default", ws.hex_seed)
+    encrypted = ws.encrypted_seed
+    request = main.Verify2FARequest(code="000000")
+
+    async with main.lifespan(main.app):
+        idle = await measure_verify(main, request)
+
+        stop = asyncio.Event()
+        loaders = [asyncio.create_task(decrypt_load(main, encrypted, stop)) for _ in range(DECRYPT_CONCURRENCY)]
+        start = time.perf_counter()
+        loaded = await measure_verify(main, request)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        decrypts = sum(await asyncio.gather(*loaders))
+
+    print(f"pool: {main.decrypt_pool.kind} x{main.decrypt_pool.workers}")
+    for name, samples in (("idle", idle), ("under decrypt load", loaded)):
+        print(f"verify {name:20s} p50={statistics.median(samples) * 1e6:8.1f} us"
+              f"  p99={percentile(samples, 99) * 1e6:8.1f} us")
+    print(f"decrypts completed during loaded run: {decrypts} ({decrypts / elapsed:.1f}/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(setup_env()))
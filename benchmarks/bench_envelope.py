@@ -0,0 +1,79 @@
+# benchmarks/bench_envelope.py
+# RSA-4096 OAEP vs the X25519 + AES-GCM seed envelope: raw decrypt cost per seed,
+# then /decrypt-seed throughput through the app (decrypt pool included).
+#
+#   python benchmarks/bench_envelope.py [--key-size 4096] [--requests 200]
+import argparse
+import asyncio
+import os
+import time
+
+from common import bench, fmt_us
+from fixtures import make_workspace, configure_app_env
+
+
+def write_x25519_key(directory: str):
+    from app.key_provisioning import generate_x25519_key_pair_pem
+
+    private_pem, public_pem = generate_x25519_key_pair_pem()
+    paths = os.path.join(directory, "student_x25519_private.pem"), os.path.join(directory, "student_x25519_public.pem")
+    for path, pem in zip(paths, (private_pem, public_pem)):
+        with open(path, "wb") as f:
+            f.write(pem)
+    return paths
+
+
+async def endpoint_throughput(main, encrypted_seeds, concurrency: int) -> float:
+    from load import drive
+
+    seeds = iter(encrypted_seeds)
+    async with main.app.router.lifespan_context(main.app):
+        stats = await drive(
+            main.app, "POST", "/decrypt-seed", lambda: {"encrypted_seed": next(seeds), "subject": "bench"},
+            len(encrypted_seeds), concurrency,
+        )
+    if stats["errors"]:
+        raise RuntimeError(f"{stats['errors']} unexpected responses")
+    return stats["throughput"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSA-OAEP vs X25519 seed envelopes.")
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    ws = make_workspace(args.key_size)
+    x25519_private, x25519_public = write_x25519_key(ws.directory)
+    configure_app_env(ws, X25519_PRIVATE_KEY_PATH=x25519_private, SEED_SHARED_MEMORY="0")
+
+    from app.crypto_utils import (
+        load_private_key, load_public_key, decrypt_seed, decrypt_seed_x25519, encrypt_seed_x25519,
+    )
+
+    rsa_key = load_private_key(ws.private_key_path)
+    ec_key = load_private_key(x25519_private)
+    envelope = encrypt_seed_x25519(ws.hex_seed, load_public_key(x25519_public))
+    assert decrypt_seed(ws.encrypted_seed, rsa_key) == decrypt_seed_x25519(envelope, ec_key) == ws.hex_seed
+
+    rsa = bench(lambda: decrypt_seed(ws.encrypted_seed, rsa_key), number=50)
+    ec = bench(lambda: decrypt_seed_x25519(envelope, ec_key), number=2000)
+    print(f"decrypt rsa-{args.key_size} oaep  {fmt_us(rsa)}")
+    print(f"decrypt x25519 envelope  {fmt_us(ec)}   ({rsa / ec:.0f}x faster)")
+    start = time.perf_counter()
+    x25519_seeds = [encrypt_seed_x25519(os.urandom(32).hex(), load_public_key(x25519_public))
+                    for _ in range(args.requests)]
+    print(f"encrypt x25519 envelope  {fmt_us((time.perf_counter() - start) / args.requests)}")
+
+    import app.main as app_main
+
+    # Every RSA request may reuse the same ciphertext; it's decrypted each time
+    rsa_rate = asyncio.run(endpoint_throughput(app_main, [ws.encrypted_seed] * args.requests, args.concurrency))
+    ec_rate = asyncio.run(endpoint_throughput(app_main, x25519_seeds, args.concurrency))
+    print(f"/decrypt-seed rsa-oaep   {rsa_rate:9.1f} req/s")
+    print(f"/decrypt-seed x25519     {ec_rate:9.1f} req/s   ({ec_rate / rsa_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_fast_path.py
+# Requests/sec of /generate-2fa and /verify-2fa through the FastAPI routes vs the
+# FAST_PATH middleware (app/fast_path.py), each mode in a fresh interpreter. Before
+# timing, the fast path is checked to return byte-identical responses (status,
+# headers, body) to the routes for valid, invalid and malformed requests.
+#
+#   python benchmarks/bench_fast_path.py [--requests 5000] [--concurrency 16]
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from common import ROOT
+from asgi_client import request
+
+SCENARIOS = (
+    ("generate_2fa", "GET", "/generate-2fa", None),
+    # A wrong code runs the whole verify path without tripping replay protection
+    ("verify_2fa", "POST", "/verify-2fa", {"code": "000000"}),
+)
+
+
+def parity_cases(code: str):
+    return [
+        ("GET", "/generate-2fa", None, ""),
+        ("GET", "/generate-2fa", None, "subject=bench"),
+        ("GET", "/generate-2fa", None, "subject=no-such-tenant"),
+        ("GET", "/generate-2fa", None, "subject=bad%20subject!"),
+        ("POST", "/verify-2fa", {"code": code}, ""),
+        ("POST", "/verify-2fa", {"code": code, "subject": "bench"}, ""),
+        ("POST", "/verify-2fa", {"code": "000000"}, ""),
+        ("POST", "/verify-2fa", {"code": "000000", "extra": 1}, ""),
+        ("POST", "/verify-2fa", {"code": "12ab56"}, ""),
+        ("POST", "/verify-2fa", {"code": ""}, ""),
+        ("POST", "/verify-2fa", {"code": "000000", "subject": "../etc"}, ""),
+        # Everything below falls through to FastAPI's 422
+        ("POST", "/verify-2fa", {"code": 123456}, ""),
+        ("POST", "/verify-2fa", {"subject": "bench"}, ""),
+        ("POST", "/verify-2fa", ["000000"], ""),
+        ("POST", "/verify-2fa", None, ""),
+    ]
+
+
+async def check_parity(main) -> tuple:
+    """Sends every case through a fast-path wrapper and the plain app; returns (cases, mismatches)."""
+    from app.fast_path import FastPathMiddleware
+
+    fast = FastPathMiddleware(main.app, main.current_code, main.check_totp_code, main.router.routes)
+    mismatches = 0
+    async with main.app.router.lifespan_context(main.app):
+        await main.store_seed("bench", os.environ["BENCH_HEX_SEED"])
+        code = json.loads((await request(main.app, "GET", "/generate-2fa"))[1])["code"]
+        cases = parity_cases(code)
+        for method, path, body, query in cases:
+            # Replay protection is off here, so sending the same valid code twice is fine
+            expected = await request(main.app, method, path, body, query)
+            actual = await request(fast, method, path, body, query)
+            if expected != actual:
+                mismatches += 1
+                print(f"MISMATCH {method} {path}?{query} {body!r}\n  routes: {expected}\n  fast:   {actual}")
+    return len(cases), mismatches
+
+
+def child(requests: int, concurrency: int):
+    """Runs in the fresh interpreter: prints the throughput per scenario as JSON."""
+    import app.main as main
+    from load import drive
+
+    async def go():
+        results = {}
+        async with main.app.router.lifespan_context(main.app):
+            for name, method, path, body in SCENARIOS:
+                await drive(main.app, method, path, lambda: body, 200, concurrency)  # warm up
+                stats = await drive(main.app, method, path, lambda: body, requests, concurrency)
+                if stats["errors"]:
+                    raise RuntimeError(f"{name}: {stats['errors']} unexpected responses")
+                results[name] = stats
+        return results
+
+    print(json.dumps(asyncio.run(go())))
+
+
+def sample(fast_path: bool, requests: int, concurrency: int) -> dict:
+    env = dict(os.environ, FAST_PATH="1" if fast_path else "0", REPLAY_PROTECTION="1")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child",
+         "--requests", str(requests), "--concurrency", str(concurrency)],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI routes vs the FAST_PATH middleware.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.requests, args.concurrency)
+        return
+
+    from fixtures import make_workspace, configure_app_env
+
+    ws = make_workspace(args.key_size)
+    configure_app_env(ws, REPLAY_PROTECTION="0", FAST_PATH="0", BENCH_HEX_SEED=ws.hex_seed)
+    seed_path = os.environ["SEED_FILE_PATH"]
+    os.makedirs(os.path.dirname(seed_path), exist_ok=True)
+    with open(seed_path, "w") as f:
+        f.write(ws.hex_seed)
+
+    import app.main as app_main
+
+    cases, mismatches = asyncio.run(check_parity(app_main))
+    print(f"parity: {cases - mismatches}/{cases} cases identical")
+    if mismatches:
+        sys.exit(1)
+
+    routes = sample(False, args.requests, args.concurrency)
+    fast = sample(True, args.requests, args.concurrency)
+    for name, *_ in SCENARIOS:
+        base, quick = routes[name]["throughput"], fast[name]["throughput"]
+        print(f"{name:14s} routes {base:9.0f} req/s   fast path {quick:9.0f} req/s   ({quick / base - 1:+.0%})")
+        print(f"{'':14s} p50 {routes[name]['p50'] * 1e6:8.1f} us -> {fast[name]['p50'] * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_io_latency.py
+# Concurrency check: inject artificial disk latency into seed reads/writes and
+# show that /verify-2fa p99 stays flat because storage I/O is off the event loop.
+# Verifies run for a fixed time while seeds rotate and the file fingerprint is
+# re-checked over and over; the run fails unless many slow calls overlapped it.
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from common import percentile
+
+_tmp = tempfile.mkdtemp(prefix="bench-io-")
+os.environ["SEED_FILE_PATH"] = os.path.join(_tmp, "seed.txt")
+os.environ["SEED_DB_PATH"] = os.path.join(_tmp, "seeds.db")
+# Throttling would turn the repeated attempts into 429s
+os.environ["VERIFY_RATE_LIMIT"] = "0"
+# The shared segment would serve reads without ever calling the slowed file primitives
+os.environ["SEED_SHARED_MEMORY"] = "0"
+
+import app.main as main  # noqa: E402
+import app.seed_store as seed_store_module  # noqa: E402
+from app.seed_cache import SeedCache  # noqa: E402
+
+DISK_LATENCY = 0.05  # seconds added to every stat/read/write of the seed
+DURATION = 3.0  # seconds of verifies per phase: many slow calls, not just one
+MIN_SLOW_CALLS = 20  # slow calls that must have completed during the measured phase
+
+# Completed slow calls per primitive
+slow_calls = Counter()
+
+
+def inject_latency():
+    """Wraps the blocking storage primitives with a sleep, like a slow network volume."""
+    def slow(name, fn):
+        def wrapper(*args, **kwargs):
+            time.sleep(DISK_LATENCY)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                slow_calls[name] += 1
+        return wrapper
+
+    SeedCache._stat_fingerprint = slow("stat", SeedCache._stat_fingerprint)
+    SeedCache._load = slow("read", SeedCache._load)
+    seed_store_module.atomic_write_text = slow("write", seed_store_module.atomic_write_text)
+
+
+async def verify_loop(request):
+    latencies = []
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await main.verify_2fa_endpoint(request)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def rotate_seeds(stop):
+    rotations = 0
+    while not stop.is_set():
+        await main.store_seed("default", os.urandom(32).hex())
+        rotations += 1
+    return rotations
+
+
+async def run():
+    main.seed_store.put("default", os.urandom(32).hex())
+    request = main.Verify2FARequest(code="000000")
+    baseline = await verify_loop(request)
+
+    inject_latency()
+    # Force frequent fingerprint re-checks so the slow stat path is exercised constantly
+    main.seed_cache.recheck_interval = 0.01
+    stop = asyncio.Event()
+    writer = asyncio.create_task(rotate_seeds(stop))
+    await asyncio.sleep(DISK_LATENCY * 3)  # let the first slow calls get going
+    before = Counter(slow_calls)
+    loaded = await verify_loop(request)
+    during = slow_calls - before
+    stop.set()
+    rotations = await writer
+
+    for name, samples in (("baseline", baseline), (f"+{DISK_LATENCY * 1000:.0f} ms disk latency", loaded)):
+        print(f"verify {name:24s} p50={statistics.median(samples) * 1e6:8.1f} us"
+              f"  p99={percentile(samples, 99) * 1e6:8.1f} us  max={max(samples) * 1e3:6.2f} ms")
+    print(f"verifies: {len(baseline)} baseline, {len(loaded)} under load; seed rotations: {rotations}")
+    print(f"slow calls completed while verifies were measured: {dict(during)}")
+    assert sum(during.values()) >= MIN_SLOW_CALLS and during["stat"] and during["write"], \
+        "too few slow storage calls overlapped the measured verifies"
+    assert percentile(loaded, 99) < DISK_LATENCY / 10, "verify p99 is blocked by disk latency"
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+# benchmarks/bench_key_pool.py
+# Per-tenant provisioning latency when tenants arrive one at a time, as in a
+# long-running provisioner: generating each pair inline vs taking it from
+# app.key_provisioning.KeyPool, which refills in background processes between
+# arrivals. Checks that every written pair parses and matches, and that
+# provisioning an existing tenant fails without using up a pooled pair.
+#
+#   python benchmarks/bench_key_pool.py [--tenants 12] [--pool 4] [--interval 0.5] [--key-size 2048]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from common import ROOT  # noqa: F401  (sets up sys.path)
+
+
+def arrivals(provision, tenants, interval: float) -> list:
+    """Seconds each provision(tenant) call took, with `interval` seconds between tenants."""
+    latencies = []
+    for i, tenant in enumerate(tenants):
+        if i and interval:
+            time.sleep(interval)
+        start = time.perf_counter()
+        provision(tenant)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def matching_pair(private_path: str, public_path: str) -> bool:
+    from cryptography.hazmat.primitives import serialization
+
+    with open(private_path, "rb") as f:
+        private_key = serialization.load_pem_private_key(f.read(), password=None)
+    with open(public_path, "rb") as f:
+        public_key = serialization.load_pem_public_key(f.read())
+    return private_key.public_key().public_numbers() == public_key.public_numbers()
+
+
+def report(name: str, latencies: list, extra: str = ""):
+    print(f"{name:8s} p50 {statistics.median(latencies) * 1e3:8.1f} ms   max {max(latencies) * 1e3:8.1f} ms   "
+          f"total {sum(latencies):6.2f}s{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tenant key provisioning: inline generation vs KeyPool.")
+    parser.add_argument("--tenants", type=int, default=12)
+    parser.add_argument("--pool", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between tenant arrivals.")
+    parser.add_argument("--key-size", type=int, default=2048)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from app.key_provisioning import KeyPool, generate_key_pair_pem, tenant_key_paths, write_key_pair
+
+    tenants = [f"tenant-{i:04d}" for i in range(args.tenants)]
+    inline_root = tempfile.mkdtemp(prefix="pki-2fa-keys-inline-")
+    inline = arrivals(
+        lambda tenant: write_key_pair(inline_root, tenant, generate_key_pair_pem(args.key_size)),
+        tenants, args.interval,
+    )
+    report("inline", inline)
+
+    pool_root = tempfile.mkdtemp(prefix="pki-2fa-keys-pool-")
+    pool = KeyPool(args.pool, args.key_size, workers=args.workers).start()
+    try:
+        start = time.perf_counter()
+        if not pool.fill(timeout=300):
+            print(f"FAILED: the pool did not fill: {pool.stats()}")
+            sys.exit(1)
+        filled = time.perf_counter() - start
+        pooled = arrivals(lambda tenant: pool.provision(pool_root, tenant), tenants, args.interval)
+        stats = pool.stats()
+        report("pool", pooled, f"   {stats['hits']} hits, {stats['misses']} misses "
+                               f"(filled {args.pool} in {filled:.2f}s with {args.workers} worker(s))")
+
+        ready = pool.stats()["ready"]
+        try:
+            pool.provision(pool_root, tenants[0])
+            existing_rejected = False
+        except FileExistsError:
+            existing_rejected = True
+        after = pool.stats()
+        kept = after["ready"] >= ready and after["hits"] + after["misses"] == stats["hits"] + stats["misses"]
+        print(f"existing tenant: {'rejected' if existing_rejected else 'OVERWRITTEN'}, "
+              f"pooled pair {'kept' if kept else 'USED UP'}")
+    finally:
+        pool.stop()
+
+    bad = [t for t in tenants
+           if not matching_pair(*tenant_key_paths(inline_root, t)) or not matching_pair(*tenant_key_paths(pool_root, t))]
+    print(f"speedup at p50: {statistics.median(inline) / statistics.median(pooled):.0f}x; "
+          f"{len(tenants) * 2 - len(bad) * 2}/{len(tenants) * 2} written pairs match")
+    if bad or not (existing_rejected and kept):
+        print(f"FAILED: mismatched pairs for {bad}" if bad else "FAILED: existing tenant handling")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# benchmarks/bench_profiling.py
+# What the profiling middleware (app/profiling.py) costs. With PROFILE_DIR unset
+# it isn't installed at all, which is checked first. Then requests/sec of
+# /generate-2fa and /verify-2fa without it, installed but idle (secret set, no
+# header sent), with 1% sampling, and with every request profiled in each mode.
+# Configurations alternate for --rounds rounds and the best round counts, since
+# a single run on a shared machine is noisier than the differences. Finally one
+# /decrypt-seed/batch and one /verify-2fa are profiled per mode to show what a
+# profile covers (stack mode skips requests too short to be sampled), and
+# rotation is checked.
+#
+#   python benchmarks/bench_profiling.py [--requests 3000] [--concurrency 16] [--rounds 5]
+import argparse
+import asyncio
+import os
+import pstats
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from common import bench, fmt_us
+from asgi_client import request
+
+SECRET = "bench-secret"
+SCENARIOS = (
+    ("generate_2fa", "GET", "/generate-2fa", None),
+    # A wrong code runs the whole verify path without tripping replay protection
+    ("verify_2fa", "POST", "/verify-2fa", {"code": "000000"}),
+)
+CONFIGS = (
+    # name, middleware options (None: not installed), send the X-Profile header
+    ("off", None, False),
+    ("installed, idle", {"secret": SECRET}, False),
+    ("1% sampled, stack", {"sample_rate": 0.01}, False),
+    ("every request, stack", {"secret": SECRET, "mode": "stack"}, True),
+    ("every request, cprofile", {"secret": SECRET, "mode": "cprofile"}, True),
+)
+
+
+def with_header(app, name: bytes, value: bytes):
+    async def wrapped(scope, receive, send):
+        scope = dict(scope, headers=list(scope["headers"]) + [(name, value)])
+        await app(scope, receive, send)
+    return wrapped
+
+
+async def throughput(main, requests: int, concurrency: int, rounds: int) -> dict:
+    """Best requests/sec per (configuration, scenario) over `rounds` alternating rounds."""
+    from app.profiling import ProfilingMiddleware
+    from load import drive
+
+    apps = {}
+    for name, options, header in CONFIGS:
+        app = main.app
+        if options is not None:
+            app = ProfilingMiddleware(app, tempfile.mkdtemp(prefix="pki-2fa-profiles-"), **options)
+        apps[name] = with_header(app, b"x-profile", SECRET.encode()) if header else app
+
+    best = {}
+    async with main.app.router.lifespan_context(main.app):
+        for _ in range(rounds):
+            for name, app in apps.items():
+                for scenario, method, path, body in SCENARIOS:
+                    stats = await drive(app, method, path, lambda: body, requests, concurrency)
+                    if stats["errors"]:
+                        raise RuntimeError(f"{name} {scenario}: {stats['errors']} unexpected responses")
+                    previous = best.get((name, scenario))
+                    if previous is None or stats["throughput"] > previous["throughput"]:
+                        best[name, scenario] = stats
+    return best
+
+
+def wait_for_files(directory: str, count: int, timeout: float = 10, profiled=None) -> list:
+    # Profiles are written on the storage I/O threads after the response; skipped ones never are
+    deadline = time.monotonic() + timeout
+    while True:
+        names = sorted(n for n in os.listdir(directory) if n.endswith((".collapsed", ".pstats")))
+        skipped = profiled.skipped if profiled is not None else 0
+        if len(names) + skipped >= count or time.monotonic() > deadline:
+            return names
+        time.sleep(0.01)
+
+
+def summarize(path: str, wanted) -> str:
+    """Which of the `wanted` functions appear in the profile, and its size."""
+    if path.endswith(".pstats"):
+        stats = pstats.Stats(path).stats
+        functions = {func for _, _, func in stats}
+        size = f"{len(stats)} functions"
+    else:
+        counts = Counter()
+        with open(path) as f:
+            for line in f:
+                stack, n = line.rsplit(" ", 1)
+                counts[stack] = int(n)
+        functions = {frame.split(" (")[0] for stack in counts for frame in stack.split(";")}
+        size = f"{sum(counts.values())} samples"
+    found = [w for w in wanted if w in functions]
+    return f"{size}; has {', '.join(found) or 'none of them'}"
+
+
+async def show_profiles(main, ws) -> bool:
+    """Profiles one /decrypt-seed/batch and one /verify-2fa per mode; checks headers, contents and rotation."""
+    from app.profiling import ProfilingMiddleware
+
+    ok = True
+    wanted = ("decrypt_seed_batch_endpoint", "decrypt_seed", "store_seed", "read_seed_from_disk", "check_totp_code",
+              "match")
+    # Enough RSA work (in the thread pool) to be seen by the stack sampler
+    batch = {"items": [{"encrypted_seed": ws.encrypted_seed, "subject": f"bench-{i}"} for i in range(32)]}
+    async with main.app.router.lifespan_context(main.app):
+        for mode in ("stack", "cprofile"):
+            directory = tempfile.mkdtemp(prefix=f"pki-2fa-profiles-{mode}-")
+            profiled = ProfilingMiddleware(main.app, directory, secret=SECRET, mode=mode, max_files=3, interval=0.0005)
+            headers = {"X-Profile": SECRET}
+            _, _, decrypt_headers = await request(
+                profiled, "POST", "/decrypt-seed/batch", batch, headers=headers,
+            )
+            await request(profiled, "POST", "/verify-2fa", {"code": "000000"}, headers=headers)
+            names = wait_for_files(directory, 2, profiled=profiled)
+            ids = [v.decode() for k, v in decrypt_headers if k == b"x-profile-id"]
+            ok &= ids == names[:1] and len(names) + profiled.skipped == 2
+            for name in names:
+                print(f"  {mode:8s} {name[:70]:70s} {summarize(os.path.join(directory, name), wanted)}")
+            if profiled.skipped:
+                print(f"  {mode:8s} {profiled.skipped} request(s) finished before the first sample, not written")
+            if mode == "stack":
+                continue  # Rotation is checked in cprofile mode, where every request leaves a file
+
+            # Not selected: wrong secret, no header
+            await request(profiled, "GET", "/generate-2fa", headers={"X-Profile": "wrong"})
+            await request(profiled, "GET", "/generate-2fa")
+            for _ in range(4):
+                await request(profiled, "GET", "/generate-2fa", headers=headers)
+            names = wait_for_files(directory, 6, timeout=1)
+            ok &= profiled.profiled == 6 and len(names) == 3
+            print(f"  {mode:8s} {profiled.profiled} profiled in total, {len(names)} kept (max_files=3)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of the profiling middleware, off and on.")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--key-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    from fixtures import make_workspace, configure_app_env
+
+    ws = make_workspace(args.key_size)
+    # Thread-pool decrypts, so the RSA work shows up in stack samples too
+    configure_app_env(ws, REPLAY_PROTECTION="0", DECRYPT_POOL_KIND="thread")
+    os.environ.pop("PROFILE_DIR", None)
+    seed_path = os.environ["SEED_FILE_PATH"]
+    os.makedirs(os.path.dirname(seed_path), exist_ok=True)
+    with open(seed_path, "w") as f:
+        f.write(ws.hex_seed)
+
+    import app.main as app_main
+    from app.profiling import ProfilingMiddleware
+
+    installed = [m.cls.__name__ for m in app_main.app.user_middleware]
+    print(f"PROFILE_DIR unset, middleware stack: {', '.join(installed)}")
+    if ProfilingMiddleware.__name__ in installed:
+        print("FAILED: the profiling middleware is installed while disabled")
+        sys.exit(1)
+
+    idle = ProfilingMiddleware(None, tempfile.mkdtemp(), secret=SECRET)
+    scope = {"headers": [(b"host", b"bench"), (b"content-type", b"application/json"), (b"content-length", b"17")]}
+    print(f"header check per unprofiled request: {fmt_us(bench(lambda: idle._requested(scope)))}")
+
+    best = asyncio.run(throughput(app_main, args.requests, args.concurrency, args.rounds))
+    for scenario, *_ in SCENARIOS:
+        base = best["off", scenario]["throughput"]
+        for name, *_ in CONFIGS:
+            stats = best[name, scenario]
+            print(f"{scenario:14s} {name:24s} {stats['throughput']:9.0f} req/s   "
+                  f"p50 {stats['p50'] * 1e6:8.1f} us   ({stats['throughput'] / base - 1:+.1%})")
+
+    print("profiles:")
+    if not asyncio.run(show_profiles(app_main, ws)):
+        print("FAILED: missing X-Profile-Id, or rotation kept the wrong number of files")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
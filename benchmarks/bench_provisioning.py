@@ -0,0 +1,121 @@
+# benchmarks/bench_provisioning.py
+# Fleet re-seeding end to end, offline: scripts/instructor_stub.py (with network-ish
+# latency and injected 503s) plus the real app under uvicorn. Compares the old
+# one-off requests.post per call, serially, with app/provisioning_client.py
+# (pooled keep-alive session, bounded concurrency, jittered retries), then checks
+# that a re-run with the same progress log does nothing.
+#
+#   python benchmarks/bench_provisioning.py [--identities 40] [--concurrency 8]
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from common import ROOT
+from fixtures import make_workspace, configure_app_env
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=dict(os.environ),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("app did not become ready")
+
+
+def one_off(entries, instructor_url, api_url, public_key_pem, retries: int) -> int:
+    """The old scripts' way: a bare requests.post per call, one identity after another."""
+    ok = 0
+    for entry in entries:
+        for _ in range(retries + 1):
+            r = requests.post(instructor_url, json={
+                "student_id": entry["student_id"], "github_repo_url": "x", "public_key": public_key_pem,
+            }, timeout=30)
+            if r.status_code == 200:
+                break
+        r = requests.post(api_url + "/decrypt-seed", json={
+            "encrypted_seed": r.json()["encrypted_seed"], "subject": entry["subject"],
+        }, timeout=30)
+        ok += r.status_code == 200
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet provisioning: one-off requests vs the pooled client.")
+    parser.add_argument("--identities", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Instructor stub latency (s).")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="Share of instructor calls answered 503.")
+    args = parser.parse_args()
+
+    from app.provisioning_client import provision_fleet, read_public_key
+    sys.path.insert(0, os.path.join(ROOT, "scripts"))
+    from instructor_stub import InstructorStub
+
+    ws = make_workspace(2048)
+    configure_app_env(ws, SEED_SHARED_MEMORY="0", DECRYPT_POOL_KIND="thread")
+    os.environ["SEED_FILE_PATH"] = os.path.join(ws.directory, "data", "seed.txt")
+    os.makedirs(os.path.dirname(os.environ["SEED_FILE_PATH"]), exist_ok=True)
+
+    stub = InstructorStub(("127.0.0.1", 0), args.fail_rate, args.latency)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    instructor_url = f"http://127.0.0.1:{stub.server_port}"
+    port = free_port()
+    api_url = f"http://127.0.0.1:{port}"
+    app = start_app(port)
+    try:
+        entries = [{"student_id": f"student-{i:04d}", "subject": f"tenant-{i:04d}"} for i in range(args.identities)]
+
+        before = dict(stub.counts)
+        start = time.perf_counter()
+        ok = one_off(entries, instructor_url, api_url, read_public_key(ws.public_key_path), retries=4)
+        serial = time.perf_counter() - start
+        connections = stub.counts["connections"] - before["connections"]
+        print(f"one-off, serial      {ok}/{len(entries)} ok in {serial:6.2f}s   "
+              f"{len(entries) / serial:6.1f} identities/s   {connections} instructor connections")
+
+        progress = os.path.join(tempfile.mkdtemp(prefix="pki-2fa-provision-"), "progress.jsonl")
+        options = dict(instructor_url=instructor_url, api_url=api_url, public_key_path=ws.public_key_path,
+                       backoff=0.05)
+        before = dict(stub.counts)
+        summary = provision_fleet(entries, progress, args.concurrency, **options)
+        connections = stub.counts["connections"] - before["connections"]
+        print(f"pooled, {args.concurrency:2d} at a time {summary['ok']}/{len(entries)} ok in {summary['seconds']:6.2f}s   "
+              f"{len(entries) / summary['seconds']:6.1f} identities/s   {connections} instructor connections "
+              f"({stub.counts['injected_failures']} injected 503s in total)")
+
+        rerun = provision_fleet(entries, progress, args.concurrency, **options)
+        print(f"re-run with the same progress log: {rerun['skipped']} skipped, {rerun['ok']} provisioned")
+        if summary["failed"] or summary["ok"] != len(entries) or rerun["ok"]:
+            print(f"FAILED: {summary['errors']}")
+            sys.exit(1)
+    finally:
+        app.terminate()
+        app.wait()
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
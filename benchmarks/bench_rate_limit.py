@@ -0,0 +1,47 @@
+# benchmarks/bench_rate_limit.py
+# Per-request overhead of the verification throttle (TokenBucketLimiter.allow).
+# A request without a subject is charged to the client bucket only; one naming a
+# subject is charged to both, so that row is the full per-request cost.
+import itertools
+
+from common import bench, fmt_us
+
+from app.rate_limit import TokenBucketLimiter
+
+
+def main():
+    noop = lambda key: True  # noqa: E731
+    overhead = bench(lambda: noop("10.0.0.1"), number=200_000)
+    print(f"call overhead (no limiter)     {fmt_us(overhead)}   (included in every row below)")
+
+    hot = TokenBucketLimiter(rate=1e9, burst=1e9)
+    hot_allow = hot.allow
+    print(f"allow() one hot key            {fmt_us(bench(lambda: hot_allow('10.0.0.1'), number=200_000))}")
+
+    subjects = TokenBucketLimiter(rate=1e9, burst=1e9)
+    subject_allow = subjects.allow
+    both = bench(lambda: hot_allow("10.0.0.1") and subject_allow("tenant-1"), number=200_000)
+    print(f"client + subject (per request) {fmt_us(both)}")
+
+    # Many distinct active keys in a table sized for twice as many
+    table = TokenBucketLimiter(rate=50, burst=100, max_keys=100_000)
+    keys = itertools.cycle([f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(50_000)])
+    table_allow = table.allow
+    print(f"allow() 50k active keys        {fmt_us(bench(lambda: table_allow(next(keys)), number=200_000))}")
+
+    # Churn: every call is a new key, so generations keep being dropped
+    churn = TokenBucketLimiter(rate=50, burst=100, max_keys=10_000)
+    churn_keys = itertools.count()
+    churn_allow = churn.allow
+    print(f"allow() new key every call     {fmt_us(bench(lambda: churn_allow(next(churn_keys)), number=200_000))}"
+          f"   ({churn.stats()['keys']} keys kept, max 10000)")
+
+    # Rejections are counted, not just dropped
+    limited = TokenBucketLimiter(rate=0.001, burst=1)
+    for _ in range(10):
+        limited.allow("attacker")
+    print(f"rejections counted: {limited.stats()['rejected']} of 10 (burst 1)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_startup.py
+# Cold start: import time of app.main, startup (lifespan) time, and latency of the
+# first /verify-2fa and /decrypt-seed, per PRELOAD_MODE. Every sample is a fresh
+# interpreter, so nothing is cached between runs.
+#
+#   python benchmarks/bench_startup.py [--runs 5] [--key-size 4096]
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import ROOT
+
+MODES = ("eager", "lazy")
+
+
+def child():
+    """Runs in the fresh interpreter: prints one JSON sample."""
+    start = time.perf_counter()
+    import app.main as main
+    imported = time.perf_counter()
+    from asgi_client import request
+
+    async def go():
+        async with main.app.router.lifespan_context(main.app):
+            started = time.perf_counter()
+            await request(main.app, "POST", "/verify-2fa", {"code": "000000"})
+            verified = time.perf_counter()
+            status, _, _ = await request(main.app, "POST", "/decrypt-seed", {
+                "encrypted_seed": os.environ["BENCH_ENCRYPTED_SEED"], "subject": "bench",
+            })
+            decrypted = time.perf_counter()
+            assert status == 200, status
+            while (await request(main.app, "GET", "/ready"))[0] != 200:
+                await asyncio.sleep(0.005)
+            ready = time.perf_counter()
+        return {
+            "import": imported - start,
+            "startup": started - imported,
+            "first_verify": verified - started,
+            "first_decrypt": decrypted - verified,
+            "time_to_first_response": verified - start,
+            "time_to_ready": ready - start,
+        }
+
+    print(json.dumps(asyncio.run(go())))
+
+
+def sample(ws, mode: str) -> dict:
+    env = dict(os.environ, PRELOAD_MODE=mode, BENCH_ENCRYPTED_SEED=ws.encrypted_seed)
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for app.main.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    from fixtures import make_workspace, configure_app_env
+
+    ws = make_workspace(args.key_size)
+    configure_app_env(ws)
+    seed_path = os.environ["SEED_FILE_PATH"]
+    os.makedirs(os.path.dirname(seed_path), exist_ok=True)
+    with open(seed_path, "w") as f:
+        f.write(ws.hex_seed)
+
+    interpreter = statistics.median(
+        _timed(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True)) for _ in range(args.runs)
+    )
+    print(f"bare interpreter start: {interpreter * 1000:.1f} ms (not included below)")
+    for mode in MODES:
+        samples = [sample(ws, mode) for _ in range(args.runs)]
+        print(f"PRELOAD_MODE={mode}")
+        for metric in samples[0]:
+            print(f"  {metric:24s} {statistics.median(s[metric] for s in samples) * 1000:9.1f} ms")
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_totp.py
+# Differential check + microbenchmark: native TOTP engine vs the pyotp path.
+import os
+import random
+
+from common import bench, fmt_us
+
+from app.totp_utils import (
+    hex_to_base32,
+    get_totp_object,
+    generate_totp_code,
+    verify_totp_code,
+    hotp,
+    CodeWindowCache,
+)
+
+PERIOD_START = 1_000_000_000
+
+
+def pyotp_generate(hex_seed: str) -> str:
+    return get_totp_object(hex_to_base32(hex_seed)).now()
+
+
+def pyotp_verify(hex_seed: str, code: str) -> bool:
+    return get_totp_object(hex_to_base32(hex_seed)).verify(code, valid_window=1)
+
+
+def differential_check(seeds: int = 200, counters: int = 200):
+    """CRITICAL: native output must be bit-identical to pyotp for every seed/counter."""
+    rng = random.Random(1234)
+    for _ in range(seeds):
+        hex_seed = os.urandom(32).hex()
+        totp = get_totp_object(hex_to_base32(hex_seed))
+        seed_bytes = bytes.fromhex(hex_seed)
+        for _ in range(counters):
+            counter = rng.randrange(0, 2 ** 40)
+            assert hotp(seed_bytes, counter) == totp.generate_otp(counter), (hex_seed, counter)
+        for_time = rng.randrange(PERIOD_START, PERIOD_START + 10 ** 8)
+        code = totp.at(for_time)
+        assert generate_totp_code(hex_seed, for_time)[0] == code
+        for probe in (code, totp.at(for_time, -1), totp.at(for_time, 1), totp.at(for_time, 2), "000000"):
+            assert verify_totp_code(seed_bytes, probe, 1, for_time) == totp.verify(probe, for_time, 1)
+    print(f"Differential check OK ({seeds} seeds x {counters} counters)")
+
+
+def main():
+    differential_check()
+
+    hex_seed = os.urandom(32).hex()
+    seed_bytes = bytes.fromhex(hex_seed)
+    code = pyotp_generate(hex_seed)
+    window_cache = CodeWindowCache(radius=1)
+
+    rows = [
+        ("generate (pyotp)", lambda: pyotp_generate(hex_seed)),
+        ("generate (native)", lambda: generate_totp_code(seed_bytes)),
+        ("verify   (pyotp)", lambda: pyotp_verify(hex_seed, code)),
+        ("verify   (native)", lambda: verify_totp_code(seed_bytes, code, 1)),
+        ("verify   (cached)", lambda: window_cache.verify(1, seed_bytes, code, 1)),
+    ]
+    results = {name: bench(fn) for name, fn in rows}
+    for name, seconds in results.items():
+        print(f"{name:20s} {fmt_us(seconds)}")
+    print(f"generate speedup: {results['generate (pyotp)'] / results['generate (native)']:.1f}x")
+    print(f"verify   speedup: {results['verify   (pyotp)'] / results['verify   (native)']:.1f}x")
+    print(f"cached   speedup: {results['verify   (pyotp)'] / results['verify   (cached)']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/check_shared_replay.py
+# Multi-process check for the shared replay cache (app/replay_cache.py): worker
+# processes race to record the same (subject, generation, step) codes, and each
+# code must be accepted by exactly one of them. Also checks that a rotated
+# seed's code for the same step is accepted, that a region is reused once its
+# step has expired, and times record() against the per-process ReplayCache.
+# Exits 1 on failure.
+#
+#   python benchmarks/check_shared_replay.py [--workers 4] [--subjects 5000]
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+from collections import Counter
+
+from common import ROOT, bench, fmt_us  # noqa: F401  (sets up sys.path)
+
+STEP = 58_000_000
+
+
+def racer(path, subjects, start, result):
+    from app.replay_cache import ACCEPTED, SharedReplayCache
+
+    # Room for the rotation checks in main() too
+    cache = SharedReplayCache(path, window_steps=2, max_entries_per_step=len(subjects) + 1)
+    start.wait()
+    accepted = [s for s in subjects if cache.record(s, 1, STEP, STEP) == ACCEPTED]
+    result.put((accepted, cache.replays))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared replay cache consistency across processes.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--subjects", type=int, default=5000)
+    args = parser.parse_args()
+
+    from app.replay_cache import ACCEPTED, REPLAYED, ReplayCache, SharedReplayCache
+
+    path = os.path.join(tempfile.mkdtemp(prefix="pki-2fa-replay-"), "segment")
+    subjects = [f"subject-{i}" for i in range(args.subjects)]
+    ctx = multiprocessing.get_context("spawn")
+    start, result = ctx.Event(), ctx.Queue()
+    SharedReplayCache(path, window_steps=2, max_entries_per_step=len(subjects) + 1).close()
+    processes = [ctx.Process(target=racer, args=(path, subjects, start, result)) for _ in range(args.workers)]
+    for p in processes:
+        p.start()
+    start.set()
+    outcomes = [result.get() for _ in processes]
+    for p in processes:
+        p.join()
+    accepted = Counter(s for subjects_accepted, _ in outcomes for s in subjects_accepted)
+    replays = sum(r for _, r in outcomes)
+    twice = [s for s, n in accepted.items() if n > 1]
+    never = len(subjects) - len(accepted)
+    print(f"{args.workers} processes x {len(subjects)} codes: {len(accepted)} accepted once, "
+          f"{len(twice)} accepted twice, {never} never, {replays} replays refused")
+    ok = not twice and not never and replays == (args.workers - 1) * len(subjects)
+
+    cache = SharedReplayCache(path, window_steps=2, max_entries_per_step=len(subjects) + 1)
+    rotated = cache.record(subjects[0], 2, STEP, STEP)
+    again = cache.record(subjects[0], 1, STEP, STEP)
+    # Same region, 6 steps later: the old step is long expired and its codes are forgotten
+    reused = cache.record(subjects[0], 1, STEP + cache.regions, STEP + cache.regions)
+    stale = cache.record(subjects[1], 1, STEP, STEP + cache.regions)
+    print(f"rotated seed: {rotated}; old seed again: {again}; region reused: {reused}; "
+          f"expired step after reuse: {stale}; {cache.stats()}")
+    ok &= (rotated, again, reused) == (ACCEPTED, REPLAYED, ACCEPTED) and stale != ACCEPTED
+
+    local = ReplayCache(window_steps=2)
+    shared = SharedReplayCache(os.path.join(os.path.dirname(path), "timing"), window_steps=2)
+    steps = iter(range(10**9))
+    print(f"record() per process: {fmt_us(bench(lambda: local.record('s', 1, STEP, STEP)))}   "
+          f"shared: {fmt_us(bench(lambda: shared.record('s', 1, STEP, STEP)))}   "
+          f"shared, new code: {fmt_us(bench(lambda: shared.record(f's{next(steps)}', 1, STEP + 1, STEP)))}")
+    if not ok:
+        print("FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/check_shared_seed.py
+# Multi-process consistency check for the shared seed segment (app/shared_seed.py):
+# reader processes spin on SeedCache.get() while a writer rotates the seed through
+# FileSeedStore.put(). Every read must be an untorn seed, no older than the last
+# rotation completed before it started, and never go backwards. A torn body with an
+# even `seq` (what a weakly ordered CPU could expose) must be rejected by the
+# checksum. Exits 1 on failure.
+#
+#   python benchmarks/check_shared_seed.py [--readers 4] [--rotations 500]
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from common import ROOT  # noqa: F401  (sets up sys.path)
+
+
+def make_seed(rotation: int) -> str:
+    """8-byte rotation number + 24 bytes derived from it, so a torn read is detectable."""
+    head = rotation.to_bytes(8, "big")
+    return (head + hashlib.sha256(head).digest()[:24]).hex()
+
+
+def decode_seed(seed: bytes) -> int:
+    head = seed[:8]
+    if hashlib.sha256(head).digest()[:24] != seed[8:]:
+        raise AssertionError(f"torn seed {seed.hex()}")
+    return int.from_bytes(head, "big")
+
+
+def open_cache(seed_path: str, segment_path: str):
+    from app.seed_cache import SeedCache
+    from app.shared_seed import SharedSeed
+
+    return SeedCache(seed_path, shared=SharedSeed(segment_path))
+
+
+def reader(seed_path, segment_path, published, done, result):
+    cache = open_cache(seed_path, segment_path)
+    reads = errors = 0
+    last = -1
+    while not done.is_set():
+        floor = published.value
+        try:
+            _, seed, generation = cache.get()
+            rotation = decode_seed(seed)
+            if rotation < floor:
+                raise AssertionError(f"stale read: rotation {rotation} after {floor} was published")
+            if rotation < last:
+                raise AssertionError(f"went backwards: {last} -> {rotation}")
+            last = rotation
+        except AssertionError as e:
+            errors += 1
+            if errors <= 5:
+                print(f"[reader {os.getpid()}] {e}", file=sys.stderr)
+        reads += 1
+    result.put((reads, errors, cache.disk_reads, cache.shared.retries))
+
+
+def writer(seed_path, segment_path, published, rotations):
+    from app.seed_store import FileSeedStore
+
+    store = FileSeedStore(open_cache(seed_path, segment_path))
+    for rotation in range(1, rotations + 1):
+        store.put("default", make_seed(rotation))
+        published.value = rotation
+
+
+def check_torn_body(directory: str) -> bool:
+    """Flips a seed byte behind the seqlock's back: read() must not return it."""
+    from app.shared_seed import SharedSeed, _BODY_OFFSET, _BODY
+
+    segment = SharedSeed(os.path.join(directory, "torn"))
+    try:
+        segment.publish(bytes(32), (1, 2, 3))
+        segment._map[_BODY_OFFSET + _BODY.size - 1] ^= 0xFF
+        return segment.read() is None
+    finally:
+        segment.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared seed segment consistency check.")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--rotations", type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pki-2fa-shm-")
+    seed_path = os.path.join(directory, "seed.txt")
+    segment_path = os.path.join(directory, "segment")
+    with open(seed_path, "w") as f:
+        f.write(make_seed(0))
+
+    ctx = multiprocessing.get_context("spawn")
+    published = ctx.Value("q", 0)
+    done = ctx.Event()
+    result = ctx.Queue()
+    readers = [
+        ctx.Process(target=reader, args=(seed_path, segment_path, published, done, result))
+        for _ in range(args.readers)
+    ]
+    for process in readers:
+        process.start()
+    time.sleep(1.0)  # let the readers start and load the initial seed
+
+    start = time.perf_counter()
+    writer_process = ctx.Process(target=writer, args=(seed_path, segment_path, published, args.rotations))
+    writer_process.start()
+    writer_process.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+
+    totals = [result.get() for _ in readers]
+    for process in readers:
+        process.join()
+
+    reads = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    print(f"{args.rotations} rotations in {elapsed:.2f}s, {args.readers} readers, {reads} reads")
+    print(f"disk reads by readers: {sum(t[2] for t in totals)}, seqlock retries: {sum(t[3] for t in totals)}")
+    torn_rejected = check_torn_body(directory)
+    print(f"torn body rejected by the checksum: {torn_rejected}")
+    ok = errors == 0 and writer_process.exitcode == 0 and torn_rejected
+    print("OK" if ok else f"FAILED: {errors} inconsistent reads")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
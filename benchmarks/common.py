@@ -0,0 +1,29 @@
+# benchmarks/common.py
+import os
+import sys
+import time
+
+# Make the `app` package importable when running `python benchmarks/<script>.py`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def bench(fn, number: int = 10000, repeat: int = 5) -> float:
+    """Returns the best observed per-call time of `fn()` in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def fmt_us(seconds: float) -> str:
+    return f"{seconds * 1e6:9.2f} us"
+
+
+def percentile(samples, pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
@@ -0,0 +1,72 @@
+# benchmarks/fixtures.py
+# Throwaway keys, seeds and paths so benchmarks run offline and never touch
+# the real keys, /data or the instructor API.
+import base64
+import os
+import tempfile
+from collections import namedtuple
+
+from common import ROOT  # noqa: F401  (sets up sys.path)
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+Workspace = namedtuple("Workspace", [
+    "directory",
+    "private_key_path",        # "student" key used by /decrypt-seed
+    "public_key_path",
+    "instructor_public_path",  # encrypts commit signatures
+    "hex_seed",
+    "encrypted_seed",          # hex_seed, RSA-OAEP encrypted to the student key
+])
+
+
+def _write_key_pair(directory: str, name: str, key_size: int):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    private_path = os.path.join(directory, f"{name}_private.pem")
+    public_path = os.path.join(directory, f"{name}_public.pem")
+    with open(private_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    with open(public_path, "wb") as f:
+        f.write(key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ))
+    return private_path, public_path
+
+
+def make_workspace(key_size: int = 4096) -> Workspace:
+    """Generates fresh key pairs and a random seed in a temporary directory."""
+    from app.crypto_utils import load_public_key, encrypt_with_public_key
+
+    directory = tempfile.mkdtemp(prefix="pki-2fa-bench-")
+    private_path, public_path = _write_key_pair(directory, "student", key_size)
+    # The instructor key must be larger than the signature it wraps (8192-bit in production)
+    _, instructor_public_path = _write_key_pair(directory, "instructor", key_size * 2)
+    hex_seed = os.urandom(32).hex()
+    encrypted = encrypt_with_public_key(hex_seed.encode(), load_public_key(public_path))
+    return Workspace(
+        directory,
+        private_path,
+        public_path,
+        instructor_public_path,
+        hex_seed,
+        base64.b64encode(encrypted).decode("ascii"),
+    )
+
+
+def configure_app_env(ws: Workspace, **overrides):
+    """Points app.main at the workspace. Must run before app.main is imported."""
+    env = {
+        "PRIVATE_KEY_PATH": ws.private_key_path,
+        "SEED_FILE_PATH": os.path.join(ws.directory, "data", "seed.txt"),
+        "SEED_DB_PATH": os.path.join(ws.directory, "data", "seeds.db"),
+        # Benchmarks hammer one client/subject: throttling would measure 429s instead
+        "VERIFY_RATE_LIMIT": "0",
+    }
+    env.update({k: str(v) for k, v in overrides.items()})
+    os.environ.update(env)
@@ -0,0 +1,61 @@
+# benchmarks/load.py
+# In-process HTTP load harness: concurrent clients drive the FastAPI app over
+# ASGI and we report throughput and p50/p95/p99 latency per endpoint.
+import asyncio
+import time
+
+from asgi_client import request
+from common import percentile
+
+
+
+async def drive(app, method, path, body_factory, total: int, concurrency: int, expected_status: int = 200):
+    """Sends `total` requests from `concurrency` concurrent clients; returns latency stats."""
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status, _, _ = await request(app, method, path, body_factory())
+            latencies.append(time.perf_counter() - start)
+            if status != expected_status:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+async def run_load(main, ws, concurrency: int = 16, requests: int = 2000, quick: bool = False) -> dict:
+    """Loads /decrypt-seed, /generate-2fa and /verify-2fa; returns flat metric dict."""
+    if quick:
+        requests = max(100, requests // 10)
+    scenarios = [
+        # RSA decrypts are ~1000x slower than TOTP, so they get a smaller share
+        ("decrypt_seed", "POST", "/decrypt-seed",
+         lambda: {"encrypted_seed": ws.encrypted_seed}, max(20, requests // 50)),
+        ("generate_2fa", "GET", "/generate-2fa", lambda: None, requests),
+        # A wrong code exercises the full verify path without tripping replay protection
+        ("verify_2fa", "POST", "/verify-2fa", lambda: {"code": "000000"}, requests),
+    ]
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        for name, method, path, body_factory, total in scenarios:
+            stats = await drive(main.app, method, path, body_factory, total, concurrency)
+            if stats["errors"]:
+                raise RuntimeError(f"{name}: {stats['errors']} unexpected responses")
+            results[f"load.{name}.throughput"] = {"value": stats["throughput"], "unit": "req/s", "better": "higher"}
+            for pct in ("p50", "p95", "p99"):
+                results[f"load.{name}.{pct}"] = {"value": stats[pct], "unit": "s", "better": "lower"}
+    return results
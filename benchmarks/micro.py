@@ -0,0 +1,38 @@
+# benchmarks/micro.py
+# Microbenchmarks for the TOTP and RSA primitives used by the service.
+from common import bench
+
+from app.crypto_utils import (
+    load_private_key,
+    load_public_key,
+    decrypt_seed,
+    sign_message_p1,
+    encrypt_with_public_key,
+)
+from app.totp_utils import hex_to_base32, generate_totp_code, verify_totp_code
+
+COMMIT_HASH = "0123456789abcdef0123456789abcdef01234567"
+
+
+def run_micro(ws, quick: bool = False) -> dict:
+    """Returns {name: {"value": seconds per call, "unit": "s", "better": "lower"}}."""
+    scale = 0.1 if quick else 1.0
+    private_key = load_private_key(ws.private_key_path)
+    instructor_public = load_public_key(ws.instructor_public_path)
+    signature = sign_message_p1(COMMIT_HASH, private_key)
+    seed_bytes = bytes.fromhex(ws.hex_seed)
+    code, _ = generate_totp_code(seed_bytes)
+
+    cases = [
+        ("hex_to_base32", lambda: hex_to_base32(ws.hex_seed), 50_000),
+        ("generate_totp_code", lambda: generate_totp_code(seed_bytes), 50_000),
+        ("verify_totp_code", lambda: verify_totp_code(seed_bytes, code, 1), 50_000),
+        ("decrypt_seed", lambda: decrypt_seed(ws.encrypted_seed, private_key), 40),
+        ("sign_message_p1", lambda: sign_message_p1(COMMIT_HASH, private_key), 40),
+        ("encrypt_with_public_key", lambda: encrypt_with_public_key(signature, instructor_public), 400),
+    ]
+    results = {}
+    for name, fn, number in cases:
+        seconds = bench(fn, number=max(1, int(number * scale)), repeat=3)
+        results[f"micro.{name}"] = {"value": seconds, "unit": "s", "better": "lower"}
+    return results
@@ -0,0 +1,90 @@
+# benchmarks/run.py
+# Benchmark suite entry point: microbenchmarks + in-process load test, with
+# JSON baselines and a regression check.
+#
+#   python benchmarks/run.py --save benchmarks/baseline.json
+#   python benchmarks/run.py --compare benchmarks/baseline.json --threshold 0.15
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+
+from common import ROOT  # noqa: F401  (sets up sys.path)
+from fixtures import make_workspace, configure_app_env
+
+
+def format_value(metric: dict) -> str:
+    if metric["unit"] == "s":
+        return f"{metric['value'] * 1e6:12.2f} us"
+    return f"{metric['value']:12.1f} {metric['unit']}"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Returns (name, baseline, current, change) for metrics that got worse than `threshold`."""
+    regressions = []
+    for name, metric in current.items():
+        base = baseline.get(name)
+        if base is None or base["value"] == 0:
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        worse = change > threshold if metric["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append((name, base, metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PKI-2FA benchmark suite.")
+    parser.add_argument("--only", choices=["micro", "load"], help="Run just one part of the suite.")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations (smoke run).")
+    parser.add_argument("--key-size", type=int, default=4096, help="RSA key size for the throwaway keys.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients in the load test.")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per TOTP endpoint in the load test.")
+    parser.add_argument("--save", metavar="FILE", help="Write results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown (default 0.10).")
+    args = parser.parse_args()
+
+    print(f"Generating throwaway {args.key_size}-bit keys...")
+    ws = make_workspace(args.key_size)
+    configure_app_env(ws)
+
+    results = {}
+    if args.only in (None, "micro"):
+        from micro import run_micro
+        results.update(run_micro(ws, quick=args.quick))
+    if args.only in (None, "load"):
+        import app.main as app_main
+        from load import run_load
+        results.update(asyncio.run(run_load(app_main, ws, args.concurrency, args.requests, args.quick)))
+
+    for name, metric in results.items():
+        print(f"{name:36s} {format_value(metric)}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "key_size": args.key_size,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS (threshold {args.threshold:.0%}):")
+            for name, base, metric, change in regressions:
+                print(f"  {name:34s} {format_value(base)} -> {format_value(metric)} ({change:+.1%})")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
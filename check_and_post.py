@@ -1,11 +1,12 @@
 # check_and_post.py
-import os, sys, requests
+import os, sys
 from cryptography.hazmat.primitives import serialization
+from app.provisioning_client import INSTRUCTOR_URL, REPO_URL, ProvisioningError, make_session, post_json
 
 PUB_FN = "student_public.pem"
-URL = "https://eajeyq4r3zljoq4rpovy2nthda0vtjqf.lambda-url.ap-south-1.on.aws"
+URL = os.environ.get("INSTRUCTOR_URL", INSTRUCTOR_URL)
 STUDENT_ID = "23a91a61f1"
-REPO = "https://github.com/sirinethikonda/sirinethikonda_ganisetti-pki-2fa-project"
+REPO = REPO_URL
 
 # 1) verify file exists
 if not os.path.exists(PUB_FN):
@@ -37,8 +38,9 @@ payload = {
 
 print("\nPosting payload to instructor API (public_key sent as multi-line PEM string)...")
 try:
-    r = requests.post(URL, json=payload, timeout=30)
-except Exception as e:
+    # Retries throttling / transient 5xx with jittered backoff
+    r = post_json(make_session(), URL, payload, timeout=30)
+except ProvisioningError as e:
     print("HTTP request failed:", e)
     sys.exit(1)
 
@@ -1,8 +1,19 @@
 #!/bin/sh
 set -e
 
-echo "Starting cron service..."
-/usr/sbin/cron -f & 
+if [ "$CODE_LOGGER" = "1" ]; then
+    # The FastAPI process logs the 2FA code itself (app/code_logger.py)
+    echo "Cron disabled: 2FA codes are logged in-process."
+else
+    echo "Starting cron service..."
+    /usr/sbin/cron -f &
+fi
+
+if [ -n "$METRICS_DIR" ]; then
+    # Per-worker metric snapshots from a previous run would be summed into /metrics
+    mkdir -p "$METRICS_DIR"
+    rm -f "$METRICS_DIR"/metrics-*.json
+fi
 
 echo "Starting FastAPI server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8080
\ No newline at end of file
+exec uvicorn app.main:app --host 0.0.0.0 --port 8080 --workers "${UVICORN_WORKERS:-1}"
\ No newline at end of file
@@ -1,9 +1,9 @@
-import json, requests
+import json
+from app.provisioning_client import INSTRUCTOR_URL, make_session, post_json
 
 with open("payload.json","r",encoding="ascii") as f:
     payload = json.load(f)
 
-url = "https://eajeyq4r3zljoq4rpovy2nthda0vtjqf.lambda-url.ap-south-1.on.aws"
-resp = requests.post(url, json=payload, timeout=15)
+resp = post_json(make_session(), INSTRUCTOR_URL, payload, timeout=15)
 print(resp.status_code)
 print(resp.text)
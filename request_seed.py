@@ -1,6 +1,4 @@
-import requests
-
-url = "https://eajeyq4r3zljoq4rpovy2nthda0vtjqf.lambda-url.ap-south-1.on.aws"
+from app.provisioning_client import INSTRUCTOR_URL, make_session, post_json
 
 payload = {
     "student_id": "YOUR_ID",
@@ -10,6 +8,7 @@ YOUR PUBLIC KEY HERE
 -----END PUBLIC KEY-----"""
 }
 
-response = requests.post(url, json=payload)
+# For many identities at once, use scripts/provision_fleet.py
+response = post_json(make_session(), INSTRUCTOR_URL, payload)
 
 print(response.json())
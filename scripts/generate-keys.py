@@ -1,28 +1,108 @@
 # scripts/generate_keys.py
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+# Default: one 4096-bit pair at keys/student_private.pem + keys/student_public.pem.
+# X25519 pair for "x25519:" seed envelopes (keys/student_x25519_private.pem + public):
+#   python scripts/generate-keys.py --type x25519
+# Batch provisioning (one pair per tenant, generated across all cores):
+#   python scripts/generate-keys.py --tenants alice bob carol --out keys/tenants
+#   python scripts/generate-keys.py --count 32 --out keys/tenants --key-size 3072
+# Tenants one at a time from a pool of pre-generated pairs topped up in the background
+# (what a long-running provisioner does); --pool-interval spaces them out like arrivals:
+#   python scripts/generate-keys.py --count 20 --pool 4 --pool-interval 0.5 --key-size 2048
+import argparse
+import os
+import statistics
+import sys
+import time
 from pathlib import Path
 
 p = Path(__file__).resolve().parents[1]  # project root
-keys = p / "keys"
-keys.mkdir(exist_ok=True)
-
-private_key = rsa.generate_private_key(public_exponent=65537, key_size=4096)
-priv_pem = private_key.private_bytes(
-    encoding=serialization.Encoding.PEM,
-    format=serialization.PrivateFormat.PKCS8,
-    encryption_algorithm=serialization.NoEncryption()
+sys.path.insert(0, str(p))
+from app.key_provisioning import (
+    KEY_TYPES,
+    KeyPool,
+    generate_key_pair_pem,
+    generate_x25519_key_pair_pem,
+    provision_tenants,
 )
+from app.storage import atomic_write_bytes
 
-pub_pem = private_key.public_key().public_bytes(
-    encoding=serialization.Encoding.PEM,
-    format=serialization.PublicFormat.SubjectPublicKeyInfo
-)
+parser = argparse.ArgumentParser(description="Generate RSA or X25519 key pairs.")
+parser.add_argument("--type", choices=KEY_TYPES, default="rsa", help="rsa (default) or x25519 (seed envelopes).")
+parser.add_argument("--tenants", nargs="+", help="Provision <out>/<tenant>/private.pem + public.pem for each tenant.")
+parser.add_argument("--count", type=int, help="Provision this many tenants named tenant-0001, tenant-0002, ...")
+parser.add_argument("--out", default=str(p / "keys" / "tenants"), help="Root of the per-tenant layout.")
+parser.add_argument("--key-size", type=int, default=4096)
+parser.add_argument("--exponent", type=int, default=65537)
+parser.add_argument("--workers", type=int, default=None, help="Generator processes (default: CPU count).")
+parser.add_argument("--force", action="store_true", help="Replace existing tenant keys.")
+parser.add_argument("--pool", type=int, default=0, help="Provision tenants one by one from a pool of N pre-generated pairs.")
+parser.add_argument("--pool-interval", type=float, default=0.0, help="Seconds between tenants with --pool.")
+
+
+def provision_from_pool(args, tenants) -> int:
+    pool = KeyPool(args.pool, args.key_size, args.exponent, workers=args.workers or os.cpu_count() or 1).start()
+    latencies = []
+    try:
+        start = time.perf_counter()
+        if not pool.fill():
+            print("ERROR: key pool could not be filled:", pool.stats())
+            return 1
+        filled = time.perf_counter() - start
+        start = time.perf_counter()
+        for i, tenant in enumerate(tenants):
+            if i and args.pool_interval:
+                time.sleep(args.pool_interval)
+            began = time.perf_counter()
+            try:
+                pool.provision(args.out, tenant, force=args.force)
+            except (FileExistsError, ValueError) as e:
+                print("ERROR:", e)
+                return 1
+            latencies.append(time.perf_counter() - began)
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.stop()
+    stats = pool.stats()
+    print(f"Pool of {args.pool} {args.key_size}-bit pairs filled in {filled:.2f}s with {pool.workers} worker(s)")
+    print(f"Provisioned {len(tenants)} tenants under {os.path.abspath(args.out)} in {elapsed:.2f}s: "
+          f"{stats['hits']} from the pool, {stats['misses']} generated inline")
+    print(f"per tenant: p50 {statistics.median(latencies) * 1e3:.1f} ms, max {max(latencies) * 1e3:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    tenants = args.tenants or [f"tenant-{i:04d}" for i in range(1, (args.count or 0) + 1)]
+
+    if not tenants:
+        # Single student key pair, as before
+        keys = p / "keys"
+        if args.type == "x25519":
+            name = "student_x25519"
+            priv_pem, pub_pem = generate_x25519_key_pair_pem()
+        else:
+            name = "student"
+            priv_pem, pub_pem = generate_key_pair_pem(args.key_size, args.exponent)
+        atomic_write_bytes(str(keys / f"{name}_private.pem"), priv_pem, mode=0o600)
+        atomic_write_bytes(str(keys / f"{name}_public.pem"), pub_pem, mode=0o644)
+
+        print("Generated keys:")
+        print(" -", (keys / f"{name}_private.pem").resolve())
+        print(" -", (keys / f"{name}_public.pem").resolve())
+        sys.exit(0)
 
-# write files
-(keys / "student_private.pem").write_bytes(priv_pem)
-(keys / "student_public.pem").write_bytes(pub_pem)
+    if args.pool:
+        if args.type != "rsa":
+            print("ERROR: --pool only applies to RSA keys (X25519 pairs take microseconds)")
+            sys.exit(1)
+        sys.exit(provision_from_pool(args, tenants))
 
-print("Generated keys:")
-print(" -", (keys / "student_private.pem").resolve())
-print(" -", (keys / "student_public.pem").resolve())
+    try:
+        report = provision_tenants(args.out, tenants, args.key_size, args.exponent, args.workers, args.force,
+                                   key_type=args.type)
+    except (FileExistsError, ValueError) as e:
+        print("ERROR:", e)
+        sys.exit(1)
+    kind = "X25519" if args.type == "x25519" else f"{args.key_size}-bit"
+    print(f"Generated {len(tenants)} {kind} key pairs under {os.path.abspath(args.out)}")
+    print(f"{report['seconds']:.2f}s with {report['workers']} worker(s): "
+          f"{report['keys_per_second']:.2f} keys/s, {report['keys_per_second_per_worker']:.2f} keys/s per core")
@@ -0,0 +1,43 @@
+# scripts/import_seeds.py
+# Bulk-imports per-subject seeds into the seed store.
+# Input: CSV lines of "subject,hex_seed" (use "-" to read from stdin).
+# The "default" subject lives in the seed file (SEED_FILE_PATH), which the service
+# never looks up in SQLite, so rows for it are rejected.
+import argparse
+import csv
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from app.seed_store import DEFAULT_SUBJECT, SQLiteSeedStore
+
+
+def read_rows(fh):
+    for row in csv.reader(fh):
+        if not row or row[0].startswith("#"):
+            continue
+        if len(row) != 2:
+            raise ValueError(f"Expected 'subject,hex_seed', got: {row!r}")
+        yield row[0].strip(), row[1].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import subject seeds into SQLite.")
+    parser.add_argument("csv_file", help="CSV file with subject,hex_seed rows ('-' for stdin)")
+    parser.add_argument("--db", default=os.environ.get("SEED_DB_PATH", "/data/seeds.db"))
+    args = parser.parse_args()
+
+    fh = sys.stdin if args.csv_file == "-" else open(args.csv_file, newline="")
+    with fh:
+        rows = list(read_rows(fh))
+    if any(subject == DEFAULT_SUBJECT for subject, _ in rows):
+        print(f"ERROR: {DEFAULT_SUBJECT!r} rows can't be imported; the service reads that seed from SEED_FILE_PATH "
+              "(write it with /decrypt-seed instead). Nothing was imported.")
+        sys.exit(1)
+    count = SQLiteSeedStore(args.db).bulk_import(rows)
+    print(f"Imported {count} seeds into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
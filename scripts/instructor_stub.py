@@ -0,0 +1,113 @@
+# scripts/instructor_stub.py
+# Local stand-in for the instructor API: accepts {"student_id", "github_repo_url",
+# "public_key"} and answers {"status": "success", "encrypted_seed"} with a seed
+# RSA-OAEP encrypted to the posted key, like the real endpoint (an X25519 key gets
+# an "x25519:" envelope instead). Failures and latency can be injected to
+# exercise the client's retries.
+#
+#   python scripts/instructor_stub.py --port 8099 --fail-rate 0.2 --latency 0.05
+#   python scripts/provision_fleet.py --student-id demo --instructor-url http://127.0.0.1:8099
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import x25519
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from app.crypto_utils import encrypt_with_public_key, encrypt_seed_x25519
+
+
+def stub_seed(student_id: str, secret: bytes) -> str:
+    """Stable per student (like the real API), unpredictable without `secret`."""
+    return hashlib.sha256(secret + student_id.encode()).hexdigest()
+
+
+class InstructorStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_rate: float = 0.0, latency: float = 0.0):
+        super().__init__(address, StubHandler)
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.secret = os.urandom(16)
+        self.counts = {"requests": 0, "connections": 0, "injected_failures": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible in the counts
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        server.count("requests")
+        payload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if server.latency:
+            time.sleep(server.latency)
+        if random.random() < server.fail_rate:
+            server.count("injected_failures")
+            return self._reply(503, {"status": "error", "message": "Injected failure"}, {"Retry-After": "0"})
+        try:
+            request = json.loads(payload)
+            student_id = request["student_id"]
+            public_key = serialization.load_pem_public_key(request["public_key"].encode())
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return self._reply(400, {"status": "error", "message": f"Bad request: {e}"})
+        seed = stub_seed(student_id, server.secret)
+        if isinstance(public_key, x25519.X25519PublicKey):
+            # An X25519 key negotiates the "x25519:" envelope instead of RSA-OAEP
+            encrypted_seed = encrypt_seed_x25519(seed, public_key)
+        else:
+            encrypted_seed = base64.b64encode(encrypt_with_public_key(seed.encode(), public_key)).decode("ascii")
+        self._reply(200, {"status": "success", "encrypted_seed": encrypted_seed})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the instructor seed API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    args = parser.parse_args()
+
+    server = InstructorStub((args.host, args.port), args.fail_rate, args.latency)
+    print(f"Instructor stub on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served: {server.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# scripts/provision_fleet.py
+# Key upload -> encrypted seed -> /decrypt-seed for many identities, over one
+# pooled HTTP session with bounded concurrency, jittered retries and a resumable
+# progress log (re-running skips identities that are already done).
+#
+#   python scripts/provision_fleet.py --manifest fleet.jsonl --concurrency 16
+#   python scripts/provision_fleet.py --student-id 23a91a61f1      # a single identity
+#
+# Manifest: JSON lines (or a JSON array) of {"student_id", "subject"?, "public_key"?,
+# "github_repo_url"?, "api_url"?}. Try it offline against scripts/instructor_stub.py.
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from app.provisioning_client import (
+    INSTRUCTOR_URL,
+    API_URL,
+    REPO_URL,
+    load_manifest,
+    provision_fleet,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision seeds for many identities.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="JSONL / JSON array of identities.")
+    source.add_argument("--student-id", help="Provision a single identity.")
+    parser.add_argument("--subject", help="Subject for --student-id (default: the default seed).")
+    parser.add_argument("--instructor-url", default=os.environ.get("INSTRUCTOR_URL", INSTRUCTOR_URL))
+    parser.add_argument("--api-url", default=os.environ.get("API_URL", API_URL), help="Base URL of the 2FA service.")
+    parser.add_argument("--public-key", default="student_public.pem", help="Default public key for entries without one.")
+    parser.add_argument("--repo", default=REPO_URL, help="Default github_repo_url.")
+    parser.add_argument("--progress", default="provision_progress.jsonl", help="Resumable progress log ('' to disable).")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    if args.manifest:
+        try:
+            entries = load_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+    else:
+        entries = [{"student_id": args.student_id, "subject": args.subject}]
+        if args.subject is None:
+            del entries[0]["subject"]
+
+    def report(result):
+        if result["status"] == "ok":
+            print(f"ok     {result['id']}")
+        else:
+            print(f"FAILED {result['id']}: {result['error']}")
+
+    summary = provision_fleet(
+        entries,
+        progress_path=args.progress or None,
+        concurrency=args.concurrency,
+        on_result=report,
+        instructor_url=args.instructor_url,
+        api_url=args.api_url,
+        public_key_path=args.public_key,
+        repo_url=args.repo,
+        retries=args.retries,
+        timeout=args.timeout,
+    )
+    rate = summary["ok"] / summary["seconds"] if summary["seconds"] else 0.0
+    print(f"{summary['ok']} provisioned, {summary['failed']} failed, {summary['skipped']} already done "
+          f"in {summary['seconds']:.2f}s ({rate:.1f} identities/s)")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 # scripts/sign_and_encrypt_commit.py
-import subprocess, base64, pathlib, sys
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives.asymmetric import utils, rsa
+# Single commit (HEAD) by default; --range proves every commit in a rev range:
+#   python scripts/sign_and_encrypt_commit.py --range v1.0..HEAD --output proofs.jsonl
+import argparse, subprocess, base64, pathlib, sys, time
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# Same cached key manager and primitives as the API
+from app.crypto_utils import (
+    load_private_key,
+    load_public_key,
+    sign_message_p1,
+    encrypt_with_public_key,
+)
+from app.commit_proofs import write_proofs
+
 PRIV_PEM = ROOT / "student_private.pem"       # No longer looking in the 'keys' subfolder
 INSTR_PUB_PEM = ROOT / "instructor_public.pem"
 
@@ -12,53 +21,40 @@ def get_latest_commit_hash():
     out = subprocess.check_output(["git", "log", "-1", "--format=%H"], cwd=ROOT)
     return out.decode().strip()
 
-def load_private_key(path: pathlib.Path):
-    pem = path.read_bytes()
-    priv = serialization.load_pem_private_key(pem, password=None)
-    return priv
-
-def load_public_key(path: pathlib.Path):
-    pem = path.read_bytes()
-    pub = serialization.load_pem_public_key(pem)
-    return pub
-
-def sign_commit(commit_hash: str, priv_key):
-    msg = commit_hash.encode("utf-8")  # ASCII/UTF-8 string per spec
-    signature = priv_key.sign(
-        msg,
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.MAX_LENGTH
-        ),
-        hashes.SHA256()
-    )
-    return signature
-
-def encrypt_signature(sig: bytes, instr_pub):
-    ct = instr_pub.encrypt(
-        sig,
-        padding.OAEP(
-            mgf=padding.MGF1(hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
-    )
-    return ct
+def prove_range(revs, output, workers):
+    start = time.perf_counter()
+    try:
+        written = write_proofs(revs, output, str(PRIV_PEM), str(INSTR_PUB_PEM), workers=workers, cwd=ROOT)
+    except ValueError as e:
+        print("ERROR:", e); sys.exit(1)
+    elapsed = time.perf_counter() - start
+    rate = f" ({written / elapsed:.1f} proofs/s)" if written else ""
+    print(f"Wrote {written} new proof(s) to {output} in {elapsed:.2f}s{rate}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Sign and encrypt commit hashes for the instructor.")
+    parser.add_argument("--range", dest="revs", help="Rev range to prove (e.g. v1.0..HEAD), one JSONL line per commit.")
+    parser.add_argument("--output", default="commit_proofs.jsonl", help="JSONL output for --range (resumed if present).")
+    parser.add_argument("--workers", type=int, default=None, help="Signing processes (default: CPU count).")
+    args = parser.parse_args()
+
     if not PRIV_PEM.exists():
         print("student_private.pem not found at", PRIV_PEM); sys.exit(1)
     if not INSTR_PUB_PEM.exists():
         print("instructor_public.pem not found at", INSTR_PUB_PEM); sys.exit(1)
 
+    if args.revs:
+        prove_range(args.revs, args.output, args.workers)
+        return
+
     commit_hash = get_latest_commit_hash()
     print("Commit hash:", commit_hash)
 
     priv = load_private_key(PRIV_PEM)
     instr_pub = load_public_key(INSTR_PUB_PEM)
 
-    sig = sign_commit(commit_hash, priv)
-    ct = encrypt_signature(sig, instr_pub)
+    sig = sign_message_p1(commit_hash, priv)
+    ct = encrypt_with_public_key(sig, instr_pub)
     b64 = base64.b64encode(ct).decode("ascii")
     print("Encrypted signature (BASE64, single line):")
     print(b64)
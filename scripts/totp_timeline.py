@@ -0,0 +1,101 @@
+# scripts/totp_timeline.py
+# Every TOTP code of one or more seeds over a time range, as CSV or JSON lines
+# (for audits: "which code was valid when", and backfilling code logs).
+#
+#   python scripts/totp_timeline.py --subject default --start 2025-01-01 --end 2026-01-01 -o codes.csv
+#   python scripts/totp_timeline.py --seeds-csv seeds.csv --start 2025-06-01 --end "2025-06-01 12:00:00" --format jsonl
+#   python scripts/totp_timeline.py --seed-hex <64 hex> --start 1735689600 --end 1735776000 --check
+#
+# Uses NumPy for the truncation step when it is installed (--scalar disables it).
+import argparse
+import calendar
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from app.seed_cache import SeedCache, SeedMissingError, parse_hex_seed
+from app.seed_store import DEFAULT_SUBJECT, FileSeedStore, SQLiteSeedStore, TenantSeedStore, validate_subject
+from app.totp_timeline import check_against_scalar, step_range, timeline, write_csv, write_jsonl
+from import_seeds import read_rows
+
+
+def parse_time(value: str) -> float:
+    """Unix seconds, or a UTC "YYYY-MM-DD[ HH:MM:SS]"."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return calendar.timegm(time.strptime(value, fmt))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Not a unix time or YYYY-MM-DD[ HH:MM:SS]: {value!r}")
+
+
+def load_seeds(args) -> list:
+    seeds = []
+    if args.subject:
+        store = TenantSeedStore(
+            FileSeedStore(SeedCache(os.environ.get("SEED_FILE_PATH", "/data/seed.txt"))),
+            SQLiteSeedStore(os.environ.get("SEED_DB_PATH", "/data/seeds.db")),
+        )
+        for subject in args.subject:
+            subject = validate_subject(subject)
+            seeds.append((subject, store.get(subject).seed))
+    for hex_seed in args.seed_hex or ():
+        seeds.append((DEFAULT_SUBJECT if len(args.seed_hex) == 1 else f"seed-{len(seeds)}", parse_hex_seed(hex_seed)))
+    if args.seeds_csv:
+        fh = sys.stdin if args.seeds_csv == "-" else open(args.seeds_csv, newline="")
+        with fh:
+            seeds.extend((validate_subject(subject), parse_hex_seed(hex_seed)) for subject, hex_seed in read_rows(fh))
+    return seeds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk TOTP code timeline for audits and backfills.")
+    parser.add_argument("--subject", action="append", help="Subject whose stored seed to use (repeatable).")
+    parser.add_argument("--seed-hex", action="append", help="Hex seed given directly (repeatable).")
+    parser.add_argument("--seeds-csv", help="CSV of subject,hex_seed rows ('-' for stdin).")
+    parser.add_argument("--start", type=parse_time, required=True, help="Unix seconds or UTC YYYY-MM-DD[ HH:MM:SS].")
+    parser.add_argument("--end", type=parse_time, required=True, help="End of the range (inclusive).")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout).")
+    parser.add_argument("--scalar", action="store_true", help="Don't use NumPy even if it is installed.")
+    parser.add_argument("--check", action="store_true", help="Only compare against the scalar path, write nothing.")
+    args = parser.parse_args()
+
+    try:
+        first, last = step_range(args.start, args.end)
+        seeds = load_seeds(args)
+    except (OSError, ValueError, SeedMissingError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not seeds:
+        parser.error("give at least one of --subject, --seed-hex or --seeds-csv")
+    vectorized = False if args.scalar else None
+
+    if args.check:
+        failed = 0
+        for subject, seed in seeds:
+            mismatches = check_against_scalar(seed, first, last - first + 1, vectorized)
+            failed += bool(mismatches)
+            print(f"{subject}: {len(mismatches)} mismatches in {last - first + 1} steps"
+                  + (f" (first at step {mismatches[0]})" if mismatches else ""))
+        sys.exit(1 if failed else 0)
+
+    write = write_csv if args.format == "csv" else write_jsonl
+    start = time.perf_counter()
+    out = sys.stdout if args.output is None else open(args.output, "w", newline="")
+    try:
+        rows = write(timeline(seeds, first, last, vectorized=vectorized), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{rows} codes for {len(seeds)} seed(s) in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
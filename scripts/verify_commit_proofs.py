@@ -0,0 +1,54 @@
+# scripts/verify_commit_proofs.py
+# Verifies commit proofs produced by sign_and_encrypt_commit.py --range (JSONL, one
+# {"commit", "proof"} per line; bare {"commit", "signature"} lines work too):
+#   python scripts/verify_commit_proofs.py commit_proofs.jsonl --private-key instructor_private.pem
+# Writes one {"commit", "valid", "key" | "error"} line per input line; exits 1 if any failed.
+import argparse, json, pathlib, sys, time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from app.commit_proofs import verify_proofs
+
+def read_entries(path):
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    entries = []
+    with stream:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            # Unparseable lines still get a result, so output lines match input lines
+            entries.append(entry if isinstance(entry, dict) else {"commit": None, "line": number})
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify RSA-PSS commit proofs.")
+    parser.add_argument("input", help="JSONL file of proofs ('-' for stdin).")
+    parser.add_argument("--public-key", action="append", dest="public_keys",
+                        help="Signer public key (repeatable; default: student_public.pem).")
+    parser.add_argument("--private-key", help="Private key for the encryption layer (e.g. instructor_private.pem).")
+    parser.add_argument("--output", default="-", help="Where to write per-item results (default: stdout).")
+    parser.add_argument("--workers", type=int, default=None, help="Verifier processes (default: CPU count).")
+    args = parser.parse_args()
+
+    public_keys = args.public_keys or [str(ROOT / "student_public.pem")]
+    entries = read_entries(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    start = time.perf_counter()
+    failed = 0
+    with out:
+        for result in verify_proofs(entries, public_keys, args.private_key, workers=args.workers):
+            failed += not result["valid"]
+            out.write(json.dumps(result) + "\n")
+    elapsed = time.perf_counter() - start
+
+    rate = len(entries) / elapsed if elapsed else 0
+    print(f"{len(entries) - failed}/{len(entries)} valid in {elapsed:.2f}s ({rate:.0f} proofs/s)", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()